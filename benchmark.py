@@ -0,0 +1,736 @@
+# -*- coding: utf-8 -*-
+# python3
+"""
+Offline benchmarks for papercrawl.py, run against a local HTTP server.
+
+    python benchmark.py engines --papers 500 --size 256 --handshake-ms 30
+    python benchmark.py parse
+    python benchmark.py throttle --capacity 20
+    python benchmark.py crawl --latency-ms 20 --error-rate 0.02
+
+The index pages under fixtures/ are synthetic copies of the real ones (same
+markup, generated titles) and can be rebuilt with ``python benchmark.py fixtures``.
+``crawl`` serves them, with synthetic PDFs, from a mock conference server and
+runs every download_* path against it end to end.
+"""
+
+import os
+import sys
+import gzip
+import hashlib
+import time
+import random
+import tracemalloc
+import json
+import resource
+import multiprocessing
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from typing import Any, List, Optional, Tuple, Dict
+from urllib.parse import parse_qs, urlsplit
+
+from bs4 import SoupStrainer
+
+import papercrawl
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_YEAR = 2024
+
+_WORDS = ('learning language model models large retrieval generative summarization dialogue '
+          'neural graph efficient robust multimodal reasoning transformer attention sparse '
+          'contrastive alignment benchmark evaluation reinforcement diffusion representation '
+          'knowledge adaptive scalable towards via for with of and in on a the through '
+          'instruction tuning agents vision text code translation question answering').split()
+_NAMES = ('Wei Li Zhang Wang Chen Liu Yang Huang Zhao Wu Zhou Xu Sun Ma Zhu Hu Guo He Lin Luo '
+          'Smith Johnson Brown Garcia Miller Davis Martin Lee Walker Hall Allen Young King').split()
+
+
+class _ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+class PaperHandler(BaseHTTPRequestHandler):
+    """
+    Serves ``/paper/<n>.pdf`` as a synthetic PDF of ``server.paper_size`` bytes.
+
+    ``server.handshake`` seconds are spent once per new connection to stand in
+    for the TCP + TLS handshake a real conference host costs.
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        if self.server.handshake:
+            time.sleep(self.server.handshake)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if not self.path.startswith('/paper/'):
+            self.send_error(404)
+            return
+        body = self.server.payload
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ThrottlingHandler(PaperHandler):
+    """
+    PaperHandler that serves at most ``server.capacity`` requests per second and
+    answers the rest with ``429 Too Many Requests`` and ``Retry-After``.
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            now = time.monotonic()
+            server.tokens = min(server.capacity, server.tokens + (now - server.last) * server.capacity)
+            server.last = now
+            allowed = server.tokens >= 1
+            if allowed:
+                server.tokens -= 1
+                server.served += 1
+            else:
+                server.throttled += 1
+        if not allowed:
+            body = b'Too Many Requests'
+            self.send_response(429)
+            self.send_header('Retry-After', str(server.retry_after))
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+
+class ConferenceHandler(PaperHandler):
+    """
+    Stands in for every conference host at once, see :data:`MOCK_HOSTS`.
+
+    Index pages are replayed from ``server.pages`` ((host, path) -> body), ICML
+    detail pages are generated, the OpenReview notes API pages through
+    ``server.notes`` (venue id -> API 2 notes), and every PDF link gets
+    ``server.payload``, with an ETag and Range/If-Range support. The answers are slowed and broken on purpose:
+
+    * ``server.latency`` seconds before every answer,
+    * ``server.bandwidth`` bytes per second per response (0: unlimited),
+    * ``server.error_rate`` of the requests are answered with 503,
+    * ``server.truncate_rate`` of the PDFs are cut off halfway, to be resumed,
+    * ``server.missing`` (host, path) pairs are answered with 404.
+
+    Index pages carry an ETag and are answered with 304 when it is sent back. A
+    ``server.requests`` list, when set, gets the (host, path, If-None-Match) of every request.
+    """
+    head = False
+
+    def do_GET(self):
+        server = self.server
+        host = (self.headers.get('Host') or '').split(':')[0]
+        path = urlsplit(self.path).path
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            error, truncate = server.rng.random() < server.error_rate, server.rng.random() < server.truncate_rate
+            if getattr(server, 'requests', None) is not None:
+                server.requests.append((host, self.path, self.headers.get('If-None-Match')))
+        if (host, path) in server.missing:
+            self.send_error(404)
+        elif error:
+            self._send(503, b'Service Unavailable', 'text/plain', [('Retry-After', '0')])
+        elif (host, self.path) in server.pages:
+            body = server.pages[(host, self.path)]
+            etag = '"{}"'.format(hashlib.sha1(body).hexdigest()[:16])
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            else:
+                self._send(200, body, 'text/html; charset=utf-8', [('ETag', etag)])
+        elif host.endswith('openreview.net') and path == '/notes':
+            self._send_notes(host, parse_qs(urlsplit(self.path).query))
+        elif host == 'icml.cc' and path.startswith('/virtual/'):
+            slug = 'icml' + path.rstrip('/').rsplit('/', 1)[-1]
+            self._send(200, '<div class="text-center"><a href="https://proceedings.mlr.press/v235/{}.html">PDF</a>'
+                       '</div>'.format(slug).encode(), 'text/html')
+        elif host == 'proceedings.mlr.press' and path.endswith('.html'):
+            slug = path.rsplit('/', 1)[-1][:-len('.html')]
+            self._send(200, '<div id="extras"><ul><li><a href="https://proceedings.mlr.press/v235/{0}/{0}.pdf">'
+                       'Download PDF</a></li></ul></div>'.format(slug).encode(), 'text/html')
+        elif path.endswith('.pdf') or (path == '/pdf' and parse_qs(urlsplit(self.path).query).get('id')):
+            self._send_pdf(truncate)
+        else:
+            self.send_error(404)
+
+    def do_HEAD(self):
+        self.head = True
+        try:
+            self.do_GET()
+        finally:
+            self.head = False
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[List[Tuple[str, str]]] = None,
+              truncate: bool = False) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers or []:
+            self.send_header(key, value)
+        self.end_headers()
+        if self.head:
+            return
+        if truncate:
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        bandwidth = self.server.bandwidth
+        chunk = 16 * 1024
+        for start in range(0, len(body), chunk):
+            self.wfile.write(body[start:start + chunk])
+            if bandwidth:
+                time.sleep(min(chunk, len(body) - start) / bandwidth)
+
+    def _send_notes(self, host: str, query: Dict[str, List[str]]) -> None:
+        # only API 2 knows the fixture venue, API 1 answers like it does for a venue it does not have
+        notes = self.server.notes.get(query.get('content.venueid', [''])[0], []) if host.startswith('api2.') else []
+        offset, limit = int(query.get('offset', ['0'])[0]), int(query.get('limit', ['1000'])[0])
+        fields = {field[len('content.'):] for field in query.get('select', [''])[0].split(',') if field.startswith('content.')}
+        page = [dict(note, content={key: value for key, value in note['content'].items() if not fields or key in fields})
+                for note in notes[offset:offset + limit]]
+        self._send(200, json.dumps({'notes': page, 'count': len(notes)}).encode(), 'application/json')
+
+    def _send_pdf(self, truncate: bool) -> None:
+        body = self.server.payload
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest()[:16])
+        spec = (self.headers.get('Range') or '').partition('bytes=')[2].partition('-')[0]
+        if not spec.isdigit() or self.headers.get('If-Range', etag) != etag:
+            self._send(200, body, 'application/pdf', [('ETag', etag)], truncate=truncate)
+        elif int(spec) < len(body):
+            offset = int(spec)
+            self._send(206, body[offset:], 'application/pdf',
+                       [('ETag', etag), ('Content-Range', 'bytes {}-{}/{}'.format(offset, len(body) - 1, len(body)))])
+        else:
+            self._send(416, b'', 'text/plain', [('Content-Range', 'bytes */{}'.format(len(body)))])
+
+
+def start_server(handler=PaperHandler, **attrs) -> HTTPServer:
+    server = _ThreadingServer(('127.0.0.1', 0), handler)
+    for key, value in attrs.items():
+        setattr(server, key, value)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def download_all(available_paper_list: List[Tuple[str, str, str]], poolnum: int = 8,
+                 engine: str = 'async') -> List[bool]:
+    """
+    Downloads every (url, savepath, title) with the selected engine and returns the status of each, in order.
+    """
+    return papercrawl.download_stream(list(available_paper_list), poolnum=poolnum, engine=engine)[1]
+
+
+def is_related(title: str, keywords: List[str]) -> bool:
+    """
+    The title filter before KeywordMatcher, kept as the reference its substring mode is checked against.
+    """
+    title = title.lower()
+    return any(kw.lower() in title for kw in keywords)
+
+
+def _paper_list(base_url: str, savedir: str, papers: int) -> List[Tuple[str, str, str]]:
+    return [('{}/paper/{}.pdf'.format(base_url, i), os.path.join(savedir, '{}.pdf'.format(i)), str(i))
+            for i in range(papers)]
+
+
+def _title(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(5, 14))]
+    return ' '.join(words).capitalize()
+
+
+def _authors(rng: random.Random) -> List[str]:
+    return ['{} {}'.format(rng.choice(_NAMES), rng.choice(_NAMES)) for _ in range(rng.randint(2, 8))]
+
+
+def _page(body: str, title: str) -> str:
+    # every real index page carries a few hundred KB of navigation, scripts and styles
+    chrome = ''.join('<li class="nav-item"><a class="nav-link" href="/page/{0}">Menu entry {0}</a></li>'.format(i)
+                     for i in range(300))
+    return ('<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{}</title>'
+            '<script>var config = {{"theme": "light"}};</script></head><body>'
+            '<nav class="navbar"><ul class="navbar-nav">{}</ul></nav>'
+            '<main class="container">{}</main><footer class="footer">{}</footer></body></html>').format(
+                title, chrome, body, chrome)
+
+
+def make_acl_events(rng: random.Random, conference: str = 'acl', year: int = FIXTURE_YEAR) -> str:
+    blocks = []
+    volumes = [(cat, n) for cat, n in zip(papercrawl.nlp_categories(conference, year), (900, 160, 1000))]
+    volumes += [('{}{}-{}'.format(year, name, i), 120) for i in range(1, 4)
+                for name in ('wmt', 'bionlp', 'repl4nlp', 'sigdial', 'argmining')]
+    for cat, num in volumes:
+        volume = cat.replace(str(year), str(year) + '.', 1)
+        items = []
+        for i in range(num):
+            anthology_id = '{}.{}'.format(volume, i + 1)
+            authors = ' | '.join('<a href="/people/{0}/">{1}</a>'.format(a.lower().replace(' ', '-'), a)
+                                 for a in _authors(rng))
+            items.append(
+                '<p class="d-sm-flex align-items-stretch"><span class="d-block mr-2 text-nowrap list-button-row">'
+                '<a class="badge badge-primary align-middle mr-1" href="https://aclanthology.org/{0}.pdf">pdf</a>'
+                '<a class="badge badge-secondary align-middle mr-1" href="https://aclanthology.org/{0}.bib">bib</a>'
+                '</span><span class="d-block"><strong><a class="align-middle" href="/{0}/">{1}</a></strong>'
+                '<br>{2}</span></p>'.format(anthology_id, _title(rng), authors))
+        blocks.append('<div id="{}" class="card bg-light mb-2 mb-lg-3"><div class="card-body">'
+                      '<h4 class="card-title">Proceedings volume {}</h4>{}</div></div>'.format(
+                          cat, volume, ''.join(items)))
+    return _page(''.join(blocks), 'Annual Meeting of the Association for Computational Linguistics')
+
+
+def make_neurips_list(rng: random.Random, year: int = FIXTURE_YEAR) -> str:
+    items = []
+    for i in range(4000):
+        paper_hash = '{:032x}'.format(rng.getrandbits(128))
+        items.append('<li class="conference"><div class="paper-content"><a title="paper title" '
+                     'href="/paper_files/paper/{0}/hash/{1}-Abstract-Conference.html">{2}</a> '
+                     '<span class="paper-authors">{3}</span></div></li>'.format(
+                         year, paper_hash, _title(rng), ', '.join(_authors(rng))))
+    return _page('<ul class="paper-list">{}</ul>'.format(''.join(items)), 'NeurIPS {}'.format(year))
+
+
+def make_pmlr_volume(rng: random.Random, volume: int = 235) -> str:
+    items = []
+    for i in range(2600):
+        slug = '{}{}{}'.format(rng.choice(_NAMES).lower(), str(volume)[-2:], 'abcdefgh'[i % 8])
+        items.append('<div class="paper"><p class="title">{0}</p><p class="details"><span class="authors">{1}'
+                     '</span>; <span class="info">Proceedings of the 41st International Conference on Machine '
+                     'Learning</span></p><p class="links">[<a href="https://proceedings.mlr.press/v{2}/{3}{4}.html">abs</a>]'
+                     '[<a href="https://proceedings.mlr.press/v{2}/{3}{4}/{3}{4}.pdf" target="_blank">Download PDF</a>]'
+                     '</p></div>'.format(_title(rng), ', '.join(_authors(rng)), volume, slug, i))
+    return _page(''.join(items), 'Proceedings of Machine Learning Research Volume {}'.format(volume))
+
+
+def make_iclr_schedule(rng: random.Random, year: int = FIXTURE_YEAR) -> str:
+    cards = []
+    for i in range(2800):
+        kind = 'Workshop' if i % 20 == 0 else 'Poster'
+        forum = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789') for _ in range(10))
+        cards.append('<div onclick="showDetail({0})" class="maincard narrower {1}" id="maincard_{0}">'
+                     '<div class="maincardHeader">{2}</div><div class="maincardBody">{3}</div>'
+                     '<div class="maincardFooter">{4}</div><a href="https://openreview.net/forum?id={5}" '
+                     'class="btn btn-default btn-xs href_PDF" title="OpenReview">OpenReview</a></div>'.format(
+                         20000 + i, kind.lower(), kind, _title(rng), ' &middot; '.join(_authors(rng)), forum))
+    return _page('<div class="container"><div class="row">{}</div></div>'.format(''.join(cards)),
+                 'ICLR {} Schedule'.format(year))
+
+
+def make_icml_downloads(rng: random.Random, year: int = FIXTURE_YEAR) -> str:
+    items = ''.join('<li><a href="/virtual/{}/poster/{}">{}</a></li>'.format(year, 30000 + i, _title(rng))
+                    for i in range(2600))
+    return _page('<div class="list_html"><ul>{}</ul></div>'.format(items), 'ICML {} Downloads'.format(year))
+
+
+def make_sigir_proceedings(rng: random.Random, year: int = FIXTURE_YEAR) -> str:
+    items = []
+    for i in range(900):
+        items.append('<h3><a class="DLtitleLink" href="https://dl.acm.org/doi/10.1145/3626772.{0}">{1}</a></h3>'
+                     '<ul class="DLauthors"><li class="nameList">{2}</li></ul><div class="DLabstract">'
+                     '<div style="display:inline"><p>{3}</p></div></div>'.format(
+                         3657700 + i, _title(rng), '</li><li class="nameList">'.join(_authors(rng)),
+                         ' '.join(_title(rng) for _ in range(8))))
+    return _page('<div id="DLcontent">{}</div>'.format(''.join(items)), 'SIGIR {} Proceedings'.format(year))
+
+
+# fixture name -> (generator, strainer the crawler uses for it)
+FIXTURES = {
+    'acl-events': (make_acl_events, SoupStrainer("div", {"id": papercrawl.nlp_categories('acl', FIXTURE_YEAR)})),
+    'neurips-list': (make_neurips_list, papercrawl.NEURIPS_TARGET),
+    'pmlr-volume': (make_pmlr_volume, papercrawl.PMLR_TARGET),
+    'icml-downloads': (make_icml_downloads, papercrawl.ICML_TARGET),
+    'iclr-schedule': (make_iclr_schedule, papercrawl.ICLR_TARGET),
+    'sigir-proceedings': (make_sigir_proceedings, papercrawl.SIGIR_TARGET),
+}
+
+
+def load_fixture(name: str) -> bytes:
+    with gzip.open(os.path.join(FIXTURE_DIR, name + '.html.gz'), 'rb') as file:
+        return file.read()
+
+
+def make_fixtures(args) -> None:
+    if not os.path.isdir(FIXTURE_DIR):
+        os.makedirs(FIXTURE_DIR)
+    for name, (generate, _) in FIXTURES.items():
+        html = generate(random.Random(name)).encode('utf-8')
+        path = os.path.join(FIXTURE_DIR, name + '.html.gz')
+        # mtime=0 keeps the archives byte-identical across rebuilds
+        with open(path, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as file:
+            file.write(html)
+        print('{:<20} {:8.0f} KB -> {}'.format(name, len(html) / 1024, os.path.relpath(path)))
+
+
+def _available_parsers() -> List[str]:
+    parsers = ['html.parser']
+    try:
+        import lxml  # noqa: F401
+        parsers.append('lxml')
+    except ImportError:
+        pass
+    return parsers
+
+
+def bench_parse(args) -> None:
+    parsers = args.parser or _available_parsers()
+    print('{:<20} {:<12} {:<9} {:>9} {:>12}'.format('page', 'parser', 'scope', 'time (s)', 'peak (MB)'))
+    for name, (_, strainer) in FIXTURES.items():
+        html = load_fixture(name)
+        for parser in parsers:
+            for scope, parse_only in (('full', None), ('strained', strainer)):
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    papercrawl.parse_html(html, parser=parser, parse_only=parse_only)
+                    timings.append(time.perf_counter() - start)
+                tracemalloc.start()
+                soup = papercrawl.parse_html(html, parser=parser, parse_only=parse_only)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                del soup
+                print('{:<20} {:<12} {:<9} {:>9.3f} {:>12.1f}'.format(
+                    name, parser, scope, min(timings), peak / 1024 / 1024))
+
+
+# keywords a user may look for that the synthetic titles rarely contain
+_TOPICS = ('quantum', 'protein folding', 'federated', 'chain-of-thought', 'hallucination', 'tokenizer',
+           'speech', 'autonomous driving', 'recommendation', 'molecule', 'time series', 'watermark',
+           'privacy', 'fairness', 'compression', 'distillation', 'segmentation', 'tabular', 'causal',
+           'continual', 'few-shot', 'zero-shot', 'jailbreak', 'mixture of experts', 'state space')
+
+
+def bench_keywords(args) -> None:
+    rng = random.Random('keywords')
+    titles = [_title(rng) for _ in range(args.titles)]
+    topics = list(_TOPICS) * (args.terms // len(_TOPICS) + 1)
+    keywords = [rng.choice(_WORDS[:10])] + topics[:args.terms - 1]
+    legacy = '-'.join(kw.replace('-', ' ') for kw in keywords)
+    print('{} titles, {} keywords'.format(len(titles), len(keywords)))
+
+    def run(name, match) -> int:
+        timings, hits = [], 0
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits = sum(1 for title in titles if match(title))
+            timings.append(time.perf_counter() - start)
+        print('{:<28} {:>8.3f}s {:>12.0f} titles/s {:>7} hits'.format(name, min(timings), len(titles) / min(timings), hits))
+        return hits
+
+    split = legacy.split('-')
+    expected = run('is_related', lambda title: is_related(title, split))
+    for mode in papercrawl.KeywordMatcher.MODES:
+        matcher = papercrawl.KeywordMatcher.from_keywords(legacy, match=mode)
+        hits = run('KeywordMatcher ({})'.format(mode), matcher.matches)
+        assert mode != 'substring' or hits == expected, 'matcher disagrees with is_related'
+    query = '{} AND (retrieval OR "dialogue" OR {}) NOT survey'.format(keywords[0], ' OR '.join(
+        '"{}"'.format(kw) for kw in keywords[1:]))
+    run('boolean query (word)', papercrawl.KeywordMatcher(query, match='word').matches)
+
+
+def bench_throttle(args) -> None:
+    payload = b'%PDF-1.4\n' + os.urandom(args.size * 1024)
+    print('{} papers from a host serving {} requests/s, poolnum {}'.format(args.papers, args.capacity, args.poolnum))
+    modes = (('no limiter', 0, 0), ('adaptive', args.rate, args.max_retries))
+    for name, rate, max_retries in modes:
+        server = start_server(ThrottlingHandler, payload=payload, handshake=0, capacity=args.capacity,
+                              tokens=float(args.capacity), last=time.monotonic(), lock=threading.Lock(),
+                              served=0, throttled=0, retry_after=args.retry_after)
+        papercrawl.configure_rate_limit(rate=rate, max_retries=max_retries)
+        savedir = tempfile.mkdtemp(prefix='papercrawl-bench-')
+        try:
+            items = _paper_list('http://127.0.0.1:{}'.format(server.server_address[1]), savedir, args.papers)
+            start = time.perf_counter()
+            result = download_all(items, poolnum=args.poolnum, engine='async')
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+            shutil.rmtree(savedir, ignore_errors=True)
+        print('{:>10}: {:4d} saved, {:4d} failed, {:5d} x 429, {:6.1f} papers/s ({:.1f}s)'.format(
+            name, result.count(True), result.count(False), server.throttled, result.count(True) / elapsed, elapsed))
+
+
+def bench_engines(args) -> None:
+    papercrawl.configure_rate_limit(rate=args.rate)
+    payload = b'%PDF-1.4\n' + os.urandom(args.size * 1024)
+    server = start_server(payload=payload, handshake=args.handshake_ms / 1000.0)
+    base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    print('{} papers x {} KB, {} ms per new connection, poolnum {}'.format(
+        args.papers, args.size, args.handshake_ms, args.poolnum))
+    try:
+        for engine in args.engine:
+            savedir = tempfile.mkdtemp(prefix='papercrawl-bench-')
+            try:
+                items = _paper_list(base_url, savedir, args.papers)
+                start = time.perf_counter()
+                result = download_all(items, poolnum=args.poolnum, engine=engine)
+                elapsed = time.perf_counter() - start
+            finally:
+                shutil.rmtree(savedir, ignore_errors=True)
+            print('{:>6}: {:8.1f} papers/s  ({:.2f}s, {} failed)'.format(
+                engine, len(items) / elapsed, elapsed, result.count(False)))
+    finally:
+        server.shutdown()
+
+
+# the hosts the crawler talks to, all served by ConferenceHandler
+MOCK_HOSTS = ('www.aclanthology.org', 'aclanthology.org', 'proceedings.neurips.cc', 'proceedings.mlr.press',
+              'icml.cc', 'iclr.cc', 'openreview.net', 'api.openreview.net', 'api2.openreview.net',
+              'sigir.org', 'dl.acm.org', 'doi.org')
+
+# (host, path) the crawler requests for FIXTURE_YEAR -> fixture replayed there
+MOCK_PAGES = {
+    ('www.aclanthology.org', '/events/acl-{}/'.format(FIXTURE_YEAR)): 'acl-events',
+    ('proceedings.neurips.cc', '/paper_files/paper/{}'.format(FIXTURE_YEAR)): 'neurips-list',
+    ('proceedings.mlr.press', '/v{}/'.format(papercrawl.PMLR_VOLUMES[FIXTURE_YEAR])): 'pmlr-volume',
+    ('icml.cc', '/Downloads/{}'.format(FIXTURE_YEAR)): 'icml-downloads',
+    ('iclr.cc', '/Conferences/{}/Schedule'.format(FIXTURE_YEAR)): 'iclr-schedule',
+    ('sigir.org', '/sigir{}/program/proceedings/'.format(FIXTURE_YEAR)): 'sigir-proceedings',
+}
+
+
+def make_openreview_notes(rng: random.Random) -> List[Dict[str, Any]]:
+    """
+    The conference papers of the ICLR schedule fixture as API 2 notes, so both ICLR listings find the same papers.
+    """
+    html = papercrawl.parse_html(load_fixture('iclr-schedule'), parse_only=papercrawl.ICLR_TARGET)
+    notes = []
+    for number, card in enumerate(html.find_all('div', {'onclick': True}), 1):
+        if 'Workshop' in card.text:
+            continue
+        forum = card.find('a').attrs['href'].rpartition('id=')[2]
+        authors = [name.strip() for name in card.find('div', {'class': 'maincardFooter'}).text.split('\u00b7')]
+        notes.append({'id': forum, 'forum': forum, 'number': number, 'content': {
+            'title': {'value': card.find('div', {'class': 'maincardBody'}).text.strip()},
+            'authors': {'value': authors},
+            'abstract': {'value': ' '.join(_title(rng) for _ in range(8))},
+            'venue': {'value': 'ICLR {} Poster'.format(FIXTURE_YEAR)},
+            'venueid': {'value': 'ICLR.cc/{}/Conference'.format(FIXTURE_YEAR)}}})
+    return notes
+
+
+def _crawl_sigir(args, savedir: str) -> int:
+    # PDFs on the ACM DL are fetched by Chrome, which cannot be pointed at the mock server
+    return len(papercrawl.CONFERENCES['sigir'].discover(FIXTURE_YEAR, args.keywords, savedir))
+
+
+# scenario -> (runs it and returns the number of papers listed only, (host, path) answered 404)
+CRAWLS = {
+    'acl': (lambda args, savedir: papercrawl.download_nlp_paper(
+        'acl', FIXTURE_YEAR, args.keywords, savedir, args.poolnum, engine=args.engine), ()),
+    'neurips': (lambda args, savedir: papercrawl.download_neurips_paper(
+        FIXTURE_YEAR, args.keywords, savedir, args.poolnum, engine=args.engine), ()),
+    'icml': (lambda args, savedir: papercrawl.download_icml_paper(
+        FIXTURE_YEAR, args.keywords, savedir, args.poolnum, engine=args.engine), ()),
+    # PMLR index down: icml.cc list, every PDF link resolved through two detail pages
+    'icml-detail': (lambda args, savedir: papercrawl.download_icml_paper(
+        FIXTURE_YEAR, args.keywords, savedir, args.poolnum, engine=args.engine),
+        (('proceedings.mlr.press', '/v{}/'.format(papercrawl.PMLR_VOLUMES[FIXTURE_YEAR])),)),
+    'iclr': (lambda args, savedir: papercrawl.download_iclr_paper(
+        FIXTURE_YEAR, args.keywords, savedir, args.poolnum, engine=args.engine), ()),
+    # OpenReview API down: the iclr.cc schedule page is scraped instead
+    'iclr-schedule': (lambda args, savedir: papercrawl.download_iclr_paper(
+        FIXTURE_YEAR, args.keywords, savedir, args.poolnum, engine=args.engine),
+        (('api2.openreview.net', '/notes'), ('api.openreview.net', '/notes'))),
+    'sigir': (_crawl_sigir, ()),
+}
+
+
+def _run_crawl(name: str, args, base_url: str, savedir: str, queue: Any) -> None:
+    # runs in its own process, so peak RSS and CPU time are the scenario's alone
+    logging.getLogger().setLevel(logging.WARNING)
+    papercrawl.override_hosts({host: base_url for host in MOCK_HOSTS})
+    papercrawl.configure_rate_limit(rate=args.rate, max_retries=args.max_retries)
+    papercrawl.configure_cache(None)
+    metrics = papercrawl.configure_metrics()
+    who = (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    cpu = -sum(u.ru_utime + u.ru_stime for u in map(resource.getrusage, who))
+    start = time.perf_counter()
+    listed = CRAWLS[name][0](args, savedir)
+    elapsed = time.perf_counter() - start
+    usage = [resource.getrusage(w) for w in who]
+    cpu += sum(u.ru_utime + u.ru_stime for u in usage)
+    summary = metrics.summary()
+    stages = summary['stages']
+
+    def percentile(stage: str, q: str) -> Optional[float]:
+        return round(stages[stage][q] * 1000, 2) if stage in stages and stages[stage][q] is not None else None
+
+    papers = summary['papers']['ok']
+    queue.put({'papers': papers, 'failed': summary['papers']['failed'], 'listed': listed or 0,
+               'seconds': round(elapsed, 3), 'papers_per_s': round(papers / elapsed, 1),
+               'mb_per_s': round(summary['bytes'] / elapsed / 1024 / 1024, 2),
+               'download_p50_ms': percentile('download_seconds', 'p50'),
+               'download_p99_ms': percentile('download_seconds', 'p99'),
+               'fetch_p50_ms': percentile('fetch_seconds', 'p50'),
+               # ru_maxrss is in KB on Linux
+               'peak_rss_mb': round(max(u.ru_maxrss for u in usage) / 1024, 1),
+               'cpu_s': round(cpu, 2)})
+
+
+def _compare(name: str, result: Dict[str, Any], baseline: Optional[Dict[str, Any]], max_regression: float) -> List[str]:
+    if not baseline:
+        return []
+    problems = []
+    if result['failed'] > baseline['failed']:
+        problems.append('{}: {} failed, baseline {}'.format(name, result['failed'], baseline['failed']))
+    if result['papers'] + result['listed'] != baseline['papers'] + baseline['listed']:
+        problems.append('{}: {} papers, baseline {}'.format(name, result['papers'] + result['listed'],
+                                                          baseline['papers'] + baseline['listed']))
+    if baseline['papers_per_s'] and result['papers_per_s'] < baseline['papers_per_s'] * (1 - max_regression):
+        problems.append('{}: {} papers/s, baseline {}'.format(name, result['papers_per_s'], baseline['papers_per_s']))
+    return problems
+
+
+def bench_crawl(args) -> None:
+    pages = {key: load_fixture(name) for key, name in MOCK_PAGES.items()}
+    server = start_server(ConferenceHandler, payload=b'%PDF-1.4\n' + os.urandom(args.size * 1024),
+                          handshake=args.handshake_ms / 1000.0, latency=args.latency_ms / 1000.0,
+                          bandwidth=args.bandwidth * 1024, error_rate=args.error_rate,
+                          truncate_rate=args.truncate_rate, missing=set(), pages=pages,
+                          notes={'ICLR.cc/{}/Conference'.format(FIXTURE_YEAR): make_openreview_notes(random.Random('notes'))},
+                          rng=random.Random('crawl'), lock=threading.Lock())
+    base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    settings = {key: getattr(args, key) for key in ('poolnum', 'keywords', 'size', 'latency_ms',
+                                                    'bandwidth', 'handshake_ms', 'error_rate', 'truncate_rate')}
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            stored = json.load(file)
+        baseline = stored['results']
+        changed = sorted(key for key, value in settings.items() if stored['settings'].get(key) != value)
+        if changed:
+            print('note: {} differ from the baseline run'.format(', '.join(changed)))
+    print("{} engine, poolnum {}, keywords '{}', {} KB PDFs, {} ms latency, {} KB/s, {:.0%} errors, {:.0%} truncated".format(
+        ' and '.join(args.engine), args.poolnum, args.keywords, args.size, args.latency_ms, '{:g}'.format(args.bandwidth) if args.bandwidth else 'unlimited',
+        args.error_rate, args.truncate_rate))
+    print('{:<18} {:>6} {:>6} {:>9} {:>7} {:>9} {:>9} {:>9} {:>8} {:>7} {:>9}'.format(
+        'path', 'papers', 'failed', 'papers/s', 'MB/s', 'dl p50ms', 'dl p99ms', 'idx p50ms', 'RSS MB', 'CPU s',
+        'vs base'))
+    results, problems = {}, []
+    try:
+        for engine, name in [(engine, name) for engine in args.engine for name in args.only or list(CRAWLS)]:
+            if engine != 'async' and name == 'sigir':
+                # listing only, the engine makes no difference
+                continue
+            # results of the async engine keep the plain scenario name
+            key = name if engine == 'async' else '{}/{}'.format(name, engine)
+            server.missing = set(CRAWLS[name][1])
+            savedir = tempfile.mkdtemp(prefix='papercrawl-bench-')
+            # spawned, not forked: the child should not inherit the fixtures and the server's memory
+            context = multiprocessing.get_context('spawn')
+            queue = context.Queue()
+            process = context.Process(target=_run_crawl,
+                                      args=(name, argparse.Namespace(**dict(vars(args), engine=engine)),
+                                            base_url, savedir, queue))
+            try:
+                process.start()
+                result = queue.get()
+                process.join()
+            finally:
+                shutil.rmtree(savedir, ignore_errors=True)
+            results[key] = result
+            base = baseline.get(key)
+            problems += _compare(key, result, base, args.max_regression)
+            versus = '{:+.0%}'.format(result['papers_per_s'] / base['papers_per_s'] - 1) if base and base['papers_per_s'] else ''
+            print('{:<18} {:>6} {:>6} {:>9} {:>7} {:>9} {:>9} {:>9} {:>8} {:>7} {:>9}'.format(
+                key, result['papers'] or '({})'.format(result['listed']), result['failed'], result['papers_per_s'],
+                result['mb_per_s'], result['download_p50_ms'] or '-', result['download_p99_ms'] or '-',
+                result['fetch_p50_ms'] or '-', result['peak_rss_mb'], result['cpu_s'], versus))
+    finally:
+        server.shutdown()
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({'settings': settings, 'results': results}, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print('baseline written to {}'.format(os.path.relpath(args.baseline)))
+    for problem in problems:
+        print('REGRESSION ' + problem)
+    if problems:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PaperCrawler benchmarks')
+    commands = parser.add_subparsers(dest='command')
+
+    engines = commands.add_parser('engines', help='papers per second of the download engines')
+    engines.add_argument('--papers', type=int, default=300, help='number of PDFs to download')
+    engines.add_argument('--size', type=int, default=128, help='size of each PDF in KB')
+    engines.add_argument('--handshake-ms', type=float, default=20, help='latency added to every new connection')
+    engines.add_argument('--poolnum', type=int, default=8, help='parallel downloads')
+    engines.add_argument('--engine', nargs='+', default=['pool', 'async'], choices=['pool', 'async'])
+    engines.add_argument('--rate', type=float, default=0, help='per-host rate limit (default: off)')
+    engines.set_defaults(func=bench_engines)
+
+    parse = commands.add_parser('parse', help='parse time and peak memory of the fixture index pages')
+    parse.add_argument('--parser', nargs='+', default=None, help='bs4 tree builders to compare (default: all installed)')
+    parse.add_argument('--repeat', type=int, default=3, help='best of this many runs is reported')
+    parse.set_defaults(func=bench_parse)
+
+    throttle = commands.add_parser('throttle', help='throughput against a host that answers 429 beyond its capacity')
+    throttle.add_argument('--papers', type=int, default=200, help='number of PDFs to download')
+    throttle.add_argument('--size', type=int, default=32, help='size of each PDF in KB')
+    throttle.add_argument('--capacity', type=float, default=20, help='requests per second the host serves')
+    throttle.add_argument('--retry-after', type=int, default=1, help='Retry-After sent with every 429')
+    throttle.add_argument('--poolnum', type=int, default=16, help='parallel downloads')
+    throttle.add_argument('--rate', type=float, default=5, help='initial rate of the adaptive limiter')
+    throttle.add_argument('--max-retries', type=int, default=8, help='retries of the adaptive run')
+    throttle.set_defaults(func=bench_throttle)
+
+    keywords = commands.add_parser('keywords', help='titles per second of the keyword filters')
+    keywords.add_argument('--titles', type=int, default=100000, help='size of the synthetic title corpus')
+    keywords.add_argument('--terms', type=int, default=30, help='number of keywords')
+    keywords.add_argument('--repeat', type=int, default=3, help='best of this many runs is reported')
+    keywords.set_defaults(func=bench_keywords)
+
+    crawl = commands.add_parser('crawl', help='every download_* path end to end against a mock conference server')
+    crawl.add_argument('--only', nargs='+', default=None, choices=list(CRAWLS), help='paths to run (default: all)')
+    crawl.add_argument('--keywords', type=str, default='sparse', help='title filter, selects how many papers are downloaded')
+    crawl.add_argument('--engine', nargs='+', default=['async', 'pool'], choices=['async', 'pool'],
+                       help='download engines to run every path with')
+    crawl.add_argument('--poolnum', type=int, default=16, help='parallel downloads')
+    crawl.add_argument('--size', type=int, default=64, help='size of each PDF in KB')
+    crawl.add_argument('--latency-ms', type=float, default=5, help='delay before every answer')
+    crawl.add_argument('--handshake-ms', type=float, default=10, help='latency added to every new connection')
+    crawl.add_argument('--bandwidth', type=float, default=0, help='KB/s per response (default: unlimited)')
+    crawl.add_argument('--error-rate', type=float, default=0, help='share of requests answered with 503')
+    crawl.add_argument('--truncate-rate', type=float, default=0, help='share of PDFs cut off halfway')
+    crawl.add_argument('--rate', type=float, default=0, help='per-host rate limit (default: off)')
+    crawl.add_argument('--max-retries', type=int, default=4, help='retries for failed requests')
+    crawl.add_argument('--baseline', type=str, default=os.path.join(FIXTURE_DIR, 'crawl-baseline.json'),
+                       help='results to compare with')
+    crawl.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    crawl.add_argument('--max-regression', type=float, default=0.25,
+                       help='exit with 1 when papers/s drops more than this below the baseline')
+    crawl.set_defaults(func=bench_crawl)
+
+    fixtures = commands.add_parser('fixtures', help='rebuild the synthetic index pages under fixtures/')
+    fixtures.set_defaults(func=make_fixtures)
+
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        sys.exit(1)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
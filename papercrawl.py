@@ -4,494 +4,4105 @@
 import os
 import sys
 import ssl
+import asyncio
+import re
+import json
+import contextlib
+import collections
+import itertools
+import hashlib
+import base64
+import gzip
+import random
+import bisect
+import socket
+import sqlite3
+import shutil
+import threading
 import urllib.request as rt
+from email.utils import parsedate_to_datetime
+from http.client import IncompleteRead
+from urllib.error import HTTPError, URLError
+from urllib.parse import unquote, urlencode, urljoin, urlsplit
 import logging
 from multiprocessing import Pool
-from bs4 import BeautifulSoup
-from typing import Optional, List, Any
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import Optional, List, Any, Dict, Tuple, Callable, Iterable, Iterator, NamedTuple
 import time
 import argparse
 
-logging.getLogger().setLevel(logging.INFO)
+# the library never configures logging, main() sends INFO and up to stderr
+logger = logging.getLogger('papercrawl')
 import pdb
 try:
     from selenium import webdriver 
     from selenium.webdriver.chrome.options import Options
 except Exception as e:
-    print("download ACM paper need selenium...")
+    webdriver = None
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
-def fetch_html(url: str):
-    with rt.urlopen(url) as f:
-        html = f.read()
-    html = BeautifulSoup(html, features="html.parser")
-    return html
+USER_AGENT = 'Mozilla/5.0 (compatible; papercrawler)'
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+class HTMLCache:
+    """
+    On-disk cache of index and detail pages, keyed by the SHA-256 of their URL.
+
+    Every entry is stored as ``<key>.html`` plus a ``<key>.json`` with the URL,
+    ETag, Last-Modified and fetch time. The mtime of the ``.html`` file marks
+    the last use, which drives the LRU eviction once ``max_bytes`` is exceeded.
+
+    Args:
+        cachedir (str): Directory holding the cache.
+        ttl (float): Seconds an entry is served without asking the server. After that
+            it is revalidated with a conditional GET.
+        max_bytes (Optional[int]): Evict least recently used pages beyond this size. default: unlimited
+        offline (bool): Serve only from the cache and never touch the network.
+    """
+
+    def __init__(self, cachedir: str, ttl: float = 24 * 3600, max_bytes: Optional[int] = None,
+                 offline: bool = False):
+        self.cachedir = os.path.abspath(cachedir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._size = None
+        if not os.path.isdir(self.cachedir):
+            os.makedirs(self.cachedir)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cachedir, key[:2], key)
+
+    def get(self, url: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Returns the cached (body, meta) of ``url``, or None.
+        """
+        path = self._path(url)
+        try:
+            with open(path + '.json', encoding='utf-8') as file:
+                meta = json.load(file)
+            with open(path + '.html', 'rb') as file:
+                body = file.read()
+        except (OSError, ValueError):
+            return None
+        return body, meta
+
+    def is_fresh(self, meta: Dict[str, Any]) -> bool:
+        return time.time() - meta.get('fetched_at', 0) < self.ttl
+
+    def touch(self, url: str, refreshed: bool = False) -> None:
+        """
+        Marks an entry as used, and as just revalidated if ``refreshed``.
+        """
+        path = self._path(url)
+        if refreshed:
+            entry = self.get(url)
+            if entry is not None:
+                entry[1]['fetched_at'] = time.time()
+                self._write(path + '.json', json.dumps(entry[1]).encode('utf-8'))
+        try:
+            os.utime(path + '.html')
+        except OSError:
+            pass
+
+    def put(self, url: str, body: bytes, headers: Any) -> None:
+        """
+        Stores a freshly fetched page together with its validators.
+        """
+        path = self._path(url)
+        old = self.get(url)
+        meta = {'url': url, 'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'),
+                'fetched_at': time.time(), 'size': len(body)}
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path + '.html', body)
+        self._write(path + '.json', json.dumps(meta).encode('utf-8'))
+        if self.max_bytes:
+            with self._lock:
+                if self._size is None:
+                    self._size = sum(size for _, size, _ in self._entries())
+                else:
+                    self._size += len(body) - (len(old[0]) if old else 0)
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def _write(self, path: str, data: bytes) -> None:
+        tmp = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp, 'wb') as file:
+            file.write(data)
+        os.replace(tmp, path)
+
+    def _entries(self) -> Iterator[Tuple[float, int, str]]:
+        for sub in os.scandir(self.cachedir):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if entry.name.endswith('.html'):
+                    stat = entry.stat()
+                    yield stat.st_mtime, stat.st_size, entry.path[:-len('.html')]
+
+    def evict(self) -> None:
+        """
+        Removes least recently used pages until the cache is 10% below ``max_bytes``.
+        """
+        with self._lock:
+            entries = sorted(self._entries())
+            size = sum(entry[1] for entry in entries)
+            target = self.max_bytes * 0.9
+            for _, entry_size, path in entries:
+                if size <= target:
+                    break
+                for suffix in ('.html', '.json'):
+                    try:
+                        os.remove(path + suffix)
+                    except OSError:
+                        pass
+                size -= entry_size
+            self._size = size
+
+_html_cache = None  # type: Optional[HTMLCache]
+
+def configure_cache(cachedir: Optional[str], ttl: float = 24 * 3600, max_mb: Optional[float] = None,
+                    offline: bool = False) -> Optional[HTMLCache]:
+    """
+    Enables the page cache used by :func:`fetch_html`, or disables it when ``cachedir`` is None.
+    """
+    global _html_cache
+    if cachedir is None:
+        if offline:
+            raise ValueError("Offline mode needs a cache directory")
+        _html_cache = None
+    else:
+        max_bytes = int(max_mb * 1024 * 1024) if max_mb else None
+        _html_cache = HTMLCache(cachedir, ttl=ttl, max_bytes=max_bytes, offline=offline)
+    return _html_cache
+
+class HostRateLimiter:
+    """
+    Token bucket per host whose rate adapts AIMD-style to how the host copes.
+
+    Every request takes a token. Each success raises the rate of its host by
+    ``increase`` requests/s (up to ``max_rate``), a 429/503 multiplies it by
+    ``decrease`` (down to ``min_rate``) and blocks the host for ``Retry-After``.
+    The same limiter is shared by :func:`fetch_page`, :func:`download` and the
+    async engine; with the 'pool' engine every worker process has its own copy.
+
+    Args:
+        rate (float): Initial requests per second for every host.
+        max_rate (float): Upper bound the rate grows to while the host answers fine.
+        min_rate (float): Lower bound the rate shrinks to under throttling.
+        increase (float): Requests/s added after every successful request.
+        decrease (float): Factor applied to the rate when the host throttles.
+    """
+
+    def __init__(self, rate: float = 5.0, max_rate: float = 100.0, min_rate: float = 0.2,
+                 increase: float = 0.5, decrease: float = 0.5):
+        self.initial_rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._lock = threading.Lock()
+        self._hosts = {}  # host -> [rate, tokens, last refill, blocked until, last decrease]
+
+    def _state(self, host: str) -> List[float]:
+        if host not in self._hosts:
+            self._hosts[host] = [self.initial_rate, 1.0, time.monotonic(), 0.0, 0.0]
+        return self._hosts[host]
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._state(host)[0]
+
+    def reserve(self, host: str) -> float:
+        """
+        Takes a token for ``host`` and returns how many seconds the caller has to wait before sending.
+        """
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            rate, tokens, last, blocked_until = state[:4]
+            tokens = min(max(1.0, rate), tokens + (now - last) * rate) - 1
+            state[1], state[2] = tokens, now
+            delay = -tokens / rate if tokens < 0 else 0.0
+            return max(delay, blocked_until - now)
+
+    def acquire(self, host: str) -> None:
+        delay = self.reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, host: str) -> None:
+        delay = self.reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self, host: str) -> None:
+        with self._lock:
+            state = self._state(host)
+            state[0] = min(self.max_rate, state[0] + self.increase)
+
+    def on_throttle(self, host: str, retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            # requests already in flight when the host started throttling count as one signal
+            if now - state[4] >= 1.0:
+                state[0] = max(self.min_rate, state[0] * self.decrease)
+                state[4] = now
+            state[1] = min(state[1], 0.0)
+            if retry_after:
+                state[3] = max(state[3], now + retry_after)
+        logger.info('{} is throttling, slowing down to {:.1f} requests/s'.format(host, self.rate(host)))
+
+    def note(self, host: str, status: int, retry_after: Optional[float] = None) -> None:
+        """
+        Adapts the rate of ``host`` to the status code it answered with.
+        """
+        if status in THROTTLE_STATUS:
+            self.on_throttle(host, retry_after)
+        elif status < 400:
+            self.on_success(host)
+
+THROTTLE_STATUS = (429, 503)
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+RATE_LIMITER = HostRateLimiter()  # type: Optional[HostRateLimiter]
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+def configure_rate_limit(rate: Optional[float] = 5.0, max_rate: float = 100.0,
+                         max_retries: int = 4) -> Optional[HostRateLimiter]:
+    """
+    Replaces the shared per-host limiter (``rate`` None or 0 disables it) and the number of retries.
+    """
+    global RATE_LIMITER, MAX_RETRIES
+    RATE_LIMITER = HostRateLimiter(rate=rate, max_rate=max(rate, max_rate)) if rate else None
+    MAX_RETRIES = max_retries
+    return RATE_LIMITER
+
+class BandwidthLimiter:
+    """
+    Token bucket over the bytes all transfers of this process read, ``rate`` bytes
+    per second on average with bursts of up to one second's worth.
+
+    Reading a chunk takes its bytes from the bucket, which may go into debt; the
+    reader then sleeps until the debt is paid off.
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, nbytes: int) -> float:
+        """
+        Takes ``nbytes`` and returns how many seconds the caller has to wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate, self._tokens + (now - self._last) * self.rate) - nbytes
+            self._last = now
+            return max(0.0, -self._tokens / self.rate)
+
+    def consume(self, nbytes: int) -> None:
+        delay = self.reserve(nbytes)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def consume_async(self, nbytes: int) -> None:
+        delay = self.reserve(nbytes)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+BANDWIDTH_LIMITER = None  # type: Optional[BandwidthLimiter]
+
+def configure_bandwidth(mb_per_s: Optional[float]) -> Optional[BandwidthLimiter]:
+    """
+    Caps the download bandwidth of this process at ``mb_per_s`` MB/s (None or 0: no cap).
+    """
+    global BANDWIDTH_LIMITER
+    BANDWIDTH_LIMITER = BandwidthLimiter(mb_per_s * 1024 * 1024) if mb_per_s else None
+    return BANDWIDTH_LIMITER
+
+# hostname -> base url (e.g. 'http://127.0.0.1:8000') its requests are sent to instead, with the
+# original Host header; lets benchmarks and tests replay whole conference sites from a local server
+HOST_OVERRIDES = {}  # type: Dict[str, str]
+
+def override_hosts(overrides: Dict[str, str]) -> None:
+    """
+    Replaces HOST_OVERRIDES, an empty dict sends every request to the real hosts again.
+    """
+    HOST_OVERRIDES.clear()
+    HOST_OVERRIDES.update(overrides)
+
+class HTTPStatusError(IOError):
+    """An HTTP error status returned by the async engine."""
+
+    def __init__(self, status: int, reason: str, url: str, retry_after: Optional[float] = None):
+        super().__init__('HTTP Error {}: {} ({})'.format(status, reason, url))
+        self.status = status
+        self.retry_after = retry_after
+
+class IncompleteDownload(IOError):
+    """The connection ended before the announced number of bytes arrived."""
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait according to a Retry-After header, given either as seconds or as an HTTP date.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+def retry_delay(error: BaseException, attempt: int, max_retries: Optional[int] = None) -> Optional[float]:
+    """
+    Returns how long to wait before retrying after ``error``, or None if it should not be retried.
+
+    Throttling and server errors (429, 5xx), timeouts and dropped connections are
+    retried with exponential backoff and full jitter, or after ``Retry-After``
+    when the server sent one.
+    """
+    if attempt >= (CrawlSettings.current().max_retries if max_retries is None else max_retries):
+        return None
+    retry_after = None
+    if isinstance(error, HTTPError):
+        if error.code not in RETRY_STATUS:
+            return None
+        retry_after = parse_retry_after(error.headers.get('Retry-After') if error.headers else None)
+    elif isinstance(error, HTTPStatusError):
+        if error.status not in RETRY_STATUS:
+            return None
+        retry_after = error.retry_after
+    elif not isinstance(error, (URLError, ConnectionError, TimeoutError, socket.timeout, asyncio.TimeoutError,
+                                asyncio.IncompleteReadError, IncompleteRead, IncompleteDownload)):
+        return None
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_CAP * 5)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def call_with_retries(func: Callable[[], Any], what: str = '') -> Any:
+    """
+    Calls ``func`` until it succeeds, sleeping :func:`retry_delay` between attempts.
+    """
+    attempt = 0
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            delay = retry_delay(e, attempt)
+            if delay is None:
+                raise
+            logger.info('Retrying {} in {:.1f}s: {}'.format(what, delay, e))
+            time.sleep(delay)
+            attempt += 1
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BYTES_BUCKETS = tuple(1024 * 2 ** i for i in range(4, 17, 2))  # 16 KB .. 64 MB
+
+class Histogram:
+    """
+    Cumulative buckets (for Prometheus) plus a bounded random sample of the values (for percentiles).
+    """
+    RESERVOIR = 10000
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.samples = []  # type: List[float]
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        if len(self.samples) < self.RESERVOIR:
+            self.samples.append(value)
+        else:
+            index = random.randrange(self.count)
+            if index < self.RESERVOIR:
+                self.samples[index] = value
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        self.counts = [a + b for a, b in zip(self.counts, state['counts'])]
+        self.count += state['count']
+        self.sum += state['sum']
+        self.max = max(self.max, state['max'])
+        self.samples = (self.samples + state['samples'])[-self.RESERVOIR:]
+
+    def state(self) -> Dict[str, Any]:
+        return {'counts': self.counts, 'count': self.count, 'sum': self.sum, 'max': self.max, 'samples': self.samples}
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+class Metrics:
+    """
+    Counters and timings of one crawl: per-stage histograms, requests by host and
+    status code, papers saved or failed and bytes written.
+
+    Stages are 'fetch_seconds' (index and detail pages, cache hits included),
+    'parse_seconds', 'resolve_seconds' (detail page to PDF link), 'download_seconds'
+    and 'paper_bytes' (per saved paper). Pool engine workers record into their
+    own instance and send its :meth:`state` back to be merged.
+
+    Args:
+        progress (Optional[ProgressBar]): Redrawn whenever a paper is queued or done.
+    """
+
+    BUCKETS = {'paper_bytes': BYTES_BUCKETS}
+
+    def __init__(self, progress: Optional['ProgressBar'] = None):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.histograms = {}  # type: Dict[str, Histogram]
+        self.requests = {}  # type: Dict[Tuple[str, str], int]
+        self.papers = {'ok': 0, 'failed': 0, 'skipped': 0}
+        self.skipped = []  # type: List[Dict[str, Any]]
+        self.outcomes = {}  # type: Dict[str, Tuple[Optional[float], Optional[str]]]
+        self.bytes = 0
+        self.expected = 0
+        self.progress = progress
+
+    def observe(self, stage: str, value: float) -> None:
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram(self.BUCKETS.get(stage, SECONDS_BUCKETS))
+            self.histograms[stage].observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def request(self, host: Optional[str], status: Any) -> None:
+        with self._lock:
+            key = (host or '', str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def expect(self, papers: int) -> None:
+        with self._lock:
+            self.expected += papers
+        self._redraw()
+
+    def paper(self, ok: bool, path: Optional[str] = None, seconds: Optional[float] = None,
+              error: Optional[str] = None) -> None:
+        """
+        Counts one finished paper; a saved one adds its size and duration to the histograms.
+        The duration and error are kept for :meth:`outcome` until the paper is reported.
+        """
+        size = os.path.getsize(path) if ok and path and os.path.exists(path) else 0
+        if ok and seconds is not None:
+            self.observe('download_seconds', seconds)
+            self.observe('paper_bytes', size)
+        with self._lock:
+            self.papers['ok' if ok else 'failed'] += 1
+            self.bytes += size
+            if path is not None:
+                self.outcomes[path] = (seconds, error)
+        self._redraw()
+
+    def outcome(self, path: str) -> Tuple[Optional[float], Optional[str]]:
+        """
+        Takes the (seconds, error) recorded for the paper saved to ``path``.
+        """
+        with self._lock:
+            return self.outcomes.pop(path, (None, None))
+
+    def skip(self, item: Tuple[str, str, str], reason: str, size: Optional[int] = None) -> None:
+        """
+        Counts a paper left out on purpose, e.g. because it does not fit the byte budget.
+        """
+        with self._lock:
+            self.papers['skipped'] += 1
+            self.skipped.append({'title': item[2], 'url': item[0], 'path': item[1], 'bytes': size, 'reason': reason})
+        self._redraw()
+
+    def _redraw(self) -> None:
+        if self.progress is not None:
+            self.progress.update(self)
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'histograms': {name: hist.state() for name, hist in self.histograms.items()},
+                    'requests': [[host, status, n] for (host, status), n in self.requests.items()],
+                    'papers': dict(self.papers), 'bytes': self.bytes, 'outcomes': self.outcomes}
+
+    def merge(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            for name, hist in state['histograms'].items():
+                if name not in self.histograms:
+                    self.histograms[name] = Histogram(self.BUCKETS.get(name, SECONDS_BUCKETS))
+                self.histograms[name].merge(hist)
+            for host, status, n in state['requests']:
+                self.requests[(host, status)] = self.requests.get((host, status), 0) + n
+            for key, n in state['papers'].items():
+                self.papers[key] = self.papers.get(key, 0) + n
+            self.bytes += state['bytes']
+            self.outcomes.update(state.get('outcomes', {}))
+        self._redraw()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        The run as a JSON-serializable dict.
+        """
+        elapsed = time.time() - self.started
+        with self._lock:
+            stages = {}
+            for name, hist in sorted(self.histograms.items()):
+                stages[name] = {'count': hist.count, 'sum': round(hist.sum, 6),
+                                'mean': round(hist.sum / hist.count, 6) if hist.count else None,
+                                'max': round(hist.max, 6)}
+                stages[name].update(('p{:g}'.format(q * 100), None if hist.quantile(q) is None else round(hist.quantile(q), 6))
+                                    for q in (0.5, 0.9, 0.99))
+            hosts = {}
+            for (host, status), n in sorted(self.requests.items()):
+                hosts.setdefault(host, {})[status] = n
+            return {'started': self.started, 'elapsed_seconds': round(elapsed, 3),
+                    'papers': dict(self.papers, expected=self.expected), 'bytes': self.bytes,
+                    'bytes_per_second': round(self.bytes / elapsed, 1) if elapsed > 0 else None,
+                    'stages': stages, 'requests': hosts, 'skipped': list(self.skipped)}
+
+    def write_summary(self, path: str) -> None:
+        text = json.dumps(self.summary(), indent=2)
+        if path == '-':
+            print(text)
+        else:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(text + '\n')
+
+    def write_prometheus(self, path: str) -> None:
+        """
+        Writes the metrics in the Prometheus text format, atomically, for node_exporter's textfile collector.
+        """
+        def escape(value: str) -> str:
+            return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        summary = self.summary()
+        lines = ['# TYPE papercrawl_papers_total counter']
+        lines += ['papercrawl_papers_total{{result="{}"}} {}'.format(key, summary['papers'][key]) for key in ('ok', 'failed', 'skipped')]
+        lines += ['# TYPE papercrawl_download_bytes_total counter', 'papercrawl_download_bytes_total {}'.format(self.bytes),
+                  '# TYPE papercrawl_run_duration_seconds gauge',
+                  'papercrawl_run_duration_seconds {}'.format(summary['elapsed_seconds']),
+                  '# TYPE papercrawl_last_run_timestamp_seconds gauge',
+                  'papercrawl_last_run_timestamp_seconds {:.0f}'.format(time.time()),
+                  '# TYPE papercrawl_requests_total counter']
+        with self._lock:
+            lines += ['papercrawl_requests_total{{host="{}",status="{}"}} {}'.format(escape(host), escape(status), n)
+                      for (host, status), n in sorted(self.requests.items())]
+            for name, hist in sorted(self.histograms.items()):
+                metric = 'papercrawl_{}'.format(name)
+                lines.append('# TYPE {} histogram'.format(metric))
+                cumulative = 0
+                for bound, count in zip(list(hist.buckets) + ['+Inf'], hist.counts):
+                    cumulative += count
+                    lines.append('{}_bucket{{le="{}"}} {}'.format(metric, bound, cumulative))
+                lines += ['{}_sum {}'.format(metric, hist.sum), '{}_count {}'.format(metric, hist.count)]
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+        os.replace(tmp, path)
+
+class ProgressBar:
+    """
+    One self-overwriting status line on stderr: papers done of those queued so far, failures, throughput and ETA.
+
+    Until :meth:`close`, log handlers writing to the same stream clear the line before each
+    record, so messages don't run into the bar; it is drawn again on the next update.
+    """
+
+    def __init__(self, stream: Any = None, interval: float = 0.25, width: int = 30):
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.width = width
+        self._last = 0.0
+        self._drawn = False
+        self._lock = threading.Lock()
+        self._handlers = [handler for handler in logging.getLogger().handlers + logger.handlers
+                          if isinstance(handler, logging.StreamHandler) and handler.stream is self.stream]
+        for handler in self._handlers:
+            handler.addFilter(self._clear)
+
+    def _clear(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            if self._drawn:
+                self.stream.write('\r\033[K')
+                self._drawn = False
+                self._last = 0.0
+        return True
+
+    def update(self, metrics: Metrics, force: bool = False) -> None:
+        now = time.time()
+        if not force and now - self._last < self.interval:
+            return
+        with self._lock:
+            self._last = now
+            done = sum(metrics.papers.values())
+            total = max(metrics.expected, done)
+            elapsed = max(now - metrics.started, 1e-6)
+            filled = int(self.width * done / total) if total else 0
+            eta = ''
+            if 0 < done < total:
+                eta = ' eta {:.0f}s'.format((total - done) * elapsed / done)
+            self.stream.write('\r[{}{}] {}/{} papers, {} failed, {} skipped, {:.2f} MB/s{}\033[K'.format(
+                '#' * filled, '.' * (self.width - filled), done, total, metrics.papers['failed'], metrics.papers['skipped'],
+                metrics.bytes / elapsed / 1024 / 1024, eta))
+            self.stream.flush()
+            self._drawn = True
+
+    def close(self, metrics: Metrics) -> None:
+        self.update(metrics, force=True)
+        for handler in self._handlers:
+            handler.removeFilter(self._clear)
+        with self._lock:
+            self.stream.write('\n')
+            self.stream.flush()
+            self._drawn = False
+
+METRICS = Metrics()
+
+def configure_metrics(progress: bool = False) -> Metrics:
+    """
+    Starts recording a new run, with a progress bar on stderr if ``progress``.
+    """
+    global METRICS
+    METRICS = Metrics(ProgressBar() if progress else None)
+    return METRICS
+
+def urlopen(request: Any) -> Any:
+    """
+    ``urllib.request.urlopen`` behind the shared per-host rate limiter.
+    """
+    url = request.full_url if isinstance(request, rt.Request) else request
+    parts = urlsplit(url)
+    host = parts.hostname
+    target = HOST_OVERRIDES.get(host)
+    if target is not None:
+        if not isinstance(request, rt.Request):
+            request = rt.Request(request)
+        request.add_unredirected_header('Host', parts.netloc)
+        request.full_url = target.rstrip('/') + url.split(parts.netloc, 1)[1]
+    settings = CrawlSettings.current()
+    limiter = settings.rate_limiter
+    if limiter is not None:
+        limiter.acquire(host)
+    try:
+        response = rt.urlopen(request)
+    except HTTPError as e:
+        settings.metrics.request(host, e.code)
+        if limiter is not None:
+            limiter.note(host, e.code, parse_retry_after(e.headers.get('Retry-After') if e.headers else None))
+        raise
+    except Exception:
+        settings.metrics.request(host, 'error')
+        raise
+    settings.metrics.request(host, response.status)
+    if limiter is not None:
+        limiter.note(host, response.status)
+    return response
+
+_fetched = threading.local()
 
-def fetch_html_by_driver(url: str, driver: Any):
-    driver.get(url)
-    html = driver.page_source
-    html = BeautifulSoup(html, features="html.parser")
+@contextlib.contextmanager
+def recording_pages(revalidate: bool = False) -> Iterator[Dict[str, str]]:
+    """
+    Collects url -> SHA-256 of every page :func:`fetch_page` returns in this thread meanwhile.
+    With ``revalidate``, cached pages are revalidated even when they are still fresh, once
+    per recording.
+    """
+    pages = {}
+    previous = getattr(_fetched, 'pages', None), getattr(_fetched, 'revalidate', False)
+    _fetched.pages, _fetched.revalidate = pages, revalidate
+    try:
+        yield pages
+    finally:
+        _fetched.pages, _fetched.revalidate = previous
+
+def share_recording(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wraps ``func`` so the pages it fetches on other threads count to this thread's :func:`recording_pages`.
+    """
+    pages, revalidate = getattr(_fetched, 'pages', None), getattr(_fetched, 'revalidate', False)
+
+    def wrapper(*args, **kwargs):
+        previous = getattr(_fetched, 'pages', None), getattr(_fetched, 'revalidate', False)
+        _fetched.pages, _fetched.revalidate = pages, revalidate
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _fetched.pages, _fetched.revalidate = previous
+    return wrapper
+
+def fetch_page(url: str) -> bytes:
+    """
+    Returns the raw body of ``url``, going through the page cache when one is configured.
+    Stale entries are revalidated with If-None-Match / If-Modified-Since.
+    """
+    pages = getattr(_fetched, 'pages', None)
+    with CrawlSettings.current().metrics.timer('fetch_seconds'):
+        body = _fetch_page(url, getattr(_fetched, 'revalidate', False) and url not in (pages or {}))
+    if pages is not None:
+        pages[url] = hashlib.sha256(body).hexdigest()
+    return body
+
+def _fetch_page(url: str, revalidate: bool = False) -> bytes:
+    def get(request):
+        with urlopen(request) as f:
+            return f.read(), f.headers
+
+    cache = CrawlSettings.current().cache
+    if cache is None:
+        return call_with_retries(lambda: get(rt.Request(url, headers={'User-Agent': USER_AGENT})), url)[0]
+    entry = cache.get(url)
+    fresh = entry is not None and cache.is_fresh(entry[1]) and not revalidate
+    if entry is not None and (cache.offline or fresh):
+        cache.touch(url)
+        return entry[0]
+    if cache.offline:
+        raise IOError('{} is not cached (offline mode)'.format(url))
+
+    request = rt.Request(url, headers={'User-Agent': USER_AGENT})
+    if entry is not None:
+        if entry[1].get('etag'):
+            request.add_header('If-None-Match', entry[1]['etag'])
+        if entry[1].get('last_modified'):
+            request.add_header('If-Modified-Since', entry[1]['last_modified'])
+    try:
+        body, headers = call_with_retries(lambda: get(request), url)
+    except HTTPError as e:
+        if e.code == 304 and entry is not None:
+            cache.touch(url, refreshed=True)
+            return entry[0]
+        raise
+    cache.put(url, body, headers)
+    return body
+
+def _default_parser() -> str:
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return "html.parser"
+    return "lxml"
+
+# BeautifulSoup tree builder used for every page, lxml when it is installed
+HTML_PARSER = _default_parser()
+
+# Only the parts of each index page the crawlers read are turned into a tree
+NEURIPS_TARGET = SoupStrainer("ul", {"class": "paper-list"})
+ICML_TARGET = SoupStrainer("div", {"class": "list_html"})
+ICML_DETAIL_TARGET = SoupStrainer("div", {"class": "text-center"})
+PMLR_TARGET = SoupStrainer("div", {"class": "paper"})
+PMLR_DETAIL_TARGET = SoupStrainer("div", {"id": "extras"})
+ICLR_TARGET = SoupStrainer("div", {"onclick": True})
+SIGIR_TARGET = SoupStrainer("div", {"id": "DLcontent"})
+ACL_PEOPLE = re.compile('^/people/')
+
+def nlp_categories(conference: str, year: int) -> List[str]:
+    """
+    Ids of the ACL Anthology event page blocks holding the main and findings papers.
+    """
+    if "acl" in conference:
+        return [f"{year}{conference}-long", f"{year}{conference}-short",
+                f"{year}findings-{conference}"]
+    return [f"{year}{conference}-main",  f"{year}findings-{conference}"]
+
+def parse_html(html: Any, parser: Optional[str] = None, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    """
+    Builds a BeautifulSoup tree, restricted to the elements matched by ``parse_only`` if given.
+
+    Args:
+        html (Any): The page as bytes or str.
+        parser (Optional[str]): 'lxml', 'html.parser' or any other bs4 tree builder. default: the crawl's parser, HTML_PARSER
+        parse_only (Optional[SoupStrainer]): Only materialize the matching subtrees.
+
+    Returns:
+        BeautifulSoup: The parsed page.
+    """
+    settings = CrawlSettings.current()
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, features=parser or settings.parser, parse_only=parse_only)
+    elapsed = time.perf_counter() - start
+    settings.metrics.observe('parse_seconds', elapsed)
+    logger.debug('Parsed {:.0f} KB in {:.3f}s'.format(len(html) / 1024, elapsed))
+    return soup
+
+def fetch_html(url: str, parser: Optional[str] = None, parse_only: Optional[SoupStrainer] = None):
+    html = fetch_page(url)
+    html = parse_html(html, parser=parser, parse_only=parse_only)
     return html
 
-def download(url: str, savepath: str, title: str) -> bool:
+DOWNLOAD_BUFSIZE = 64 * 1024
+PART_SUFFIX = '.part'
+VALIDATOR_SUFFIX = '.validator'
+
+def _resume_headers(partpath: str) -> Tuple[int, Dict[str, str]]:
+    """
+    Returns the size of the .part file and the headers asking for the rest of it. With the ETag or
+    Last-Modified of the first response, If-Range makes a server whose file changed send all of it.
+    """
+    offset = os.path.getsize(partpath) if os.path.exists(partpath) else 0
+    if not offset:
+        return 0, {}
+    headers = {'Range': 'bytes={}-'.format(offset)}
+    if os.path.exists(partpath + VALIDATOR_SUFFIX):
+        with open(partpath + VALIDATOR_SUFFIX, encoding='utf-8') as file:
+            headers['If-Range'] = file.read().strip()
+    return offset, headers
+
+def _save_validator(partpath: str, headers: Any) -> None:
+    """
+    Keeps the validator of a response that starts the .part file over, for :func:`_resume_headers`.
+    """
+    etag = headers.get('etag') or ''
+    # a weak ETag cannot be used with If-Range
+    validator = etag if etag and not etag.startswith('W/') else headers.get('last-modified')
+    if validator:
+        with open(partpath + VALIDATOR_SUFFIX, 'w', encoding='utf-8') as file:
+            file.write(validator)
+    elif os.path.exists(partpath + VALIDATOR_SUFFIX):
+        os.remove(partpath + VALIDATOR_SUFFIX)
+
+def _discard_part(partpath: str) -> None:
+    """
+    Removes a .part file that cannot be resumed, and its validator.
+    """
+    for path in (partpath, partpath + VALIDATOR_SUFFIX):
+        if os.path.exists(path):
+            os.remove(path)
+
+def _stale_part(total: str, offset: int) -> bool:
+    """
+    Whether a 416 answer to resuming at ``offset`` means the server's file is no longer the one in the .part
+    file (e.g. replaced by a shorter version), rather than that the .part file already holds all of it.
+    """
+    return total.isdigit() and int(total) != offset
+
+def _resume_plan(status: int, headers: Any, offset: int) -> Tuple[str, Optional[int]]:
+    """
+    Decides how to write a response body given ``offset`` bytes already in the .part file.
+
+    Returns:
+        Tuple[str, Optional[int]]: The file mode ('ab' to append, 'wb' to start over) and
+        the expected size of the complete file, if the server announced it.
+    """
+    if status == 206:
+        unit, _, spec = (headers.get('content-range') or '').partition(' ')
+        span, _, total = spec.partition('/')
+        start = span.partition('-')[0]
+        if unit != 'bytes' or not start.isdigit() or int(start) != offset:
+            raise IOError('Unexpected Content-Range: {}'.format(headers.get('content-range')))
+        return 'ab', int(total) if total.isdigit() else None
+    if status == 200:
+        length = headers.get('content-length')
+        return 'wb', int(length) if length and length.isdigit() else None
+    raise IOError('HTTP Error {}'.format(status))
+
+def pdf_problem(head: bytes, tail: Optional[bytes] = None) -> Optional[str]:
+    """
+    Returns why a file starting with ``head`` (and ending with ``tail``, when given) is not a PDF, or None.
+    Readers accept junk before the %PDF- header as long as it is within the first 1024 bytes.
+    """
+    if not head:
+        return 'empty file'
+    start = head.lstrip(b'\xef\xbb\xbf \t\r\n')[:512].lower()
+    if start.startswith((b'<!doctype', b'<html', b'<head', b'<body', b'<?xml')) or b'<html' in start:
+        return 'HTML page'
+    if b'%PDF-' not in head[:1024]:
+        return 'not a PDF'
+    if tail is not None and b'%%EOF' not in tail:
+        return 'no %%EOF marker, truncated'
+    return None
+
+def validate_pdf(path: str) -> Optional[str]:
+    """
+    Checks the first and last KB of a saved file, see :func:`pdf_problem`.
+    """
+    with open(path, 'rb') as file:
+        head = file.read(1024)
+        file.seek(max(0, os.fstat(file.fileno()).st_size - 1024))
+        tail = file.read()
+    return pdf_problem(head, tail)
+
+def finalize_download(partpath: str, savepath: str, expected_size: Optional[int]) -> None:
+    """
+    Moves a finished .part file into place once it has the announced size and looks like a PDF.
+    A short file is kept for resuming; a file larger than announced, or one that is not a PDF, is removed.
+    """
+    size = os.path.getsize(partpath)
+    if expected_size is not None and size > expected_size:
+        _discard_part(partpath)
+        raise IncompleteDownload('Download larger than announced: {} of {} bytes, starting over ({})'.format(
+            size, expected_size, savepath))
+    if expected_size is not None and size != expected_size:
+        raise IncompleteDownload('Incomplete download: {} of {} bytes ({})'.format(size, expected_size, savepath))
+    with open(partpath, 'rb') as file:
+        head = file.read(1024)
+    problem = pdf_problem(head)
+    if problem is not None:
+        _discard_part(partpath)
+        raise IOError('Not a PDF file ({}): {}'.format(problem, savepath))
+    os.replace(partpath, savepath)
+    if os.path.exists(partpath + VALIDATOR_SUFFIX):
+        os.remove(partpath + VALIDATOR_SUFFIX)
+
+def download(url: str, savepath: str, title: str, bufsize: Optional[int] = None) -> bool:
     """
     Downloads a file from a URL and saves it to a specified path.
+
+    The body is streamed into ``savepath + '.part'``, an existing .part file is
+    resumed with a Range request (If-Range guards against a changed file), and
+    the file is renamed into place only after the size and the PDF header have
+    been checked.
     
     Args:
         url (str): The URL of the file to be downloaded.
         savepath (str): The path where the file should be saved.
         title (str): The title of the file being downloaded (for logging).
+        bufsize (Optional[int]): Size of the chunks written to disk. default: DOWNLOAD_BUFSIZE
         
     Returns:
         bool: True if the download was successful, False otherwise.
     """
+    settings = CrawlSettings.current()
+    bufsize = bufsize or settings.bufsize
+    start = time.perf_counter()
     try :
-        rt.urlretrieve(url, savepath)
-        logging.info("Saved paper '{}'".format(title))
+        call_with_retries(lambda: _download_once(url, savepath, bufsize), "'{}'".format(title))
+        logger.info("Saved paper '{}'".format(title))
     except Exception as e:
-        print(e)
+        logger.info("Dowload failed for paper '{}': {}".format(title, e))
+        settings.metrics.paper(False, savepath, time.perf_counter() - start, error=str(e))
         return False
+    settings.metrics.paper(True, savepath, time.perf_counter() - start)
     return True
 
-def is_related(title: str, keywords: List[str]) -> bool:
+def _pool_worker_config(bandwidth: Optional[float]) -> Tuple[Any, ...]:
+    """
+    The settings of the running crawl, as the arguments of :func:`_init_pool_worker`.
+    """
+    settings = CrawlSettings.current()
+    limiter, cache = settings.rate_limiter, settings.cache
+    return (dict(HOST_OVERRIDES),
+            (limiter.initial_rate, limiter.max_rate, limiter.min_rate, limiter.increase, limiter.decrease)
+            if limiter is not None else None,
+            settings.max_retries,
+            (cache.cachedir, cache.ttl, cache.max_bytes, cache.offline) if cache is not None else None,
+            bandwidth)
+
+def _init_pool_worker(overrides: Dict[str, str], limiter: Optional[Tuple[float, ...]], max_retries: int,
+                      cache: Optional[Tuple[Any, ...]], bandwidth: Optional[float]) -> None:
+    """
+    Pool initializer repeating the parent's configuration, which a spawned worker
+    (the default on macOS and Windows) does not inherit. The worker gets its own
+    copy of the rate limiter and ``bandwidth`` MB/s.
+    """
+    global RATE_LIMITER, MAX_RETRIES, _html_cache
+    # a forked worker inherits the thread-local settings of the job that started the pool
+    _job_settings.settings = None
+    override_hosts(overrides)
+    RATE_LIMITER = HostRateLimiter(*limiter) if limiter is not None else None
+    MAX_RETRIES = max_retries
+    _html_cache = HTMLCache(*cache) if cache is not None else None
+    configure_bandwidth(bandwidth)
+
+def _pool_download(url: str, savepath: str, title: str, bufsize: int) -> Tuple[bool, Dict[str, Any]]:
+    """
+    :func:`download` in a pool engine worker, returning the metrics it recorded for the parent to merge.
+    """
+    global METRICS
+    METRICS = Metrics()
+    return download(url, savepath, title, bufsize), METRICS.state()
+
+def _download_once(url: str, savepath: str, bufsize: int) -> None:
+    partpath = savepath + PART_SUFFIX
+    offset, headers = _resume_headers(partpath)
+    request = rt.Request(url, headers=dict(headers, **{'User-Agent': USER_AGENT}))
+    try:
+        f = urlopen(request)
+    except HTTPError as e:
+        if e.code == 416 and offset:
+            total = (e.headers.get('content-range') or '').rpartition('/')[2]
+            if _stale_part(total, offset):
+                _discard_part(partpath)
+                return _download_once(url, savepath, bufsize)
+            # the .part file already holds the whole body
+            finalize_download(partpath, savepath, int(total) if total.isdigit() else None)
+            return
+        raise
+    with f:
+        mode, expected_size = _resume_plan(f.status, f.headers, offset)
+        if mode == 'wb':
+            _save_validator(partpath, f.headers)
+        bandwidth = BANDWIDTH_LIMITER
+        with open(partpath, mode) as file:
+            while True:
+                chunk = f.read(bufsize)
+                if not chunk:
+                    break
+                file.write(chunk)
+                if bandwidth is not None:
+                    bandwidth.consume(len(chunk))
+    finalize_download(partpath, savepath, expected_size)
+
+class _Connection:
+    """A keep-alive HTTP/1.1 connection owned by a _HostPool."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reused = False
+        self.reusable = True
+
+    def close(self) -> None:
+        self.reusable = False
+        self.writer.close()
+
+class _Proxy(NamedTuple):
+    """An HTTP proxy from HTTP_PROXY/HTTPS_PROXY, with the credentials of its URL if any."""
+    host: str
+    port: int
+    authorization: Optional[str]
+
+    @classmethod
+    def parse(cls, url: str) -> '_Proxy':
+        parts = urlsplit(url if '://' in url else 'http://' + url)
+        authorization = None
+        if parts.username is not None:
+            credentials = '{}:{}'.format(unquote(parts.username), unquote(parts.password or ''))
+            authorization = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        return cls(parts.hostname, parts.port or 80, authorization)
+
+class _HostPool:
+    """
+    Idle keep-alive connections to one (scheme, host, port).
+
+    At most ``limit`` connections are checked out at the same time; released
+    connections are parked and handed to the next request for that host, so
+    a whole conference only pays for ``limit`` TCP/TLS handshakes. Behind a
+    ``proxy``, plain HTTP connections go to the proxy and HTTPS connections
+    are tunnelled through it with CONNECT.
+    """
+
+    def __init__(self, scheme: str, host: str, port: int, limit: int, proxy: Optional[_Proxy] = None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.proxy = proxy
+        self._idle = []
+        self._slots = asyncio.Semaphore(limit)
+
+    async def acquire(self, timeout: float) -> _Connection:
+        await self._slots.acquire()
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn.reader.at_eof():
+                conn.reused = True
+                return conn
+            conn.close()
+        try:
+            ssl_context = ssl._create_default_https_context() if self.scheme == 'https' else None
+            if self.proxy is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=ssl_context), timeout)
+            elif ssl_context is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.proxy.host, self.proxy.port), timeout)
+            else:
+                # the CONNECT handshake runs on a blocking socket, TLS then starts on the tunnel
+                sock = await asyncio.wait_for(
+                    asyncio.get_event_loop().run_in_executor(None, self._tunnel, timeout), timeout)
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(sock=sock, ssl=ssl_context, server_hostname=self.host), timeout)
+        except BaseException:
+            self._slots.release()
+            raise
+        return _Connection(reader, writer)
+
+    def _tunnel(self, timeout: float) -> socket.socket:
+        sock = socket.create_connection((self.proxy.host, self.proxy.port), timeout)
+        try:
+            target = '{}:{}'.format(self.host, self.port)
+            lines = ['CONNECT {} HTTP/1.1'.format(target), 'Host: ' + target]
+            if self.proxy.authorization:
+                lines.append('Proxy-Authorization: ' + self.proxy.authorization)
+            sock.sendall(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            head = b''
+            while b'\r\n\r\n' not in head:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    raise ConnectionResetError('Proxy closed the tunnel to {}'.format(target))
+                head += chunk
+            status_line = head.split(b'\r\n', 1)[0].decode('latin-1')
+            if not (status_line.split(' ') + [''])[1].startswith('2'):
+                raise OSError('Proxy refused the tunnel to {}: {}'.format(target, status_line))
+            return sock
+        except BaseException:
+            sock.close()
+            raise
+
+    def release(self, conn: _Connection) -> None:
+        if conn.reusable:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+class _Response:
+    """Status and headers of an HTTP response whose body has not been read yet."""
+
+    def __init__(self, url: str, status: int, reason: str, headers: Dict[str, str],
+                 conn: _Connection, pool: _HostPool, timeout: float, bufsize: int):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._conn = conn
+        self._pool = pool
+        self._timeout = timeout
+        self._bufsize = bufsize
+        self._done = False
+        self._consumed = False
+
+    async def read_into(self, sink: Callable[[bytes], Any]) -> int:
+        """
+        Streams the body to ``sink`` chunk by chunk and returns the number of bytes read.
+        """
+        reader, total = self._conn.reader, 0
+        self._consumed = True
+        try:
+            if 'chunked' in self.headers.get('transfer-encoding', '').lower():
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), self._timeout)
+                    # no Content-Length to check the file against later: a cut-off body must fail here
+                    if not line.endswith(b'\n'):
+                        raise IncompleteDownload('Connection closed after {} bytes of a chunked body: {}'.format(
+                            total, self.url))
+                    try:
+                        size = int(line.split(b';')[0].strip(), 16)
+                    except ValueError:
+                        raise IncompleteDownload('Malformed chunk size {!r}: {}'.format(line[:40], self.url))
+                    if size == 0:
+                        while (await asyncio.wait_for(reader.readline(), self._timeout)) not in (b'\r\n', b'\n', b''):
+                            pass
+                        break
+                    total += await self._read_exactly(size, sink)
+                    await asyncio.wait_for(reader.readexactly(2), self._timeout)
+            elif 'content-length' in self.headers:
+                total += await self._read_exactly(int(self.headers['content-length']), sink)
+            else:
+                self._conn.reusable = False
+                while True:
+                    chunk = await asyncio.wait_for(reader.read(self._bufsize), self._timeout)
+                    if not chunk:
+                        break
+                    sink(chunk)
+                    total += len(chunk)
+                    if BANDWIDTH_LIMITER is not None:
+                        await BANDWIDTH_LIMITER.consume_async(len(chunk))
+        except BaseException:
+            self._conn.reusable = False
+            raise
+        finally:
+            self.release()
+        return total
+
+    async def read(self) -> bytes:
+        chunks = []
+        await self.read_into(chunks.append)
+        return b''.join(chunks)
+
+    async def discard(self, limit: int = 64 * 1024) -> None:
+        """
+        Drops the body. Small bodies (error pages) are drained so the connection stays usable.
+        """
+        if self._done:
+            return
+        length = self.headers.get('content-length', '')
+        if length.isdigit() and int(length) <= limit:
+            try:
+                await self.read_into(lambda chunk: None)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+                pass
+        else:
+            self.release()
+
+    async def _read_exactly(self, size: int, sink: Callable[[bytes], Any]) -> int:
+        remaining = size
+        while remaining > 0:
+            chunk = await asyncio.wait_for(
+                self._conn.reader.read(min(remaining, self._bufsize)), self._timeout)
+            if not chunk:
+                raise asyncio.IncompleteReadError(b'', remaining)
+            sink(chunk)
+            remaining -= len(chunk)
+            if BANDWIDTH_LIMITER is not None:
+                await BANDWIDTH_LIMITER.consume_async(len(chunk))
+        return size
+
+    def release(self) -> None:
+        """
+        Hands the connection back to its pool. An unread body makes it unusable.
+        """
+        if self._done:
+            return
+        self._done = True
+        if not self._consumed or self.headers.get('connection', '').lower() == 'close':
+            self._conn.reusable = False
+        self._pool.release(self._conn)
+
+class AsyncDownloader:
+    """
+    asyncio download engine with per-host keep-alive connection pools.
+
+    Unlike the multiprocessing Pool path, which forks ``poolnum`` workers and
+    opens a fresh (TLS) connection for every PDF, all transfers run in one
+    event loop and reuse at most ``per_host`` connections per host.
+
+    Args:
+        concurrency (int): The maximum number of requests in flight overall.
+        per_host (Optional[int]): The maximum number of connections per host. default: concurrency
+        timeout (float): Seconds to wait for connecting or for the next chunk of data.
+        bufsize (Optional[int]): Size of the chunks read from the socket. default: DOWNLOAD_BUFSIZE
+        max_redirects (int): How many redirects to follow before giving up.
+        proxies (Optional[Dict[str, str]]): Proxy URLs by scheme, plus a 'no' entry of hosts to reach directly,
+            like ``urllib.request.getproxies()``. default: HTTP_PROXY, HTTPS_PROXY and NO_PROXY, as urllib reads them
+    """
+
+    def __init__(self, concurrency: int = 8, per_host: Optional[int] = None,
+                 timeout: float = 60, bufsize: Optional[int] = None, max_redirects: int = 5,
+                 proxies: Optional[Dict[str, str]] = None):
+        self.concurrency = concurrency
+        self.per_host = per_host or concurrency
+        self.timeout = timeout
+        self.bufsize = bufsize or CrawlSettings.current().bufsize
+        self.max_redirects = max_redirects
+        self.proxies = rt.getproxies() if proxies is None else proxies
+        self._bypass = rt.proxy_bypass if proxies is None else (
+            lambda host: rt.proxy_bypass_environment(host, proxies))
+        self._proxy_by_host = {}
+        self._pools = {}
+
+    def _proxy_for(self, scheme: str, host: str) -> Optional[_Proxy]:
+        # the same choice urllib's ProxyHandler makes for the pool engine
+        key = (scheme, host)
+        if key not in self._proxy_by_host:
+            url = self.proxies.get(scheme)
+            self._proxy_by_host[key] = _Proxy.parse(url) if url and not self._bypass(host) else None
+        return self._proxy_by_host[key]
+
+    def _pool_for(self, scheme: str, host: str, port: int, name: Optional[str] = None) -> _HostPool:
+        # keyed by the requested host name too, so per-host limits hold when HOST_OVERRIDES merges hosts
+        key = (scheme, host, port, name)
+        if key not in self._pools:
+            self._pools[key] = _HostPool(scheme, host, port, self.per_host, self._proxy_for(scheme, host))
+        return self._pools[key]
+
+    async def open(self, url: str, method: str = 'GET',
+                   headers: Optional[Dict[str, str]] = None) -> _Response:
+        """
+        Sends a request, following redirects, and returns once the response headers arrived.
+        The caller must read the body or call ``release()`` on the response.
+        """
+        for _ in range(self.max_redirects + 1):
+            resp = await self._send(url, method, headers)
+            if resp.status not in _REDIRECT_CODES or 'location' not in resp.headers:
+                return resp
+            url = urljoin(url, resp.headers['location'])
+            if resp.status == 303:
+                method = 'GET'
+            await resp.discard()
+        raise IOError('Too many redirects: {}'.format(url))
+
+    async def _send(self, url: str, method: str, headers: Optional[Dict[str, str]]) -> _Response:
+        parts = urlsplit(url)
+        host = parts.hostname
+        host_header = host if parts.port is None else '{}:{}'.format(host, parts.port)
+        target = urlsplit(HOST_OVERRIDES[host]) if host in HOST_OVERRIDES else parts
+        scheme = target.scheme.lower()
+        port = target.port or (443 if scheme == 'https' else 80)
+        pool = self._pool_for(scheme, target.hostname, port, host)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        if pool.proxy is not None and scheme == 'http':
+            # a proxy takes plain HTTP requests in absolute form; HTTPS ones go through the tunnel unchanged
+            path = 'http://{}:{}{}'.format(target.hostname, port, path)
+        settings = CrawlSettings.current()
+        limiter = settings.rate_limiter
+        lines = ['{} {} HTTP/1.1'.format(method, path), 'Host: ' + host_header,
+                 'User-Agent: ' + USER_AGENT, 'Accept-Encoding: identity']
+        if pool.proxy is not None and scheme == 'http' and pool.proxy.authorization:
+            lines.append('Proxy-Authorization: ' + pool.proxy.authorization)
+        for key, value in (headers or {}).items():
+            lines.append('{}: {}'.format(key, value))
+        request = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        while True:
+            if limiter is not None:
+                await limiter.acquire_async(host)
+            conn = await pool.acquire(self.timeout)
+            try:
+                conn.writer.write(request)
+                await asyncio.wait_for(conn.writer.drain(), self.timeout)
+                status_line = await asyncio.wait_for(conn.reader.readline(), self.timeout)
+                if not status_line:
+                    raise ConnectionResetError('Connection closed by {}'.format(host))
+                version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+                response_headers = {}
+                while True:
+                    line = await asyncio.wait_for(conn.reader.readline(), self.timeout)
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    key, value = key.strip().lower(), value.strip()
+                    response_headers[key] = response_headers[key] + ', ' + value if key in response_headers else value
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                # a parked keep-alive connection may have been closed by the server meanwhile
+                conn.reusable = False
+                pool.release(conn)
+                if conn.reused:
+                    continue
+                settings.metrics.request(host, 'error')
+                raise
+            except BaseException:
+                conn.reusable = False
+                pool.release(conn)
+                settings.metrics.request(host, 'error')
+                raise
+            if version == 'HTTP/1.0':
+                conn.reusable = False
+            resp = _Response(url, int(status), reason, response_headers, conn, pool,
+                             self.timeout, self.bufsize)
+            settings.metrics.request(host, resp.status)
+            if limiter is not None:
+                limiter.note(host, resp.status, parse_retry_after(response_headers.get('retry-after')))
+            if method == 'HEAD' or resp.status in (204, 304) or 100 <= resp.status < 200:
+                # no body follows, the connection is ready for the next request
+                resp._consumed = True
+                resp.release()
+            return resp
+
+    async def download(self, url: str, savepath: str, title: str) -> bool:
+        """
+        Same contract as :func:`download`, but runs inside the event loop.
+        """
+        metrics = CrawlSettings.current().metrics
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                await self._download_once(url, savepath)
+                logger.info("Saved paper '{}'".format(title))
+                metrics.paper(True, savepath, time.perf_counter() - start)
+                return True
+            except Exception as e:
+                delay = retry_delay(e, attempt)
+                if delay is None:
+                    logger.info("Dowload failed for paper '{}': {}".format(title, e))
+                    metrics.paper(False, savepath, time.perf_counter() - start, error=str(e))
+                    return False
+                logger.info("Retrying '{}' in {:.1f}s: {}".format(title, delay, e))
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def _download_once(self, url: str, savepath: str) -> None:
+        partpath = savepath + PART_SUFFIX
+        offset, headers = _resume_headers(partpath)
+        resp = await self.open(url, headers=headers or None)
+        if resp.status == 416 and offset:
+            await resp.discard()
+            total = resp.headers.get('content-range', '').rpartition('/')[2]
+            if _stale_part(total, offset):
+                _discard_part(partpath)
+                return await self._download_once(url, savepath)
+            expected_size = int(total) if total.isdigit() else None
+        else:
+            try:
+                mode, expected_size = _resume_plan(resp.status, resp.headers, offset)
+            except IOError:
+                await resp.discard()
+                raise HTTPStatusError(resp.status, resp.reason, url,
+                                      parse_retry_after(resp.headers.get('retry-after')))
+            if mode == 'wb':
+                _save_validator(partpath, resp.headers)
+            with open(partpath, mode) as file:
+                await resp.read_into(file.write)
+        finalize_download(partpath, savepath, expected_size)
+
+    async def download_many(self, items: Iterable[Tuple[str, str, str]],
+                            on_result: Optional[Callable[[Tuple[str, str, str], bool], Any]] = None
+                            ) -> Tuple[List[Tuple[str, str, str]], List[bool]]:
+        """
+        Downloads papers as ``items`` yields them, with ``concurrency`` transfers in flight.
+
+        A list is queued at once. Any other iterable is drained in a worker thread,
+        so a slow producer (e.g. detail page resolution) overlaps with the transfers.
+        ``on_result(item, ok)`` is called after every download on a thread of its own, as
+        recording a paper hashes and links the file and writes the manifest, which would
+        stall every other transfer if it ran in the event loop.
+
+        Returns:
+            Tuple[List, List[bool]]: The items in the order they were taken and their status.
+        """
+        loop = asyncio.get_event_loop()
+        queue = asyncio.Queue()
+        taken, result, errors = [], [], []
+
+        def produce():
+            for item in items:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+
+        async def feed():
+            try:
+                if isinstance(items, (list, tuple)):
+                    for item in items:
+                        queue.put_nowait(item)
+                else:
+                    await loop.run_in_executor(None, share_settings(produce))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                for _ in range(self.concurrency):
+                    queue.put_nowait(None)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index = len(taken)
+                taken.append(item)
+                result.append(False)
+                result[index] = await self.download(*item)
+                if on_result is not None:
+                    await loop.run_in_executor(callbacks, share_settings(on_result), item, result[index])
+
+        callbacks = ThreadPoolExecutor(max_workers=min(4, self.concurrency))
+        try:
+            await asyncio.gather(feed(), *[worker() for _ in range(self.concurrency)])
+        finally:
+            callbacks.shutdown()
+            self.close()
+        if errors:
+            raise errors[0]
+        return taken, result
+
+    def content_lengths(self, urls: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Sends a HEAD request for every url, ``concurrency`` at a time, and returns
+        the Content-Length of each; None where the server did not tell.
+        """
+        async def head(url: str, slots: asyncio.Semaphore) -> Optional[int]:
+            async with slots:
+                try:
+                    resp = await self.open(url, method='HEAD')
+                except Exception as e:
+                    logger.debug('HEAD {} failed: {}'.format(url, e))
+                    return None
+                length = resp.headers.get('content-length', '')
+                return int(length) if resp.status == 200 and length.isdigit() else None
+
+        async def head_all() -> List[Optional[int]]:
+            slots = asyncio.Semaphore(self.concurrency)
+            try:
+                return await asyncio.gather(*[head(url, slots) for url in urls])
+            finally:
+                self.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            return dict(zip(urls, loop.run_until_complete(head_all())))
+        finally:
+            loop.close()
+
+    def run(self, items: Iterable[Tuple[str, str, str]],
+            on_result: Optional[Callable[[Tuple[str, str, str], bool], Any]] = None
+            ) -> Tuple[List[Tuple[str, str, str]], List[bool]]:
+        """
+        Downloads every (url, savepath, title) in ``items``, see :meth:`download_many`.
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.download_many(items, on_result))
+        finally:
+            loop.close()
+
+    def close(self) -> None:
+        for pool in self._pools.values():
+            pool.close()
+        self._pools = {}
+
+def download_stream(items: Iterable[Tuple[str, str, str]], poolnum: int = 8, engine: str = 'async',
+                    bufsize: Optional[int] = None, per_host: Optional[int] = None,
+                    on_result: Optional[Callable[[Tuple[str, str, str], bool], Any]] = None
+                    ) -> Tuple[List[Tuple[str, str, str]], List[bool]]:
+    """
+    Downloads every (url, savepath, title) with the selected engine, starting
+    on each paper as soon as ``items`` yields it.
+
+    Args:
+        items (Iterable[Tuple[str, str, str]]): The papers to download, a list or a generator.
+        poolnum (int): Worker processes for the 'pool' engine, requests in flight for the 'async' engine.
+        engine (str): 'async' (default) or 'pool'.
+        bufsize (Optional[int]): Size of the chunks written to disk. default: DOWNLOAD_BUFSIZE
+        per_host (Optional[int]): Connections per host for the 'async' engine. default: poolnum
+        on_result (Optional[Callable]): Called with (item, status) as soon as each paper is done.
+
+    Returns:
+        Tuple[List, List[bool]]: The papers in the order they were taken and their download status.
+    """
+    settings = CrawlSettings.current()
+    bufsize = bufsize or settings.bufsize
+    if engine == 'async':
+        return AsyncDownloader(concurrency=poolnum, per_host=per_host, bufsize=bufsize).run(items, on_result)
+    if engine != 'pool':
+        raise ValueError(f"Unsupported engine: {engine}")
+    # called on the pool's result thread
+    report = share_settings(on_result) if on_result is not None else None
+    def callback(result: Tuple[bool, Dict[str, Any]], item: Tuple[str, str, str]) -> None:
+        settings.metrics.merge(result[1])
+        if report is not None:
+            report(item, result[0])
+
+    # every worker process gets an equal share of the bandwidth cap
+    share = BANDWIDTH_LIMITER.rate / poolnum / 1024 / 1024 if BANDWIDTH_LIMITER is not None else None
+    with Pool(poolnum, initializer=_init_pool_worker, initargs=_pool_worker_config(share)) as pool:
+        taken, status = [], []
+        for item in items:
+            taken.append(item)
+            status.append(pool.apply_async(_pool_download, args=(item[0], item[1], item[2], bufsize),
+                                           callback=lambda result, item=item: callback(result, item)))
+        return taken, [res.get()[0] for res in status]
+
+def parse_size(value: str) -> int:
+    """
+    Parses a byte count such as '500M', '20G' or '1.5T' (powers of 1024).
+    """
+    value = value.strip().upper().rstrip('B')
+    scale = 1
+    if value and value[-1] in 'KMGT':
+        scale = 1024 ** ('KMGT'.index(value[-1]) + 1)
+        value = value[:-1]
+    try:
+        return int(float(value) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError('not a size: {!r}'.format(value))
+
+class DownloadScheduler:
+    """
+    Plans a download queue by size: the Content-Length of every paper is fetched
+    with concurrent HEAD requests, papers are left out once ``max_bytes`` or the
+    free disk space (minus ``min_free``) is used up, and the rest are ordered by
+    ``order``. Papers without a Content-Length are counted at the median size of
+    the others.
+
+    Args:
+        order (str): 'discovery' (as listed), 'smallest' first for fast feedback,
+            or 'largest' first to keep the pipe full.
+        max_bytes (Optional[int]): Bytes each planned queue may download, that is each run, or each
+            job of the library API.
+        min_free (int): Bytes to leave free on the disk the papers are saved to.
+    """
+    ORDERS = ('discovery', 'smallest', 'largest')
+
+    def __init__(self, order: str = 'discovery', max_bytes: Optional[int] = None, min_free: int = 0):
+        if order not in self.ORDERS:
+            raise ValueError('Unsupported order: {}'.format(order))
+        self.order = order
+        self.max_bytes = max_bytes
+        self.min_free = min_free
+
+    def plan(self, items: Iterable[Tuple[str, str, str]], savedir: str, poolnum: int = 8,
+             per_host: Optional[int] = None) -> List[Tuple[str, str, str]]:
+        """
+        Returns the (url, savepath, title) items to download, in order; the others are reported to the crawl's metrics.
+        """
+        items = list(items)
+        if not items:
+            return items
+        sizes = AsyncDownloader(concurrency=poolnum, per_host=per_host).content_lengths([item[0] for item in items])
+        known = sorted(size for size in sizes.values() if size is not None)
+        guess = known[len(known) // 2] if known else 0
+        logger.info('Sizes of {} of {} papers announced, {:.1f} MB in total'.format(
+            len(known), len(items), sum(known) / 1024 / 1024))
+
+        def need(item: Tuple[str, str, str]) -> int:
+            size = sizes[item[0]] if sizes[item[0]] is not None else guess
+            partpath = item[1] + PART_SUFFIX
+            return max(0, size - (os.path.getsize(partpath) if os.path.exists(partpath) else 0))
+
+        if self.order != 'discovery':
+            items.sort(key=need, reverse=self.order == 'largest')
+        metrics = CrawlSettings.current().metrics
+        free = shutil.disk_usage(savedir).free - self.min_free
+        # the budget is per queue: a service submitting one job after another gets it for every job
+        queue, skipped, planned = [], 0, 0
+        for item in items:
+            size = need(item)
+            if size > free:
+                reason = 'disk'
+            elif self.max_bytes is not None and size > self.max_bytes - planned:
+                reason = 'max-bytes'
+            else:
+                queue.append(item)
+                free -= size
+                planned += size
+                continue
+            metrics.skip(item, reason, size)
+            skipped += size
+        if len(queue) < len(items):
+            logger.info('{} papers ({:.1f} MB) skipped, they do not fit the free disk space or --max-bytes'.format(
+                len(items) - len(queue), skipped / 1024 / 1024))
+        return queue
+
+# download_batches plans every queue with it when set, see configure_scheduler
+SCHEDULER = None  # type: Optional[DownloadScheduler]
+
+def configure_scheduler(order: str = 'discovery', max_bytes: Optional[int] = None,
+                        min_free: Optional[int] = None) -> Optional[DownloadScheduler]:
+    """
+    Enables size-aware scheduling when an order other than discovery, a byte budget
+    or a disk reserve is asked for, and disables it otherwise.
+    """
+    global SCHEDULER
+    if order == 'discovery' and max_bytes is None and min_free is None:
+        SCHEDULER = None
+    else:
+        SCHEDULER = DownloadScheduler(order, max_bytes, min_free or 0)
+    return SCHEDULER
+
+MANIFEST_NAME = 'papercrawl.sqlite'
+
+BLOB_DIR = '.papercrawl_blobs'
+# keep downloaded PDFs in the blob store, see BlobStore (--no-blob-store turns it off)
+BLOB_STORE = True
+
+class BlobStore:
+    """
+    Content-addressed store of downloaded PDFs, one file per SHA-256 under ``root``.
+
+    The readable paths papers are saved under (``[ACL2024] Title.pdf``) become
+    hard links to their blob, so a paper saved twice (main and workshop listing,
+    a mirror, a renamed title) takes its disk space once. Where hard links are
+    not possible the path is a relative symlink to the blob, failing that a copy.
+
+    Args:
+        root (str): The directory of the store, created on first use.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256 + '.pdf')
+
+    def has(self, sha256: str) -> bool:
+        return os.path.exists(self.path(sha256))
+
+    def ingest(self, path: str, sha256: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Stores the file at ``path`` and makes ``path`` point at its blob.
+
+        Returns:
+            Tuple[str, bool]: The SHA-256 of the file and whether that content was stored already,
+            in which case ``path`` now shares the older copy.
+        """
+        sha256 = sha256 or file_sha256(path)
+        blob = self.path(sha256)
+        if os.path.exists(blob):
+            if os.path.samefile(blob, path):
+                return sha256, False
+            self.link(sha256, path)
+            return sha256, True
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        tmp = '{}.{}.{}.tmp'.format(blob, os.getpid(), threading.get_ident())
+        try:
+            os.link(path, tmp)
+            os.replace(tmp, blob)
+        except OSError:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+            self.link(sha256, path)
+        return sha256, False
+
+    def link(self, sha256: str, path: str) -> None:
+        """
+        Atomically makes ``path`` a hard link (or symlink, or copy) of the blob ``sha256``.
+        """
+        blob = self.path(sha256)
+        tmp = '{}.{}.{}.link'.format(path, os.getpid(), threading.get_ident())
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            try:
+                os.symlink(os.path.relpath(blob, os.path.dirname(os.path.abspath(path))), tmp)
+            except OSError:
+                shutil.copyfile(blob, tmp)
+        os.replace(tmp, path)
+
+class Manifest:
+    """
+    SQLite record of every paper seen by a crawl, keyed by (conference, year, paper id).
+
+    The status of a paper is 'pending', 'done' or 'failed'. Deciding what to
+    download is one query per conference instead of a stat per file, and failures
+    of earlier runs stay around for ``--retry-failed``. The database runs in WAL
+    mode, so several processes can write to it at the same time. The metadata
+    of every listed paper, related or not, is kept next to it for ``search``.
+
+    With a blob store, every saved paper is moved into it and the hash of each
+    downloaded url is remembered, so a url whose content is already stored is
+    linked from the store by :meth:`link_known` instead of being downloaded again.
+
+    Args:
+        path (str): The database file, created when missing.
+        blobs (Optional[BlobStore]): Where downloaded papers are kept by content.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS papers (
+            conference TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            paper_id TEXT NOT NULL,
+            title TEXT,
+            url TEXT,
+            path TEXT,
+            size INTEGER,
+            sha256 TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            updated_at REAL,
+            PRIMARY KEY (conference, year, paper_id)
+        );
+        CREATE INDEX IF NOT EXISTS papers_status ON papers (status, conference, year);
+        CREATE TABLE IF NOT EXISTS metadata (
+            conference TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            paper_id TEXT NOT NULL,
+            title TEXT,
+            authors TEXT,
+            abstract TEXT,
+            url TEXT,
+            path TEXT,
+            PRIMARY KEY (conference, year, paper_id)
+        );
+        CREATE TABLE IF NOT EXISTS snapshots (
+            conference TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            filter TEXT,
+            pages TEXT,
+            crawled_at REAL,
+            PRIMARY KEY (conference, year)
+        );
+        CREATE TABLE IF NOT EXISTS url_blobs (
+            url TEXT PRIMARY KEY,
+            sha256 TEXT NOT NULL,
+            size INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS snapshot_entries (
+            conference TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            paper_id TEXT NOT NULL,
+            fingerprint TEXT,
+            PRIMARY KEY (conference, year, paper_id)
+        );
+    """
+
+    # full text index over metadata, kept in sync by triggers (FTS5 is optional in SQLite builds)
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS metadata_fts USING fts5(
+            title, authors, abstract, content='metadata', content_rowid='rowid', tokenize='porter unicode61');
+        CREATE TRIGGER IF NOT EXISTS metadata_ai AFTER INSERT ON metadata BEGIN
+            INSERT INTO metadata_fts (rowid, title, authors, abstract)
+            VALUES (new.rowid, new.title, new.authors, new.abstract);
+        END;
+        CREATE TRIGGER IF NOT EXISTS metadata_ad AFTER DELETE ON metadata BEGIN
+            INSERT INTO metadata_fts (metadata_fts, rowid, title, authors, abstract)
+            VALUES ('delete', old.rowid, old.title, old.authors, old.abstract);
+        END;
+    """
+
+    def __init__(self, path: str, blobs: Optional[BlobStore] = None):
+        self.path = path
+        self.blobs = blobs
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self._lock, self.conn:
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+            self.conn.executescript(self.SCHEMA)
+            try:
+                self.conn.executescript(self.FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                logger.info('SQLite has no FTS5, search falls back to substring matching')
+                self.fts = False
+
+    def register(self, conference: str, year: int, entries: List[Tuple[str, str, str, str]]) -> None:
+        """
+        Adds (paper id, url, path, title) entries, updating the url of known ones.
+        New entries whose file already exists (from runs before the manifest) count as done.
+        """
+        with self._lock, self.conn:
+            known = {row[0] for row in self.conn.execute(
+                'SELECT paper_id FROM papers WHERE conference = ? AND year = ?', (conference, year))}
+            now = time.time()
+            self.conn.executemany(
+                'INSERT INTO papers (conference, year, paper_id, url, path, title, status, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(conference, year, paper_id, url, path, title,
+                  'done' if os.path.exists(path) else 'pending', now)
+                 for paper_id, url, path, title in entries if paper_id not in known])
+            self.conn.executemany(
+                'UPDATE papers SET url = ? WHERE conference = ? AND year = ? AND paper_id = ?',
+                [(url, conference, year, paper_id) for paper_id, url, _, _ in entries if paper_id in known])
+
+    def missing(self, conference: Optional[str] = None, year: Optional[int] = None,
+                status: Tuple[str, ...] = ('pending', 'failed')) -> List[sqlite3.Row]:
+        """
+        Returns the papers that are not downloaded yet, optionally for one conference and year.
+        """
+        query = 'SELECT * FROM papers WHERE status IN ({})'.format(','.join('?' * len(status)))
+        params = list(status)
+        if conference is not None:
+            query += ' AND conference = ?'
+            params.append(conference)
+        if year is not None:
+            query += ' AND year = ?'
+            params.append(year)
+        with self._lock:
+            return self.conn.execute(query + ' ORDER BY conference, year, paper_id', params).fetchall()
+
+    def record(self, conference: str, year: int, paper_id: str, url: str, path: str, ok: bool,
+               sha256: Optional[str] = None) -> None:
+        """
+        Stores the outcome of one download attempt, and the file in the blob store if there is one.
+        """
+        size = None
+        if ok:
+            size, sha256 = os.path.getsize(path), sha256 or file_sha256(path)
+            if self.blobs is not None:
+                self.blobs.ingest(path, sha256)
+        with self._lock, self.conn:
+            if ok:
+                # the listing url (e.g. a detail page) as well as the url the PDF came from
+                listed = self.conn.execute('SELECT url FROM papers WHERE conference = ? AND year = ? AND paper_id = ?',
+                                           (conference, year, paper_id)).fetchone()
+                self.remember({url, listed[0] if listed else url} - {None}, sha256, size)
+            self.conn.execute(
+                'UPDATE papers SET url = ?, path = ?, size = ?, sha256 = ?, status = ?, '
+                'attempts = attempts + 1, updated_at = ? WHERE conference = ? AND year = ? AND paper_id = ?',
+                (url, path, size, sha256, 'done' if ok else 'failed', time.time(), conference, year, paper_id))
+
+    def remember(self, urls: Iterable[str], sha256: str, size: Optional[int]) -> None:
+        """
+        Remembers the content hash behind ``urls``.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO url_blobs (url, sha256, size) VALUES (?, ?, ?)',
+                                  [(url, sha256, size) for url in urls])
+
+    def link_known(self, rows: List[sqlite3.Row]) -> List[sqlite3.Row]:
+        """
+        Saves the rows whose url is known to have content already in the blob store
+        by linking it, and returns the rows that still have to be downloaded.
+        """
+        if self.blobs is None or not rows:
+            return rows
+        with self._lock:
+            known = {}
+            for row in rows:
+                hit = self.conn.execute('SELECT sha256 FROM url_blobs WHERE url = ?', (row['url'],)).fetchone()
+                if hit is not None and self.blobs.has(hit[0]):
+                    known[row['path']] = hit[0]
+        remaining = []
+        for row in rows:
+            sha256 = known.get(row['path'])
+            if sha256 is None:
+                remaining.append(row)
+                continue
+            os.makedirs(os.path.dirname(row['path']), exist_ok=True)
+            self.blobs.link(sha256, row['path'])
+            self.record(row['conference'], row['year'], row['paper_id'], row['url'], row['path'], True, sha256)
+            logger.info("Linked paper '{}' from the blob store".format(row['title']))
+        return remaining
+
+    def catalog(self, conference: str, year: int,
+                records: List[Tuple[str, str, str, str, str, str]]) -> None:
+        """
+        Replaces the searchable metadata of a conference and year with (paper id, title,
+        authors, abstract, url, path) records of every listed paper, related or not.
+        """
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM metadata WHERE conference = ? AND year = ?', (conference, year))
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO metadata (conference, year, paper_id, title, authors, abstract, url, path) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', [(conference, year) + tuple(record) for record in records])
+
+    def search(self, query: str, conference: Optional[str] = None, year: Optional[int] = None,
+               limit: int = 20) -> List[sqlite3.Row]:
+        """
+        Finds catalogued papers matching ``query``, best BM25 score first (titles weigh most).
+
+        The query uses the FTS5 syntax (AND, OR, NOT, "phrases", prefix*); anything it
+        can't parse is searched as plain words. Rows carry the metadata, the download
+        status from the manifest (None if never queued) and the score.
+        """
+        where, params = '', []
+        if conference is not None:
+            where += ' AND m.conference = ?'
+            params.append(conference)
+        if year is not None:
+            where += ' AND m.year = ?'
+            params.append(year)
+        select = ('SELECT m.*, p.status, {} AS score FROM {} LEFT JOIN papers p ON p.conference = m.conference '
+                  'AND p.year = m.year AND p.paper_id = m.paper_id WHERE {}' + where + ' ORDER BY score LIMIT ?')
+        with self._lock:
+            if not self.fts:
+                words = query.lower().split()
+                sql = select.format('0', 'metadata m', ' AND '.join(
+                    ["instr(lower(m.title || ' ' || ifnull(m.authors, '') || ' ' || ifnull(m.abstract, '')), ?)"]
+                    * len(words)) or '1')
+                return self.conn.execute(sql, words + params + [limit]).fetchall()
+            sql = select.format('bm25(metadata_fts, 10.0, 3.0, 1.0)',
+                                'metadata_fts JOIN metadata m ON m.rowid = metadata_fts.rowid', 'metadata_fts MATCH ?')
+            try:
+                return self.conn.execute(sql, [query] + params + [limit]).fetchall()
+            except sqlite3.OperationalError:
+                plain = ' '.join('"{}"'.format(word.replace('"', '')) for word in query.split())
+                return self.conn.execute(sql, [plain] + params + [limit]).fetchall()
+
+    def snapshot(self, conference: str, year: int) -> Optional[Tuple[str, Dict[str, str], Dict[str, str]]]:
+        """
+        Returns (filter, url -> page hash, paper id -> fingerprint) of the last incremental crawl, or None.
+        """
+        with self._lock:
+            row = self.conn.execute('SELECT filter, pages FROM snapshots WHERE conference = ? AND year = ?',
+                                    (conference, year)).fetchone()
+            if row is None:
+                return None
+            entries = dict(self.conn.execute(
+                'SELECT paper_id, fingerprint FROM snapshot_entries WHERE conference = ? AND year = ?',
+                (conference, year)).fetchall())
+        return row['filter'], json.loads(row['pages']), entries
+
+    def save_snapshot(self, conference: str, year: int, filter: str, pages: Dict[str, str],
+                      entries: Dict[str, str]) -> None:
+        with self._lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO snapshots (conference, year, filter, pages, crawled_at) '
+                              'VALUES (?, ?, ?, ?, ?)', (conference, year, filter, json.dumps(pages), time.time()))
+            self.conn.execute('DELETE FROM snapshot_entries WHERE conference = ? AND year = ?', (conference, year))
+            self.conn.executemany(
+                'INSERT INTO snapshot_entries (conference, year, paper_id, fingerprint) VALUES (?, ?, ?, ?)',
+                [(conference, year, paper_id, fingerprint) for paper_id, fingerprint in entries.items()])
+
+    def requeue(self, conference: str, year: int, paper_ids: Iterable[str]) -> None:
+        """
+        Marks papers as pending again, e.g. because their listing changed.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE papers SET status = 'pending' WHERE conference = ? AND year = ? AND paper_id = ?",
+                [(conference, year, paper_id) for paper_id in paper_ids])
+
+    def reject(self, conference: str, year: int, paper_id: str, sha256: Optional[str] = None) -> None:
+        """
+        Marks a saved paper as failed so it is downloaded again, and forgets every url
+        that led to the content ``sha256``, which is dropped from the blob store.
+        """
+        with self._lock, self.conn:
+            if sha256 is not None:
+                self.conn.execute('DELETE FROM url_blobs WHERE sha256 = ?', (sha256,))
+                if self.blobs is not None and self.blobs.has(sha256):
+                    os.remove(self.blobs.path(sha256))
+            self.conn.execute(
+                "UPDATE papers SET status = 'failed', size = NULL, sha256 = NULL, updated_at = ? "
+                'WHERE conference = ? AND year = ? AND paper_id = ?', (time.time(), conference, year, paper_id))
+
+    def papers(self, conference: str, year: int, paper_ids: Iterable[str]) -> List[sqlite3.Row]:
+        """
+        Returns the manifest rows of ``paper_ids`` with the authors and abstract catalogued for them.
+        """
+        wanted = set(paper_ids)
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT p.*, m.authors, m.abstract FROM papers p LEFT JOIN metadata m ON m.conference = p.conference '
+                'AND m.year = p.year AND m.paper_id = p.paper_id WHERE p.conference = ? AND p.year = ? '
+                'ORDER BY p.paper_id', (conference, year)).fetchall()
+        return [row for row in rows if row['paper_id'] in wanted]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+def file_sha256(path: str, bufsize: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(bufsize), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def open_manifest(savedir: Optional[str] = None) -> Manifest:
+    """
+    Opens the manifest kept at the top of ``savedir`` (default: current path).
+    """
+    savedir = os.path.abspath(savedir or os.getcwd())
+    if not os.path.isdir(savedir):
+        os.makedirs(savedir)
+    return Manifest(os.path.join(savedir, MANIFEST_NAME),
+                    BlobStore(os.path.join(savedir, BLOB_DIR)) if CrawlSettings.current().blob_store else None)
+
+def _pdf_backend() -> Optional[str]:
+    for module in ('pypdf', 'pdfminer'):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        return module
+    return None
+
+def _pdf_string(value: Any) -> str:
+    if isinstance(value, bytes):
+        from pdfminer.utils import decode_text
+        return decode_text(value)
+    return str(value) if value is not None else ''
+
+# the abstract on the first page runs up to the introduction (or the end of the page)
+_ABSTRACT_PATTERN = re.compile(r'\babstract\b[\s.:\u2014-]*(.+?)(?:\n\s*(?:1|I)\.?\s+introduction\b|\Z)',
+                               re.IGNORECASE | re.DOTALL)
+
+def extract_pdf(path: str) -> Dict[str, Any]:
+    """
+    Extracts the text of every page of a saved paper, with the document info and the
+    title and abstract found on the first page. Runs in a :class:`PaperExtractor` worker.
+
+    Returns:
+        Dict[str, Any]: The fields, or only 'problem' when the file is not a PDF, see :func:`pdf_problem`.
+    """
+    start = time.perf_counter()
+    problem = validate_pdf(path)
+    if problem is not None:
+        return {'problem': problem}
+    if _pdf_backend() == 'pypdf':
+        import pypdf
+        reader = pypdf.PdfReader(path)
+        pages = [page.extract_text() or '' for page in reader.pages]
+        info = reader.metadata or {}
+        pdf_title, pdf_author = info.get('/Title'), info.get('/Author')
+    else:
+        from pdfminer.high_level import extract_text
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfparser import PDFParser
+        from pdfminer.pdftypes import resolve1
+        # pages are separated by form feeds, the last one ends with one too
+        pages = extract_text(path).split('\f')
+        if pages and not pages[-1].strip():
+            pages.pop()
+        with open(path, 'rb') as file:
+            infos = PDFDocument(PDFParser(file)).info
+        info = infos[0] if infos else {}
+        pdf_title, pdf_author = resolve1(info.get('Title')), resolve1(info.get('Author'))
+    first_page = pages[0] if pages else ''
+    lines = [line.strip() for line in first_page.splitlines() if line.strip()]
+    abstract = _ABSTRACT_PATTERN.search(first_page)
+    return {'pages': len(pages), 'pdf_title': _pdf_string(pdf_title), 'pdf_author': _pdf_string(pdf_author),
+            'first_page_title': lines[0] if lines else '',
+            'abstract': ' '.join(abstract.group(1).split()) if abstract else '',
+            'text': '\n\n'.join(pages), 'seconds': time.perf_counter() - start}
+
+class CorpusWriter:
+    """
+    Writes records to ``outdir`` in shards of ``shard_size``: gzip compressed JSON lines
+    (part-00000.jsonl.gz) or, with pyarrow installed, Parquet (part-00000.parquet).
+
+    A shard gets its name only once it is complete, so readers never see half of one,
+    and every run starts after the shards already there.
+
+    Args:
+        outdir (str): The directory of the shards, created when missing.
+        shard_size (int): Records per shard.
+        format (str): 'jsonl' or 'parquet'.
+    """
+    FORMATS = ('jsonl', 'parquet')
+
+    def __init__(self, outdir: str, shard_size: int = 1000, format: str = 'jsonl'):
+        if format not in self.FORMATS:
+            raise ValueError('Unsupported corpus format: {}'.format(format))
+        if format == 'parquet':
+            try:
+                import pyarrow.parquet  # noqa: F401
+            except ImportError:
+                raise RuntimeError('a Parquet corpus needs pyarrow, pip install pyarrow or use jsonl')
+        os.makedirs(outdir, exist_ok=True)
+        self.outdir = outdir
+        self.shard_size = shard_size
+        self.format = format
+        self.suffix = '.jsonl.gz' if format == 'jsonl' else '.parquet'
+        self.shards = []  # type: List[str]
+        self.written = 0
+        self._lock = threading.Lock()
+        self._records = []  # type: List[Dict[str, Any]]
+        indices = [int(name[len('part-'):].split('.')[0]) for name in os.listdir(outdir)
+                   if re.match(r'part-\d+\.', name) and not name.endswith('.tmp')]
+        self._index = max(indices) + 1 if indices else 0
+
+    def add(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._records.append(record)
+            if len(self._records) >= self.shard_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._records:
+            return
+        path = os.path.join(self.outdir, 'part-{:05d}{}'.format(self._index, self.suffix))
+        tmppath = path + '.tmp'
+        if self.format == 'jsonl':
+            with gzip.open(tmppath, 'wt', encoding='utf-8') as file:
+                for record in self._records:
+                    file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        else:
+            import pyarrow
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(pyarrow.Table.from_pylist(self._records), tmppath, compression='zstd')
+        os.replace(tmppath, path)
+        self.shards.append(path)
+        self.written += len(self._records)
+        self._index += 1
+        self._records = []
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+
+class PaperExtractor:
+    """
+    Text extraction stage after the download engine: every saved paper is handed
+    to a pool of ``workers`` processes as soon as it lands, and the results go to
+    a :class:`CorpusWriter`, keyed by (conference, year, paper id) like the manifest.
+
+    Files that turn out not to be PDFs are logged and left out of the corpus,
+    see ``papercrawl.py validate`` to re-download them.
+
+    Args:
+        outdir (str): The directory of the corpus shards.
+        workers (Optional[int]): Extraction processes. default: one per CPU
+        shard_size (int): Papers per shard.
+        format (str): 'jsonl' or 'parquet'.
+    """
+
+    def __init__(self, outdir: str, workers: Optional[int] = None, shard_size: int = 1000, format: str = 'jsonl'):
+        if _pdf_backend() is None:
+            raise RuntimeError('text extraction needs pypdf or pdfminer.six, pip install pypdf')
+        self.writer = CorpusWriter(outdir, shard_size=shard_size, format=format)
+        self.pool = Pool(workers or os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self.counts = {'extracted': 0, 'not_pdf': 0, 'failed': 0}
+
+    def submit(self, row: sqlite3.Row) -> None:
+        """
+        Queues the saved paper of a manifest row.
+        """
+        record = {key: row[key] for key in ('conference', 'year', 'paper_id', 'title', 'url', 'path')}
+        self.pool.apply_async(extract_pdf, (row['path'],),
+                              callback=share_settings(lambda result, record=record: self._done(record, result)),
+                              error_callback=lambda error, record=record: self._failed(record, error))
+
+    def _done(self, record: Dict[str, Any], result: Dict[str, Any]) -> None:
+        problem = result.pop('problem', None)
+        if problem is not None:
+            logger.info('Not a PDF ({}): {}'.format(problem, record['path']))
+            self._count('not_pdf')
+            return
+        CrawlSettings.current().metrics.observe('extract_seconds', result.pop('seconds'))
+        record.update(result)
+        self.writer.add(record)
+        self._count('extracted')
+
+    def _failed(self, record: Dict[str, Any], error: BaseException) -> None:
+        logger.info("Extracting paper '{}' failed: {}".format(record['title'], error))
+        self._count('failed')
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def close(self) -> None:
+        """
+        Waits for the queued papers and writes the last shard.
+        """
+        self.pool.close()
+        self.pool.join()
+        self.writer.close()
+        logger.info('{} papers extracted into {} shards in {}, {} not PDFs, {} failed'.format(
+            self.counts['extracted'], len(self.writer.shards), self.writer.outdir,
+            self.counts['not_pdf'], self.counts['failed']))
+
+# set by configure_extract (--extract): saved papers go through text extraction as they land
+EXTRACTOR = None  # type: Optional[PaperExtractor]
+
+def configure_extract(outdir: Optional[str], workers: Optional[int] = None, shard_size: int = 1000,
+                      format: str = 'jsonl') -> Optional[PaperExtractor]:
+    """
+    Turns the text extraction stage on for every download from now on (``outdir`` None turns it off).
+    The returned extractor has to be closed once the downloads are done.
+    """
+    global EXTRACTOR
+    if EXTRACTOR is not None:
+        EXTRACTOR.close()
+    EXTRACTOR = PaperExtractor(outdir, workers, shard_size, format) if outdir else None
+    return EXTRACTOR
+
+class CrawlSettings(NamedTuple):
+    """
+    The objects a crawl runs with, which the configure_* functions set for the whole process.
+
+    A job of :func:`submit_crawl` or :func:`submit_downloads` runs, along with every
+    thread it hands work to, with the settings it was given. The jobs of one service
+    can so have their own metrics, byte budget, rate limits, page cache and corpus.
+    The bandwidth cap and the host overrides stay shared by the process. A job's
+    extractor has to be closed by its owner once the job is done.
+
+    Example:
+        settings = CrawlSettings.current()._replace(
+            metrics=Metrics(), scheduler=DownloadScheduler(max_bytes=parse_size('2G')))
+        job = submit_crawl('acl', 2024, 'retrieval', settings=settings)
+    """
+    metrics: Metrics
+    scheduler: Optional[DownloadScheduler]
+    rate_limiter: Optional[HostRateLimiter]
+    max_retries: int
+    cache: Optional[HTMLCache]
+    extractor: Optional[PaperExtractor]
+    blob_store: bool
+    bufsize: int
+    parser: str
+
+    @classmethod
+    def current(cls) -> 'CrawlSettings':
+        """
+        The settings of the job running on this thread, else the ones of the configure_* functions.
+        """
+        settings = getattr(_job_settings, 'settings', None)
+        if settings is not None:
+            return settings
+        return cls(METRICS, SCHEDULER, RATE_LIMITER, MAX_RETRIES, _html_cache, EXTRACTOR, BLOB_STORE,
+                   DOWNLOAD_BUFSIZE, HTML_PARSER)
+
+_job_settings = threading.local()
+
+@contextlib.contextmanager
+def _using_settings(settings: Optional[CrawlSettings]) -> Iterator[None]:
+    previous = getattr(_job_settings, 'settings', None)
+    _job_settings.settings = settings
+    try:
+        yield
+    finally:
+        _job_settings.settings = previous
+
+def share_settings(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Wraps ``func`` so it runs on other threads with the :class:`CrawlSettings` of this thread's job.
+    """
+    settings = getattr(_job_settings, 'settings', None)
+    if settings is None:
+        return func
+
+    def wrapper(*args, **kwargs):
+        with _using_settings(settings):
+            return func(*args, **kwargs)
+    return wrapper
+
+def _report(row: sqlite3.Row, ok: bool, seconds: Optional[float], error: Optional[str],
+            on_done: Optional[Callable[..., Any]]) -> None:
+    extractor = CrawlSettings.current().extractor
+    if ok and extractor is not None:
+        extractor.submit(row)
+    if on_done is not None:
+        on_done(row, ok, seconds, error)
+
+def missing_rows(manifest: Manifest, conference: str, year: int,
+                 entries: List[Tuple[str, str, str, str]]) -> List[sqlite3.Row]:
+    """
+    Registers (paper id, url, path, title) entries in the manifest and returns the ones not downloaded yet.
+    """
+    manifest.register(conference, year, entries)
+    wanted = {entry[0] for entry in entries}
+    return [row for row in manifest.missing(conference, year) if row['paper_id'] in wanted]
+
+def download_rows(manifest: Manifest, rows: List[sqlite3.Row], poolnum: int = 8, engine: str = 'async',
+                  per_host: Optional[int] = None, driverpath: Optional[str] = None, downtime: int = 5) -> None:
+    """
+    Downloads manifest rows of any conference, see :func:`download_row_batches`.
+    """
+    batches = {}
+    for row in rows:
+        batches.setdefault((row['conference'], row['year']), []).append(row)
+    download_row_batches(manifest, batches.values(), poolnum=poolnum, engine=engine, per_host=per_host,
+                         driverpath=driverpath, downtime=downtime)
+
+def download_row_batches(manifest: Manifest, batches: Iterable[List[sqlite3.Row]], poolnum: int = 8,
+                         engine: str = 'async', per_host: Optional[int] = None, driverpath: Optional[str] = None,
+                         downtime: int = 5, on_done: Optional[Callable[..., Any]] = None,
+                         admit: Optional[Callable[[sqlite3.Row], bool]] = None) -> None:
+    """
+    Downloads batches of manifest rows, each of one conference and year, as ``batches`` yields them.
+    Batches of venues that need a browser are handed to :func:`download_browser_rows` on the
+    side, all others go into one :func:`download_batches` stream.
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    browser_futures = []
+
+    def http_batches() -> Iterator[List[sqlite3.Row]]:
+        for rows in batches:
+            adapter = CONFERENCES.get(rows[0]['conference']) if rows else None
+            if adapter is not None and adapter.browser:
+                browser_futures.append(executor.submit(share_settings(download_browser_rows), manifest, rows,
+                                                       poolnum=poolnum, driverpath=driverpath, downtime=downtime,
+                                                       on_done=on_done, admit=admit))
+            else:
+                yield rows
+
+    try:
+        download_batches(manifest, http_batches(), poolnum=poolnum, engine=engine, per_host=per_host,
+                         on_done=on_done, admit=admit)
+        for future in browser_futures:
+            future.result()
+    finally:
+        executor.shutdown()
+
+def _link_known(manifest: Manifest, rows: List[sqlite3.Row],
+                on_done: Optional[Callable[..., Any]]) -> List[sqlite3.Row]:
+    remaining = manifest.link_known(rows)
+    if (on_done is not None or CrawlSettings.current().extractor is not None) and len(remaining) < len(rows):
+        left = {row['path'] for row in remaining}
+        for row in rows:
+            if row['path'] not in left:
+                _report(row, True, None, None, on_done)
+    return remaining
+
+def download_batches(manifest: Manifest, batches: Iterable[List[sqlite3.Row]], poolnum: int = 8,
+                     engine: str = 'async', per_host: Optional[int] = None,
+                     on_done: Optional[Callable[..., Any]] = None,
+                     admit: Optional[Callable[[sqlite3.Row], bool]] = None) -> None:
+    """
+    Downloads batches of manifest rows through one download stream and records
+    the outcome of each paper as soon as it is known.
+
+    Every batch holds the rows of one conference and year. ``batches`` may be a
+    generator that yields a batch whenever a conference has been crawled; the
+    downloads of earlier batches keep running meanwhile. Rows whose adapter
+    needs it are resolved to their PDF link on the way.
+
+    Args:
+        manifest (Manifest): Where the status of every paper is kept.
+        batches (Iterable[List[sqlite3.Row]]): The papers to download.
+        poolnum (int): The number of parallel downloads.
+        engine (str): The download engine, 'async' (default) or 'pool'.
+        per_host (Optional[int]): Connections per host for the 'async' engine. default: poolnum
+        on_done (Optional[Callable]): Called with (row, ok, seconds, error) once a paper is recorded.
+        admit (Optional[Callable]): Called with the row before its download is started; it may
+            block to hold the stream back, and returning False stops queueing new downloads.
+
+    Returns:
+        None
+    """
+    metrics = CrawlSettings.current().metrics
+    by_path, unresolved = {}, []
+
+    def items() -> Iterator[Tuple[str, str, str]]:
+        for rows in batches:
+            rows = _link_known(manifest, rows, on_done)
+            if not rows:
+                continue
+            for row in rows:
+                by_path[row['path']] = row
+            for path in {os.path.dirname(row['path']) for row in rows}:
+                os.makedirs(path, exist_ok=True)
+            conference = rows[0]['conference']
+            logger.info('Start dowloading {} papers of {} {}'.format(len(rows), conference, rows[0]['year']))
+            metrics.expect(len(rows))
+            batch = [(row['url'], row['path'], row['title']) for row in rows]
+            yield from resolve_papers(CONFERENCES.get(conference) or ConferenceAdapter(), batch, poolnum, unresolved)
+
+    def admitted(stream: Iterable[Tuple[str, str, str]]) -> Iterator[Tuple[str, str, str]]:
+        for item in stream:
+            if not admit(by_path[item[1]]):
+                return
+            yield item
+
+    def on_result(item: Tuple[str, str, str], ok: bool) -> None:
+        row = by_path[item[1]]
+        manifest.record(row['conference'], row['year'], row['paper_id'], item[0], item[1], ok)
+        seconds, error = metrics.outcome(item[1])
+        _report(row, ok, seconds, error, on_done)
+
+    stream = items()
+    scheduler = CrawlSettings.current().scheduler
+    if scheduler is not None:
+        # sizes are only known once every batch is listed, so the queue is planned as a whole
+        stream = scheduler.plan(stream, os.path.dirname(manifest.path), poolnum, per_host)
+    if admit is not None:
+        # admitted only once planned: the plan takes every item up front, and skipped ones never start
+        stream = admitted(stream)
+    taken, result = download_stream(stream, poolnum=poolnum, engine=engine, per_host=per_host,
+                                    on_result=on_result)
+    for item in unresolved:
+        metrics.paper(False, item[1], error='no PDF link found')
+        on_result(item, False)
+    error_num = result.count(False) + len(unresolved)
+    if error_num > 0:
+        logger.info('{} papers dowloading failed, run again with --retry-failed to retry them'.format(error_num))
+    else:
+        logger.info('Dowloading success')
+
+def retry_failed(savedir: Optional[str] = None, conference: Optional[str] = None, year: Optional[int] = None,
+                 poolnum: int = 8, engine: str = 'async', per_host: Optional[int] = None,
+                 driverpath: Optional[str] = None, downtime: int = 5) -> None:
+    """
+    Downloads again every paper the manifest in ``savedir`` lists as failed or pending,
+    without fetching any index page.
+    """
+    manifest = open_manifest(savedir)
+    try:
+        rows = manifest.missing(conference, year)
+        logger.info('{} papers to retry from {}'.format(len(rows), manifest.path))
+        download_rows(manifest, rows, poolnum=poolnum, engine=engine, per_host=per_host,
+                      driverpath=driverpath, downtime=downtime)
+    finally:
+        manifest.close()
+
+class KeywordMatcher:
+    """
+    Title filter compiled once per run from ``--keywords`` or a boolean ``--query``.
+
+    A query combines terms with AND, OR, NOT and parentheses; adjacent terms
+    are ANDed and "quoted phrases" match as a whole, so hyphenated terms like
+    "chain-of-thought" work. All terms are compiled into one case-insensitive
+    regex (a prefix trie, so the regex engine does not try every term at every
+    position) that rejects most titles in one scan over the lower-cased title;
+    only the rest is evaluated term by term.
+
+    Args:
+        query (str): The boolean query, e.g. 'retrieval AND (generative OR "dense passage") NOT survey'.
+        match (str): How a term matches: 'substring' (default), 'word' (whole words) or 'stem' (word prefix,
+            'retriev' matches 'retrieval' and 'retrieving').
+        abstracts (bool): Also match the abstract, where a venue lists one.
+    """
+
+    MODES = ('substring', 'word', 'stem')
+    _TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+
+    def __init__(self, query: str, match: str = 'substring', abstracts: bool = False):
+        if match not in self.MODES:
+            raise ValueError(f"Unknown match mode: {match}")
+        self.query = query
+        self.match = match
+        self.abstracts = abstracts
+        self.terms = []  # type: List[str]
+        self._tokens = self._tokenize(query)
+        self._tree = self._parse_or()
+        if self._tokens:
+            raise ValueError(f"Unexpected '{self._tokens[0][1]}' in query: {query}")
+        self._compiled = self._compile(self._tree)
+        positive = sorted(self._positive_terms(self._tree, True))
+        self._prefilter = None
+        if positive and self._requires(self._tree, True):
+            self._prefilter = re.compile(self._pattern([self.terms[i] for i in positive]))
+        self._any_of = self._tree[0] == 'term' or (self._tree[0] == 'or' and all(
+            node[0] == 'term' for node in self._tree[1]))
+
+    @classmethod
+    def from_keywords(cls, keywords: str, match: str = 'substring', abstracts: bool = False) -> 'KeywordMatcher':
+        """
+        The legacy ``--keywords`` form: any of the '-' separated keywords.
+        """
+        terms = [kw.strip() for kw in keywords.split('-') if kw.strip()]
+        return cls(' OR '.join('"{}"'.format(kw.replace('"', '')) for kw in terms), match=match, abstracts=abstracts)
+
+    @classmethod
+    def coerce(cls, keywords: Any) -> Optional['KeywordMatcher']:
+        """
+        Accepts a matcher, a legacy '-' separated keyword string or None (no filtering).
+        """
+        if keywords is None or isinstance(keywords, cls):
+            return keywords
+        return cls.from_keywords(keywords) if keywords.strip('- ') else None
+
+    def _tokenize(self, query: str) -> List[Tuple[str, str]]:
+        tokens, pos = [], 0
+        query = query.rstrip()
+        while pos < len(query):
+            found = self._TOKEN.match(query, pos)
+            if found is None:
+                raise ValueError(f"Unbalanced quote in query: {query}")
+            opening, closing, phrase, word = found.groups()
+            if opening or closing:
+                tokens.append((opening or closing, opening or closing))
+            elif phrase is not None:
+                tokens.append(('term', phrase))
+            elif word in ('AND', 'OR', 'NOT'):
+                tokens.append((word, word))
+            else:
+                tokens.append(('term', word))
+            pos = found.end()
+        return tokens
+
+    def _parse_or(self) -> Tuple:
+        nodes = [self._parse_and()]
+        while self._tokens and self._tokens[0][0] == 'OR':
+            self._tokens.pop(0)
+            nodes.append(self._parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def _parse_and(self) -> Tuple:
+        nodes = [self._parse_not()]
+        while self._tokens and self._tokens[0][0] not in ('OR', ')'):
+            if self._tokens[0][0] == 'AND':
+                self._tokens.pop(0)
+            nodes.append(self._parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def _parse_not(self) -> Tuple:
+        if self._tokens and self._tokens[0][0] == 'NOT':
+            self._tokens.pop(0)
+            return ('not', self._parse_not())
+        if not self._tokens:
+            raise ValueError(f"Incomplete query: {self.query}")
+        kind, value = self._tokens.pop(0)
+        if kind == '(':
+            node = self._parse_or()
+            if not self._tokens or self._tokens.pop(0)[0] != ')':
+                raise ValueError(f"Missing ')' in query: {self.query}")
+            return node
+        if kind != 'term' or not value.strip():
+            raise ValueError(f"Unexpected '{value}' in query: {self.query}")
+        term = ' '.join(value.lower().split())
+        if term not in self.terms:
+            self.terms.append(term)
+        return ('term', self.terms.index(term))
+
+    def _pattern(self, terms: List[str]) -> str:
+        pattern = self._trie(terms)
+        # lookarounds, not \b: a term may start or end with a non-word character ('c++', '.net')
+        if self.match == 'word':
+            return r'(?<!\w){}(?!\w)'.format(pattern)
+        if self.match == 'stem':
+            return r'(?<!\w)' + pattern
+        return pattern
+
+    @staticmethod
+    def _trie(terms: List[str]) -> str:
+        # 'model', 'models', 'modular' -> mod(?:el(?:s)?|ular)
+        root = {}
+        for term in terms:
+            node = root
+            for char in term:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        def build(node: Dict[str, Dict]) -> str:
+            branches = [(r'\s+' if char == ' ' else re.escape(char)) + build(child)
+                        for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            pattern = branches[0] if len(branches) == 1 else '(?:{})'.format('|'.join(branches))
+            return '(?:{})?'.format(pattern) if '' in node else pattern
+
+        return '(?:{})'.format(build(root))
+
+    def _positive_terms(self, node: Tuple, positive: bool) -> set:
+        if node[0] == 'term':
+            return {node[1]} if positive else set()
+        if node[0] == 'not':
+            return self._positive_terms(node[1], not positive)
+        return set().union(*(self._positive_terms(child, positive) for child in node[1]))
+
+    def _requires(self, node: Tuple, positive: bool) -> bool:
+        # True if ``node`` is false whenever none of its positive terms occurs
+        if node[0] == 'term':
+            return positive
+        if node[0] == 'not':
+            return self._requires(node[1], not positive)
+        if (node[0] == 'and') == positive:
+            return any(self._requires(child, positive) for child in node[1])
+        return all(self._requires(child, positive) for child in node[1])
+
+    def _compile(self, node: Tuple) -> Tuple:
+        # a term, or an OR of plain terms, becomes one regex
+        if node[0] == 'term':
+            return ('re', re.compile(self._pattern([self.terms[node[1]]])))
+        if node[0] == 'or' and all(child[0] == 'term' for child in node[1]):
+            return ('re', re.compile(self._pattern([self.terms[child[1]] for child in node[1]])))
+        if node[0] == 'not':
+            return ('not', self._compile(node[1]))
+        return (node[0], [self._compile(child) for child in node[1]])
+
+    def _evaluate(self, node: Tuple, text: str) -> bool:
+        kind = node[0]
+        if kind == 're':
+            return node[1].search(text) is not None
+        if kind == 'not':
+            return not self._evaluate(node[1], text)
+        if kind == 'and':
+            return all(self._evaluate(child, text) for child in node[1])
+        return any(self._evaluate(child, text) for child in node[1])
+
+    def matches(self, title: str, abstract: Optional[str] = None) -> bool:
+        """
+        Checks if the title (and, with ``abstracts``, the abstract) satisfies the query.
+        """
+        text = (title + '\n' + abstract if self.abstracts and abstract else title).lower()
+        if self._prefilter is not None and self._prefilter.search(text) is None:
+            return False
+        if self._any_of:
+            return True
+        return self._evaluate(self._compiled, text)
+
+    def __call__(self, title: str, abstract: Optional[str] = None) -> bool:
+        return self.matches(title, abstract)
+
+class Paper(NamedTuple):
+    """One entry of a venue's paper list; a plain (paper id, url, title, sub directory) tuple works too."""
+    paper_id: str
+    url: str
+    title: str
+    sub_dir: str = ''
+    abstract: str = ''
+    authors: str = ''
+
+class ConferenceAdapter:
+    """
+    Describes one venue: how to list its papers, where their PDFs are and how to name the files.
+
+    Everything else (caching, concurrency, retries, the manifest and reporting)
+    is done once for all venues by :func:`crawl_conferences`. A new venue only
+    implements :meth:`list_papers`, overrides whatever else differs, and is made
+    available to ``--conference`` with :func:`register_conference`.
+
+    Attributes:
+        name (str): The name used on the command line and in the manifest.
+        browser (bool): PDFs can only be fetched by a real browser, see :class:`BrowserPool`.
+        include_in_all (bool): Crawled by ``--conference all``.
+    """
+    name = ''
+    browser = False
+    include_in_all = True
+
+    def list_papers(self, year: int) -> List[Tuple[str, str, str, str]]:
+        """
+        Lists every paper of ``year`` as :class:`Paper` records or (paper id, url, title,
+        sub directory) tuples. The url may need :meth:`resolve_pdf_url` to point at the PDF.
+        """
+        raise NotImplementedError
+
+    def directory(self, year: int) -> str:
+        return f'{self.name}{year}'
+
+    def filename(self, year: int, paper_id: str, title: str) -> str:
+        return f'[{self.name}{year}] {title}.pdf'
+
+    def needs_resolving(self, url: str) -> bool:
+        return False
+
+    def resolve_pdf_url(self, url: str) -> str:
+        return url
+
+    def discover(self, year: int, keywords: Any = None, savedir: Optional[str] = None,
+                 index: Optional['Manifest'] = None) -> List[Tuple[str, str, str, str]]:
+        """
+        Lists the related papers of ``year`` as (paper id, url, path, title).
+        ``keywords`` is a '-' separated keyword string or a :class:`KeywordMatcher`.
+        With ``index``, every listed paper is catalogued there for ``search`` first.
+        """
+        if savedir is None:
+            savedir = os.getcwd()
+        savedir = os.path.join(os.path.abspath(savedir), self.directory(year))
+        matcher = KeywordMatcher.coerce(keywords)
+        papers = [Paper(*paper) for paper in self.list_papers(year)]
+        logger.info('{0} papers have been found in {1}'.format(len(papers), f'{self.name}{year}'))
+        paths = [os.path.join(savedir, paper.sub_dir, self.filename(year, paper.paper_id, paper.title))
+                 for paper in papers]
+        if index is not None:
+            index.catalog(self.name, year, [(paper.paper_id, paper.title, paper.authors, paper.abstract,
+                                             paper.url, path) for paper, path in zip(papers, paths)])
+        available_paper_list = []
+        for paper, savedfile in zip(papers, paths):
+            if matcher is None or matcher.matches(paper.title, paper.abstract):
+                available_paper_list.append((paper.paper_id, paper.url, savedfile, paper.title))
+        logger.info('Found {} papers related'.format(len(available_paper_list)))
+        return available_paper_list
+
+# every supported venue, keyed by its name on the command line and in the manifest
+CONFERENCES = {}  # type: Dict[str, ConferenceAdapter]
+
+def register_conference(adapter: ConferenceAdapter) -> ConferenceAdapter:
+    """
+    Makes ``adapter`` available under its name to --conference, crawl_conferences and the manifest.
+    """
+    CONFERENCES[adapter.name] = adapter
+    return adapter
+
+class ACLAnthologyAdapter(ConferenceAdapter):
+    """An ACL Anthology event, with one sub directory per volume (long, short, findings, ...)."""
+
+    def __init__(self, name: str, include_in_all: bool = True):
+        self.name = name
+        self.include_in_all = include_in_all
+
+    def directory(self, year: int) -> str:
+        return f'{self.name.upper()}{year}'
+
+    def filename(self, year: int, paper_id: str, title: str) -> str:
+        if 'W' in paper_id:
+            return '[{0}{1}WorkShop] {2}.pdf'.format(self.name, year, title)
+        return '[{0}{1}] {2}.pdf'.format(self.name, year, title)
+
+    def list_papers(self, year: int) -> List[Tuple[str, str, str, str]]:
+        url = f'https://www.aclanthology.org/events/{self.name}-{year}/'
+        categories = nlp_categories(self.name, year)
+        html = fetch_html(url, parse_only=SoupStrainer("div", {"id": categories}))
+        papers = []
+        for cat in categories:
+            items = html.find("div", {"id": cat}).findAll("p", {'class':'align-items-stretch'})
+            logger.info('{0} papers have been found in {1}'.format(len(items), cat))
+            for item in items:
+                info = item.findAll('a', {'class': 'align-middle'})[-1]
+                title, paper_info = info.text, info.attrs['href']
+                download_url = 'https://www.aclanthology.org{}.pdf'.format(paper_info[:-1])
+                authors = ', '.join(a.text for a in item.findAll('a', href=ACL_PEOPLE))
+                papers.append(Paper(paper_info.strip('/'), download_url, title, cat, authors=authors))
+        return papers
+
+class NeurIPSAdapter(ConferenceAdapter):
+    name = 'neurips'
+
+    def filename(self, year: int, paper_id: str, title: str) -> str:
+        return f'[Neurips{year}] {title}.pdf'
+
+    def list_papers(self, year: int) -> List[Tuple[str, str, str, str]]:
+        url = f'https://proceedings.neurips.cc/paper_files/paper/{year}'
+        html = fetch_html(url, parse_only=NEURIPS_TARGET)
+        papers = []
+        for item in html.find("ul", {"class": "paper-list"}).findAll("li"):
+            info = item.find("a")
+            title, paper_info = info.text, info.attrs["href"]
+            paper_id = paper_info.split('/')[-1].split('-')[0]
+            download_url = f'https://proceedings.neurips.cc/paper_files/paper/{year}/file/{paper_id}-Paper-Conference.pdf'
+            authors = item.find(["span", "i"], {"class": "paper-authors"}) or item.find("i")
+            papers.append(Paper(paper_id, download_url, title, authors=authors.text.strip() if authors else ''))
+        return papers
+
+# ICML proceedings are published as one PMLR volume per year
+PMLR_VOLUMES = {2017: 70, 2018: 80, 2019: 97, 2020: 119, 2021: 139, 2022: 162, 2023: 202, 2024: 235, 2025: 267}
+
+def list_pmlr_papers(volume: int) -> List[Tuple[str, str, str]]:
+    """
+    Lists (title, pdf url, authors) of every paper in a PMLR volume from its index page.
+    """
+    html = fetch_html(f'https://proceedings.mlr.press/v{volume}/', parse_only=PMLR_TARGET)
+    papers = []
+    for item in html.findAll("div", {"class": "paper"}):
+        title = item.find("p", {"class": "title"}).text.strip()
+        links = item.find("p", {"class": "links"}).findAll("a")
+        download_url = [ele for ele in links if "Download PDF" in ele.text][0].attrs["href"]
+        authors = item.find("span", {"class": "authors"})
+        papers.append((title, download_url, ' '.join(authors.text.split()) if authors else ''))
+    return papers
+
+def resolve_icml_pdf_url(detail_url: str) -> str:
+    """
+    Follows an icml.cc detail page to its PMLR page and returns the PDF link there.
+    """
+    sub_html = fetch_html(detail_url, parse_only=ICML_DETAIL_TARGET)
+    tmp_list = sub_html.find("div", {"class": "text-center"}).findAll("a")
+    paper_url = [ele for ele in tmp_list if "PDF" in ele.text][0].attrs["href"]
+    paper_html = fetch_html(paper_url, parse_only=PMLR_DETAIL_TARGET)
+    download_info = paper_html.find("div", {"id": "extras"}).findAll("li")
+    return [ele for ele in download_info if "Download PDF" in ele.text][0].find('a').attrs["href"]
+
+class ICMLAdapter(ConferenceAdapter):
+    """
+    Known years are listed from their PMLR volume index, which links every PDF
+    on one page. Other years (or an unreachable PMLR) fall back to the icml.cc
+    list, whose detail pages are resolved to the PDF while downloading.
+    """
+    name = 'icml'
+
+    def filename(self, year: int, paper_id: str, title: str) -> str:
+        return f'[ICML{year}] {title}.pdf'
+
+    def needs_resolving(self, url: str) -> bool:
+        return url.startswith('https://icml.cc/')
+
+    def resolve_pdf_url(self, url: str) -> str:
+        return resolve_icml_pdf_url(url)
+
+    def list_papers(self, year: int) -> List[Tuple[str, str, str, str]]:
+        papers = None
+        if year in PMLR_VOLUMES:
+            try:
+                papers = list_pmlr_papers(PMLR_VOLUMES[year])
+            except Exception as e:
+                logger.info('Listing PMLR volume {} failed ({}), falling back to icml.cc'.format(PMLR_VOLUMES[year], e))
+
+        if papers is None:
+            url = f'https://icml.cc/Downloads/{year}'
+            html = fetch_html(url, parse_only=ICML_TARGET)
+            items = html.find("div", {"class": "list_html"}).find("ul").findAll("li")
+            papers = [(item.find("a").text, "https://icml.cc{}".format(item.find("a").attrs["href"]), '')
+                      for item in items]
+
+        entries = []
+        for title, paper_url, authors in papers:
+            paper_id = paper_url.rstrip('/').split('/')[-1]
+            if paper_id.endswith('.pdf'):
+                paper_id = paper_id[:-len('.pdf')]
+            entries.append(Paper(paper_id, paper_url, title, authors=authors))
+        return entries
+
+# API 2 holds the venues from 2024 on, API 1 the older ones
+OPENREVIEW_APIS = ('https://api2.openreview.net', 'https://api.openreview.net')
+OPENREVIEW_PAGE_SIZE = 1000
+OPENREVIEW_FIELDS = 'id,forum,content.title,content.authors,content.abstract'
+
+def _openreview_value(field: Any) -> Any:
+    # API 2 wraps every content field as {"value": ...}, API 1 stores it as is
+    return field.get('value') if isinstance(field, dict) else field
+
+def list_openreview_notes(venueid: str, poolnum: int = 4) -> List[Dict[str, Any]]:
+    """
+    Lists the notes (accepted papers) of an OpenReview venue such as 'ICLR.cc/2024/Conference'.
+
+    The notes API is paged with offset/limit and asked only for the fields the
+    crawler keeps. The first page tells the total count, the remaining pages are
+    then fetched ``poolnum`` at a time. API 1 is tried when API 2 fails or knows no note.
+    """
+    error = None
+    for api in OPENREVIEW_APIS:
+        def page(offset: int) -> Dict[str, Any]:
+            query = urlencode({'content.venueid': venueid, 'select': OPENREVIEW_FIELDS, 'sort': 'number:asc',
+                               'limit': OPENREVIEW_PAGE_SIZE, 'offset': offset})
+            return json.loads(fetch_page(f'{api}/notes?{query}'))
+
+        try:
+            first = page(0)
+        except (IOError, ValueError) as e:
+            error = e
+            continue
+        notes = first.get('notes') or []
+        if not notes:
+            continue
+        if 'count' in first:
+            offsets = range(len(notes), first['count'], OPENREVIEW_PAGE_SIZE)
+            with ThreadPoolExecutor(max_workers=max(1, min(poolnum, len(offsets)))) as executor:
+                for result in executor.map(share_settings(share_recording(page)), offsets):
+                    notes += result.get('notes') or []
+        else:
+            while len(notes) % OPENREVIEW_PAGE_SIZE == 0:
+                more = page(len(notes)).get('notes') or []
+                if not more:
+                    break
+                notes += more
+        return notes
+    if error is not None:
+        raise error
+    return []
+
+def list_openreview_papers(venueid: str) -> List[Paper]:
+    papers = []
+    for note in list_openreview_notes(venueid):
+        content = note.get('content') or {}
+        title = (_openreview_value(content.get('title')) or '').strip()
+        forum = note.get('forum') or note.get('id')
+        if not title or not forum:
+            continue
+        authors = _openreview_value(content.get('authors')) or []
+        papers.append(Paper(forum, f'https://openreview.net/pdf?id={forum}', title,
+                            abstract=(_openreview_value(content.get('abstract')) or '').strip(),
+                            authors=', '.join(authors) if isinstance(authors, list) else str(authors)))
+    return papers
+
+class ICLRAdapter(ConferenceAdapter):
+    """
+    Accepted papers are listed in bulk from the OpenReview API, abstracts included.
+    The iclr.cc schedule page is scraped when the API is unreachable or knows no paper of the year.
+    """
+    name = 'iclr'
+
+    def list_papers(self, year: int) -> List[Tuple[str, str, str, str]]:
+        try:
+            papers = list_openreview_papers(f'ICLR.cc/{year}/Conference')
+            if papers:
+                return papers
+            logger.info('OpenReview lists no paper of ICLR {}, falling back to the schedule page'.format(year))
+        except Exception as e:
+            logger.info('Listing ICLR {} from OpenReview failed ({}), falling back to the schedule page'.format(year, e))
+        return self.list_schedule(year)
+
+    def list_schedule(self, year: int) -> List[Tuple[str, str, str, str]]:
+        url = f'https://iclr.cc/Conferences/{year}/Schedule'
+        html = fetch_html(url, parse_only=ICLR_TARGET)
+        papers = []
+        for item in html.findAll("div", {"onclick": True}):
+            try:
+                title = item.find("div", {"class": "maincardBody"}).text.strip()
+            except Exception as e:
+                continue
+            if "Workshop" in item.text: continue
+            openreview_url = [ele for ele in item.findAll('a') if "OpenReview" in ele.text][0].attrs["href"]  # https://openreview.net/forum?id=QUaDoIdgo0
+            paper_id = openreview_url.split("?")[-1].strip()
+            download_url = f"https://openreview.net/pdf?{paper_id}"
+            authors = item.find("div", {"class": "maincardFooter"})
+            authors = ', '.join(name.strip() for name in authors.text.split('\u00b7')) if authors else ''
+            papers.append(Paper(paper_id.split('=')[-1], download_url, title, authors=authors))
+        return papers
+
+def resolve_papers(adapter: ConferenceAdapter, pending: List[Tuple[str, str, str]], poolnum: int = 8,
+                   unresolved: Optional[List[Tuple[str, str, str]]] = None) -> Iterator[Tuple[str, str, str]]:
     """
-    Checks if the title contains any of the keywords.
-    
+    Resolves (url, savepath, title) entries on ``poolnum`` threads and yields
+    (download url, savepath, title) in completion order, so the download stage
+    can start before every detail page has been fetched. Entries that already
+    point at a PDF are yielded first, as they are.
+
     Args:
-        title (str): The title to check.
-        keywords (List[str]): The list of keywords to search for.
-        
+        adapter (ConferenceAdapter): The venue the entries belong to.
+        pending (List[Tuple[str, str, str]]): The entries to download.
+        poolnum (int): The number of detail pages fetched at the same time.
+        unresolved (Optional[List]): Entries whose PDF link could not be found are appended here.
+    """
+    detail = [item for item in pending if adapter.needs_resolving(item[0])]
+    yield from (item for item in pending if not adapter.needs_resolving(item[0]))
+    if not detail:
+        return
+    @share_settings
+    def resolve(url: str) -> str:
+        with CrawlSettings.current().metrics.timer('resolve_seconds'):
+            return adapter.resolve_pdf_url(url)
+
+    with ThreadPoolExecutor(max_workers=poolnum) as executor:
+        futures = {executor.submit(resolve, item[0]): item for item in detail}
+        try:
+            for future in as_completed(futures):
+                detail_url, savedfile, title = futures[future]
+                try:
+                    url = future.result()
+                except Exception as e:
+                    logger.info("Resolving paper '{}' failed: {}".format(title, e))
+                    if unresolved is not None:
+                        unresolved.append((detail_url, savedfile, title))
+                    continue
+                yield (url, savedfile, title)
+        finally:
+            # the consumer stopped early: do not resolve what it will not download
+            for future in futures:
+                future.cancel()
+
+BROWSER_PARTIAL_SUFFIXES = ('.crdownload', '.tmp', '.part')
+
+def wait_for_download(directory: str, stall: float, poll: float = 0.1) -> str:
+    """
+    Waits for the browser to finish a download into an empty ``directory``.
+
+    Returns as soon as a complete file is there instead of sleeping a fixed time.
+    While Chrome's .crdownload file keeps growing the wait goes on; it gives up
+    once nothing has appeared or changed for ``stall`` seconds.
+
     Returns:
-        bool: True if the title contains any of the keywords, False otherwise.
+        str: The path of the downloaded file.
     """
-    title = title.lower()
-    return any(kw.lower() in title for kw in keywords)
+    last_change, last_seen = time.monotonic(), None
+    while True:
+        names = os.listdir(directory)
+        done = [name for name in names if not name.endswith(BROWSER_PARTIAL_SUFFIXES)]
+        if done and len(done) == len(names):
+            return os.path.join(directory, done[0])
+        seen = [(name, os.path.getsize(os.path.join(directory, name)))
+                for name in names if os.path.exists(os.path.join(directory, name))]
+        if seen != last_seen:
+            last_change, last_seen = time.monotonic(), seen
+        elif time.monotonic() - last_change > stall:
+            raise TimeoutError('No download progress for {}s in {}'.format(stall, directory))
+        time.sleep(poll)
 
-def download_nlp_paper(conference: str, year: int, keywords: Optional[str] = None,
-                       savedir: Optional[str] = None, poolnum: int = 8) -> None:
+class BrowserPool:
     """
-    Downloads papers from the ACL Anthology website based on the conference and year.
-    
+    A bounded pool of reusable headless Chrome sessions for downloads that need a browser.
+
+    Every session has its own download directory, so concurrent downloads never
+    mix up their files. Sessions are started lazily, at most ``size`` of them, and
+    a session that crashed is replaced on the next request.
+
     Args:
-        conference (str): The conference name (e.g., 'ACL', 'EMNLP', 'NAACL').
-        year (int): The year of the conference.
-        keywords (Optional[str]): Keywords to filter papers by title. such as 'summarization-dialog'
-        savedir (Optional[str]): Directory to save the downloaded papers. default: current path
-        poolnum (int): The number of parallel download threads.
-        
-    Returns:
-        None
+        size (int): The maximum number of browser sessions.
+        downloaddir (str): Directory holding one download directory per session.
+        driverpath (Optional[str]): The path of chrome driver. default: chromedriver from PATH
+        headless (bool): Run Chrome without a window.
     """
-    conference = conference.lower()
-    if savedir is None:
-        savedir = os.getcwd()
-    savedir = os.path.join(os.path.abspath(savedir), f'{conference.upper()}{year}')
-    if not os.path.isdir(savedir):
-        os.makedirs(savedir)
-    url = f'https://www.aclanthology.org/events/{conference}-{year}/'
-    html = fetch_html(url)
-    keywords = keywords.split('-') if keywords else None
-    
-    if "acl" in conference:
-        categories = [f"{year}{conference}-long", f"{year}{conference}-short", 
-                    f"{year}findings-{conference}"]
-    else:
-        categories = [f"{year}{conference}-main",  f"{year}findings-{conference}"]
 
-    related_paper_num = 0
-    available_paper_list = []
-    for cat in categories:
-        
-        items = html.find("div", {"id": cat}).findAll("p", {'class':'align-items-stretch'})
-        logging.info('{0} papers have been found in {1}'.format(len(items), cat))
-        sub_dir = os.path.join(savedir, cat)
-        if not os.path.isdir(sub_dir):
-            os.mkdir(sub_dir)
-        for item in items:
-            info = item.findAll('a', {'class': 'align-middle'})[-1]
-            title, paper_info = info.text, info.attrs['href']
-            download_url = 'https://www.aclanthology.org{}.pdf'.format(paper_info[:-1])
-    
-            if not keywords or is_related(title, keywords):
-                related_paper_num += 1
-                if 'W' in paper_info:
-                    filename = '[{0}{1}WorkShop] {2}.pdf'.format(conference, year, title)
-                else:
-                    filename = '[{0}{1}] {2}.pdf'.format(conference, year, title)
-                savedfile = os.path.join(sub_dir, filename)
-                if not os.path.exists(savedfile):
-                    available_paper_list.append((download_url, savedfile, title))
-    logging.info('Found {} papers related'.format(related_paper_num))
-    logging.info('Start dowloading')
-
-    with Pool(poolnum) as pool:
-        status = [pool.apply_async(download, args=(item[0], item[1], item[2])) for item in available_paper_list]
-        result = [res.get() for res in status]
-        
-    error_num, error_item = 0, []
-    for res, item in zip(result, available_paper_list):
-        if not res:
-            error_num += 1
-            error_item.append(item)
+    def __init__(self, size: int, downloaddir: str, driverpath: Optional[str] = None, headless: bool = True):
+        self.size = max(1, size)
+        self.downloaddir = downloaddir
+        self.driverpath = driverpath
+        self.headless = headless
+        self._idle = []  # type: List[Tuple[Any, str, int]]
+        self._free_slots = list(range(self.size))
+        self._cond = threading.Condition()
 
-    if error_num > 0:
-        with open(os.path.join(savedir, 'error_id.txt'), 'w', encoding='utf-8') as file:
-            for item in error_item:
-                file.write('\t'.join(item) + '\n')
-                logging.info('{} papers dowloading failed, see error_id.txt for details'.format(error_num))
+    def _start(self, slot: int) -> Tuple[Any, str, int]:
+        if webdriver is None:
+            raise RuntimeError('download ACM paper need selenium...')
+        directory = os.path.join(self.downloaddir, 'browser{}'.format(slot))
+        os.makedirs(directory, exist_ok=True)
+        options = Options()
+        if self.headless:
+            options.add_argument('--headless=new')
+        options.add_experimental_option("prefs", {
+            "download.default_directory": directory,
+            "download.prompt_for_download": False,
+            "plugins.always_open_pdf_externally": True
+        })
+        try:
+            from selenium.webdriver.chrome.service import Service
+        except ImportError:  # selenium 3
+            return webdriver.Chrome(self.driverpath, options=options), directory, slot
+        service = Service(self.driverpath) if self.driverpath else Service()
+        return webdriver.Chrome(service=service, options=options), directory, slot
+
+    def _acquire(self) -> Tuple[Any, str, int]:
+        with self._cond:
+            while not self._idle and not self._free_slots:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            slot = self._free_slots.pop()
+        try:
+            return self._start(slot)
+        except BaseException:
+            with self._cond:
+                self._free_slots.append(slot)
+                self._cond.notify()
+            raise
+
+    def _release(self, session: Tuple[Any, str, int], broken: bool = False) -> None:
+        with self._cond:
+            if broken:
+                try:
+                    session[0].quit()
+                except Exception:
+                    pass
+                self._free_slots.append(session[2])
+            else:
+                self._idle.append(session)
+            self._cond.notify()
+
+    def download(self, url: str, savepath: str, stall: float) -> None:
+        """
+        Lets a browser session fetch ``url`` and moves the file to ``savepath`` once it is complete.
+        """
+        session = self._acquire()
+        driver, directory, _ = session
+        broken = False
+        try:
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+            driver.get(url)
+            finalize_download(wait_for_download(directory, stall), savepath, None)
+        except Exception as e:
+            # a stuck or crashed browser is replaced, a finished file that is no PDF is not its fault
+            broken = isinstance(e, TimeoutError) or not isinstance(e, OSError)
+            raise
+        finally:
+            self._release(session, broken)
+
+    def close(self) -> None:
+        with self._cond:
+            while self._idle:
+                self._idle.pop()[0].quit()
+
+ACM_PDF_URL = 'https://dl.acm.org/doi/pdf/{}'
+ACM_FORMATS_TARGET = SoupStrainer("div", {"class": "info-panel__formats"})
+
+def resolve_sigir_pdf_url(doi_url: str) -> str:
+    """
+    Turns the DOI link of a SIGIR paper into the URL of its PDF on the ACM Digital Library.
+
+    ACM serves every PDF at /doi/pdf/<doi>, so a DOI link needs no request at all.
+    Other links are fetched over plain HTTP and the PDF link is read from the page.
+    """
+    parts = urlsplit(doi_url)
+    path = parts.path.lstrip('/')
+    for prefix in ('doi/abs/', 'doi/pdf/', 'doi/'):
+        if parts.netloc.endswith('dl.acm.org') and path.startswith(prefix):
+            path = path[len(prefix):]
+            break
     else:
-        logging.info('Dowloading success'.format(error_num))
-    return
+        if not parts.netloc.endswith('doi.org'):
+            path = ''
+    if path.startswith('10.'):
+        return ACM_PDF_URL.format(path)
+    html = fetch_html(doi_url, parse_only=ACM_FORMATS_TARGET)
+    link = html.find("a", href=True)
+    if link is None:
+        raise IOError('No PDF link on {}'.format(doi_url))
+    return urljoin(doi_url, link.attrs["href"])
 
-def download_neurips_paper(year: int, keywords: Optional[str] = None,
-                           savedir: Optional[str] = None, poolnum: int = 8) -> None:
+class SIGIRAdapter(ConferenceAdapter):
     """
-    Downloads papers from the neurips website based on the year.
-    
-    Args:
-        year (int): The year of the conference.
-        keywords (Optional[str]): Keywords to filter papers by title. such as 'summarization-dialog'
-        savedir (Optional[str]): Directory to save the downloaded papers. default: current path
-        poolnum (int): The number of parallel download threads.
-        
-    Returns:
-        None
+    SIGIR lists DOI links, whose PDFs on the ACM Digital Library only a real browser gets.
     """
-    if savedir is None:
-        savedir = os.getcwd()
-    savedir = os.path.join(os.path.abspath(savedir), f'neurips{year}')
-    if not os.path.isdir(savedir):
-        os.makedirs(savedir)
-    url = f'https://proceedings.neurips.cc/paper_files/paper/{year}'
-    html = fetch_html(url)
-    keywords = keywords.split('-') if keywords else None
+    name = 'sigir'
+    browser = True
 
-    
-    available_paper_list = []
-    items = html.find("ul", {"class": "paper-list"}).findAll("li")
-    logging.info('{0} papers have been found in {1}'.format(len(items), f"neurips{year}"))
-    related_paper_num = 0
-    for item in items:
-        info = item.find("a")
-        title, paper_info = info.text, info.attrs["href"]
-        paper_id = paper_info.split('/')[-1].split('-')[0]
-        download_url = f'https://proceedings.neurips.cc/paper_files/paper/{year}/file/{paper_id}-Paper-Conference.pdf'
-        if not keywords or is_related(title, keywords):
-            related_paper_num += 1
-            filename = f'[Neurips{year}] {title}.pdf'
-            savedfile = os.path.join(savedir, filename)
-            if not os.path.exists(savedfile):
-                available_paper_list.append((download_url, savedfile, title))
-    logging.info('Found {} papers related'.format(related_paper_num))
-    logging.info('Start dowloading')
-    
-    with Pool(poolnum) as pool:
-        status = [pool.apply_async(download, args=(item[0], item[1], item[2])) for item in available_paper_list]
-        result = [res.get() for res in status]
-        
-    error_num, error_item = 0, []
-    for res, item in zip(result, available_paper_list):
-        if not res:
-            error_num += 1
-            error_item.append(item)
+    def list_papers(self, year: int) -> List[Tuple[str, str, str, str]]:
+        url = f'https://sigir.org/sigir{year}/program/proceedings/'
+        html = fetch_html(url, parse_only=SIGIR_TARGET)
+        papers = []
+        for item in html.find("div", {"id": "DLcontent"}).findAll("h3"):
+            item_info = item.find('a')
+            doi_url = item_info.attrs["href"]
+            paper_id = doi_url.split('doi.org/')[-1].split('/doi/')[-1]
+            authors, abstract = [], ''
+            # authors and abstract follow the title as siblings, up to the next paper
+            for sibling in item.next_siblings:
+                if sibling.name == 'h3':
+                    break
+                classes = (sibling.get('class') or []) if sibling.name else []
+                if 'DLauthors' in classes:
+                    authors = [li.text.strip() for li in sibling.findAll('li')]
+                elif 'DLabstract' in classes:
+                    abstract = ' '.join(sibling.text.split())
+            papers.append(Paper(paper_id, doi_url, item_info.text.strip(), abstract=abstract,
+                                authors=', '.join(authors)))
+        return papers
 
-    if error_num > 0:
-        with open(os.path.join(savedir, 'error_id.txt'), 'w', encoding='utf-8') as file:
-            for item in error_item:
-                file.write('\t'.join(item) + '\n')
-                logging.info('{} papers dowloading failed, see error_id.txt for details'.format(error_num))
-    else:
-        logging.info('Dowloading success'.format(error_num))
-    return
+    def needs_resolving(self, url: str) -> bool:
+        return True
 
-def download_icml_paper(year: int, keywords: Optional[str] = None,
-                        savedir: Optional[str] = None, poolnum: int = 8) -> None:
+    def resolve_pdf_url(self, url: str) -> str:
+        return resolve_sigir_pdf_url(url)
+
+for _adapter in (ACLAnthologyAdapter('acl'), ACLAnthologyAdapter('emnlp'), ACLAnthologyAdapter('naacl'),
+                 ACLAnthologyAdapter('eacl', include_in_all=False), NeurIPSAdapter(), ICMLAdapter(),
+                 ICLRAdapter(), SIGIRAdapter()):
+    register_conference(_adapter)
+
+def download_browser_rows(manifest: Manifest, rows: List[sqlite3.Row], poolnum: int = 8,
+                          driverpath: Optional[str] = None, downtime: int = 5,
+                          on_done: Optional[Callable[..., Any]] = None,
+                          admit: Optional[Callable[[sqlite3.Row], bool]] = None) -> None:
     """
-    Downloads papers from the icml website based on the year.
-    
+    Downloads the manifest rows of one conference and year whose adapter needs a browser.
+
+    The PDF URLs are resolved without the browser, only the PDF itself is
+    fetched by a pool of ``poolnum`` headless Chrome sessions.
+
     Args:
-        year (int): The year of the conference.
-        keywords (Optional[str]): Keywords to filter papers by title. such as 'summarization-dialog'
-        savedir (Optional[str]): Directory to save the downloaded papers. default: current path
-        poolnum (int): The number of parallel download threads.
-        
+        manifest (Manifest): Where the status of every paper is kept.
+        rows (List[sqlite3.Row]): The papers to download.
+        poolnum (int): The number of browser sessions downloading in parallel.
+        driverpath (Optional[str]): The path of chrome driver.
+        downtime (int): seconds a download may go without progress before it is given up
+        on_done (Optional[Callable]): See :func:`download_batches`.
+        admit (Optional[Callable]): See :func:`download_batches`.
+
     Returns:
         None
     """
-    if savedir is None:
-        savedir = os.getcwd()
-    savedir = os.path.join(os.path.abspath(savedir), f'icml{year}')
-    if not os.path.isdir(savedir):
-        os.makedirs(savedir)
-    url = f'https://icml.cc/Downloads/{year}'
-    html = fetch_html(url)
-    keywords = keywords.split('-') if keywords else None
+    rows = _link_known(manifest, rows, on_done)
+    if not rows:
+        return
+    conference, year = rows[0]['conference'], rows[0]['year']
+    adapter = CONFERENCES[conference]
+    for path in {os.path.dirname(row['path']) for row in rows}:
+        os.makedirs(path, exist_ok=True)
+    logger.info('Start dowloading {} papers of {} {}'.format(len(rows), conference, year))
+    metrics = CrawlSettings.current().metrics
+    metrics.expect(len(rows))
+    downloaddir = os.path.join(os.path.dirname(manifest.path), '.browser', f'{conference}{year}')
+    browsers = BrowserPool(min(poolnum, len(rows)), downloaddir, driverpath)
 
-    
-    available_paper_list = []
-    items = html.find("div", {"class": "list_html"}).find("ul").findAll("li")
-    logging.info('{0} papers have been found in {1}'.format(len(items), f"icml{year}"))
-    related_paper_num = 0
-    for item in items:
-        info = item.find("a")
-        title = info.text
-        if not keywords or is_related(title, keywords):
-            related_paper_num += 1
-            filename = f'[ICML{year}] {title}.pdf'
-            suffix_url = info.attrs["href"]
-            sub_url = f"https://icml.cc{suffix_url}"
-            sub_html = fetch_html(sub_url)
-            tmp_list = sub_html.find("div", {"class": "text-center"}).findAll("a")
-            paper_url = [ele for ele in tmp_list if "PDF" in ele.text][0].attrs["href"]
-            paper_html = fetch_html(paper_url)
-            download_info = paper_html.find("div", {"id": "extras"}).findAll("li")
-            download_url = [ele for ele in download_info if "Download PDF" in ele.text][0].find('a').attrs["href"]
-            savedfile = os.path.join(savedir, filename)
-            if not os.path.exists(savedfile):
-                available_paper_list.append((download_url, savedfile, title))
-    logging.info('Found {} papers related'.format(related_paper_num))
-    logging.info('Start dowloading')
-    
-    with Pool(poolnum) as pool:
-        status = [pool.apply_async(download, args=(item[0], item[1], item[2])) for item in available_paper_list]
-        result = [res.get() for res in status]
-        
-    error_num, error_item = 0, []
-    for res, item in zip(result, available_paper_list):
-        if not res:
-            error_num += 1
-            error_item.append(item)
+    @share_settings
+    def fetch(row: sqlite3.Row) -> Optional[bool]:
+        if admit is not None and not admit(row):
+            return None
+        try:
+            with metrics.timer('resolve_seconds'):
+                url = adapter.resolve_pdf_url(row['url'])
+            start = time.perf_counter()
+            browsers.download(url, row['path'], downtime)
+            logger.info("Saved paper '{}'".format(row['title']))
+        except Exception as e:
+            logger.info("Dowload failed for paper '{}': {}".format(row['title'], e))
+            metrics.paper(False, row['path'], error=str(e))
+            return False
+        metrics.paper(True, row['path'], time.perf_counter() - start)
+        return True
 
+    error_num = 0
+    try:
+        with ThreadPoolExecutor(max_workers=browsers.size) as executor:
+            futures = {executor.submit(fetch, row): row for row in rows}
+            for future in as_completed(futures):
+                row, ok = futures[future], future.result()
+                if ok is None:
+                    continue
+                error_num += not ok
+                manifest.record(conference, year, row['paper_id'], row['url'], row['path'], ok)
+                seconds, error = metrics.outcome(row['path'])
+                _report(row, ok, seconds, error, on_done)
+    finally:
+        browsers.close()
     if error_num > 0:
-        with open(os.path.join(savedir, 'error_id.txt'), 'w', encoding='utf-8') as file:
-            for item in error_item:
-                file.write('\t'.join(item) + '\n')
-                logging.info('{} papers dowloading failed, see error_id.txt for details'.format(error_num))
-    else:
-        logging.info('Dowloading success'.format(error_num))
-    return
+        logger.info('{} papers dowloading failed, run again with --retry-failed to retry them'.format(error_num))
 
-def download_iclr_paper(year: int, keywords: Optional[str] = None,
-                        savedir: Optional[str] = None, poolnum: int = 8) -> None:
+def download_nlp_paper(conference: str, year: int, keywords: Optional[str] = None,
+                       savedir: Optional[str] = None, poolnum: int = 8,
+                       engine: str = 'async', per_host: Optional[int] = None) -> None:
     """
-    Downloads papers from the iclr website based on the year.
-    
+    Downloads papers from the ACL Anthology website based on the conference and year.
+
     Args:
+        conference (str): The conference name (e.g., 'ACL', 'EMNLP', 'NAACL').
         year (int): The year of the conference.
         keywords (Optional[str]): Keywords to filter papers by title. such as 'summarization-dialog'
         savedir (Optional[str]): Directory to save the downloaded papers. default: current path
         poolnum (int): The number of parallel download threads.
-        
+        engine (str): The download engine, 'async' (default) or 'pool'.
+        per_host (Optional[int]): Connections per host for the 'async' engine. default: poolnum
+
     Returns:
         None
     """
-    conference = "iclr"
-    if savedir is None:
-        savedir = os.getcwd()
-    savedir = os.path.join(os.path.abspath(savedir), f'{conference}{year}')
-    if not os.path.isdir(savedir):
-        os.makedirs(savedir)
-    url = f'https://iclr.cc/Conferences/{year}/Schedule'
-    html = fetch_html(url)
-    keywords = keywords.split('-') if keywords else None
+    crawl_conferences([conference.lower()], [year], keywords, savedir, poolnum, engine=engine, per_host=per_host)
 
-    
-    available_paper_list = []
-    items = html.find("div", {"class": "row"}).findAll("div", {"onclick": True})
-    logging.info('{0} papers have been found in {1}'.format(len(items), f"{conference}{year}"))
-    related_paper_num = 0
-    for item in items:
-        try:
-            title = item.find("div", {"class": "maincardBody"}).text.strip()
-        except Exception as e:
-            continue
-        if "Workshop" in item.text: continue
-        if not keywords or is_related(title, keywords):
-            related_paper_num += 1
-            
-            filename = f'[{conference}{year}] {title}.pdf'
-            openreview_url = [ele for ele in item.findAll('a') if "OpenReview" in ele.text][0].attrs["href"]  # https://openreview.net/forum?id=QUaDoIdgo0
-            paper_id = openreview_url.split("?")[-1].strip()
-            download_url = f"https://openreview.net/pdf?{paper_id}"
-            savedfile = os.path.join(savedir, filename)
-            if not os.path.exists(savedfile):
-                available_paper_list.append((download_url, savedfile, title))
-    logging.info('Found {} papers related'.format(related_paper_num))
-    logging.info('Start dowloading')
-    
-    with Pool(poolnum) as pool:
-        status = [pool.apply_async(download, args=(item[0], item[1], item[2])) for item in available_paper_list]
-        result = [res.get() for res in status]
-        
-    error_num, error_item = 0, []
-    for res, item in zip(result, available_paper_list):
-        if not res:
-            error_num += 1
-            error_item.append(item)
+def download_neurips_paper(year: int, keywords: Optional[str] = None,
+                           savedir: Optional[str] = None, poolnum: int = 8,
+                           engine: str = 'async', per_host: Optional[int] = None) -> None:
+    """
+    Downloads papers from the neurips website based on the year, see :func:`download_nlp_paper`.
+    """
+    crawl_conferences(['neurips'], [year], keywords, savedir, poolnum, engine=engine, per_host=per_host)
 
-    if error_num > 0:
-        with open(os.path.join(savedir, 'error_id.txt'), 'w', encoding='utf-8') as file:
-            for item in error_item:
-                file.write('\t'.join(item) + '\n')
-                logging.info('{} papers dowloading failed, see error_id.txt for details'.format(error_num))
-    else:
-        logging.info('Dowloading success'.format(error_num))
-    return
+def download_icml_paper(year: int, keywords: Optional[str] = None,
+                        savedir: Optional[str] = None, poolnum: int = 8,
+                        engine: str = 'async', per_host: Optional[int] = None) -> None:
+    """
+    Downloads papers from the icml website based on the year, see :func:`download_nlp_paper`.
+    """
+    crawl_conferences(['icml'], [year], keywords, savedir, poolnum, engine=engine, per_host=per_host)
+
+def download_iclr_paper(year: int, keywords: Optional[str] = None,
+                        savedir: Optional[str] = None, poolnum: int = 8,
+                        engine: str = 'async', per_host: Optional[int] = None) -> None:
+    """
+    Downloads papers from the iclr website based on the year, see :func:`download_nlp_paper`.
+    """
+    crawl_conferences(['iclr'], [year], keywords, savedir, poolnum, engine=engine, per_host=per_host)
 
 def download_sigir_paper(year: int, keywords: Optional[str] = None,
                          savedir: Optional[str] = None, poolnum: int = 8,
                          driverpath: str=None, downtime: int=3) -> None:
     """
     Downloads papers from the sigir website based on the year.
-    
+
+    PDF URLs are derived from the DOI links without loading any page, and only
+    the PDF itself is fetched by a pool of ``poolnum`` headless browsers.
+
     Args:
         year (int): The year of the conference.
         keywords (Optional[str]): Keywords to filter papers by title. such as 'summarization-dialog'
         savedir (Optional[str]): Directory to save the downloaded papers. default: current path
-        poolnum (int): The number of parallel download threads.
-        downtime (int): time waiting for downloading paper
-        
+        poolnum (int): The number of browser sessions downloading in parallel.
+        driverpath (Optional[str]): The path of chrome driver.
+        downtime (int): seconds a download may go without progress before it is given up
+
     Returns:
         None
     """
-    driver = webdriver.Chrome(driverpath)
-
-    
-    conference = "sigir"
-    if savedir is None:
-        savedir = os.getcwd()
-    savedir = os.path.join(os.path.abspath(savedir), f'{conference}{year}')
-    if not os.path.isdir(savedir):
-        os.makedirs(savedir)
-    # 配置Chrome的下载选项
-    chrome_options = Options()
-    chrome_options.add_experimental_option("prefs", {
-        "download.default_directory": savedir,
-        "download.prompt_for_download": False,
-        "plugins.always_open_pdf_externally": True
-    })
-    # 启动浏览器
-    pdf_download_driver = webdriver.Chrome(driverpath, options=chrome_options)
-    url = f'https://sigir.org/sigir{year}/program/proceedings/'
-    html = fetch_html(url)
-    keywords = keywords.split('-') if keywords else None
-
-    available_paper_list = []
-    items = html.find("div", {"id": "DLcontent"}).findAll("h3")
-    logging.info('{0} papers have been found in {1}'.format(len(items), f"{conference}{year}"))
-    related_paper_num = 0
-    for item in items:
-        item_info = item.find('a')
-        title = item_info.text.strip()
-        if not keywords or is_related(title, keywords):
-            related_paper_num += 1
-            
-            filename = f'[{conference}{year}] {title}.pdf'
-            doi_url = item_info.attrs["href"]
-            doi_html = fetch_html_by_driver(doi_url, driver)
-            download_icon = doi_html.find("div", {"class": "info-panel__formats info-panel__item"}).findAll("a")[0]
-            download_url = download_icon.attrs["href"]
-            paper_id =download_url.split('/')[-1]
-            file_name = paper_id + '.pdf' if '.pdf' not in paper_id else paper_id
-            try:
-                pdf_download_driver.get(download_url)
-                time.sleep(downtime)
-                original_file_path = os.path.join(savedir, file_name)
-                os.rename(original_file_path, os.path.join(savedir, filename))
-                logging.info("Saved paper '{}'".format(title))
-            except Exception as e:
-                logging.info("Dowload failed for paper '{}'".format(title))
-
-    logging.info('Found {} papers related'.format(related_paper_num))
-    logging.info('Start dowloading')
-    
-    driver.quit()
-    pdf_download_driver.quit()
-    return
+    crawl_conferences(['sigir'], [year], keywords, savedir, poolnum, driverpath=driverpath, downtime=downtime)
 
-def download_papers(conference: str, year: int, keywords: Optional[str], savedir: str, 
-                    poolnum: int, driverpath: Optional[str] = None, downtime: Optional[int] = None) -> None:
+def download_papers(conference: str, year: int, keywords: Optional[str], savedir: str,
+                    poolnum: int, driverpath: Optional[str] = None, downtime: Optional[int] = None,
+                    engine: str = 'async', per_host: Optional[int] = None, incremental: bool = False) -> None:
     """
     根据会议类型下载相应的论文。
 
-    :param conference: 会议名称 (例如 'acl', 'neurips', 'icml', 'iclr', 'sigir')
+    :param conference: 会议名称, CONFERENCES 中注册的任意会议 (例如 'acl', 'neurips', 'icml', 'iclr', 'sigir')
     :param year: 会议年份
-    :param keywords: 用于筛选论文的关键字
+    :param keywords: 用于筛选论文的关键字, 以 - 分隔的字符串或 KeywordMatcher
     :param savedir: 保存文件的目录
     :param poolnum: 线程池数目
     :param driverpath: 下载 SIGIR 会议论文时需要的浏览器驱动路径 (仅适用于 'sigir')
-    :param downtime: 每次下载之间的等待时间 (仅适用于 'sigir')
+    :param downtime: 浏览器下载无进展时的最长等待时间 (仅适用于 'sigir')
+    :param engine: 下载引擎, 'async' 或 'pool' (不适用于 'sigir')
+    :param per_host: 'async' 引擎下每个网站的最大连接数
+    :param incremental: 只下载上次增量抓取之后新增或变化的论文
     :return: None
     """
     try:
-        if conference in ['acl', 'emnlp', 'naacl', 'eacl']:  # 处理 NLP 相关的会议
-            print(f"downloading paper in {conference} {year}...")
-            download_nlp_paper(conference=conference, year=year, 
-                            keywords=keywords, savedir=savedir, poolnum=poolnum)
-        elif 'neurips' in conference:
-            print(f"downloading paper in {conference} {year}...")
-            download_neurips_paper(year=year, keywords=keywords, savedir=savedir, poolnum=poolnum)
-        elif 'icml' in conference:
-            print(f"downloading paper in {conference} {year}...")
-            download_icml_paper(year=year, keywords=keywords, savedir=savedir, poolnum=poolnum)
-        elif 'iclr' in conference:
-            print(f"downloading paper in {conference} {year}...")
-            download_iclr_paper(year=year, keywords=keywords, savedir=savedir, poolnum=poolnum)
-        elif 'sigir' in conference:
-            print(f"downloading paper in {conference} {year}...")
-            download_sigir_paper(year=year, keywords=keywords, savedir=savedir, poolnum=poolnum, 
-                                driverpath=driverpath, downtime=downtime)
-        else:
+        if conference not in CONFERENCES:
             raise ValueError(f"Unsupported conference: {conference}")
+        print(f"downloading paper in {conference} {year}...")
+        crawl_conferences([conference], [year], keywords, savedir, poolnum, driverpath=driverpath,
+                          downtime=downtime, engine=engine, per_host=per_host, incremental=incremental)
     except Exception:
-        logging.info(f"downloading {conference} {year} failed, please check it's availablity...")
+        logger.info(f"downloading {conference} {year} failed, please check it's availablity...")
+
+def discover_changes(adapter: ConferenceAdapter, year: int, keywords: Optional[KeywordMatcher],
+                     savedir: Optional[str], manifest: Manifest) -> List[sqlite3.Row]:
+    """
+    Incremental discovery: returns the papers that are new or whose listing changed
+    since the last incremental crawl of this conference and year, and the listed ones
+    an earlier run left pending or failed (skipped over budget, interrupted, failed).
+
+    The snapshot of the last crawl holds the hash of every index page and a
+    fingerprint (url and title) of every related paper. When all pages come back
+    unchanged, which with the page cache is a 304 each, nothing is parsed at all.
+
+    Args:
+        adapter (ConferenceAdapter): The venue to crawl.
+        year (int): The year of the conference.
+        keywords (Optional[KeywordMatcher]): The title filter; changing it invalidates the snapshot.
+        savedir (Optional[str]): Directory to save the downloaded papers. default: current path
+        manifest (Manifest): Holds the snapshots, the catalogue and the status of every paper.
+
+    Returns:
+        List[sqlite3.Row]: The manifest rows to download.
+    """
+    conference = adapter.name
+    filter_key = '' if keywords is None else repr((keywords.query, keywords.match, keywords.abstracts))
+    snapshot = manifest.snapshot(conference, year)
+    with recording_pages(revalidate=True) as pages:
+        if snapshot is not None and snapshot[0] == filter_key and snapshot[1]:
+            try:
+                for url in snapshot[1]:
+                    fetch_page(url)
+            except Exception as e:
+                logger.info('Checking {} {} for changes failed ({}), crawling it again'.format(conference, year, e))
+            else:
+                if pages == snapshot[1]:
+                    rows = [row for row in manifest.missing(conference, year) if row['paper_id'] in snapshot[2]]
+                    logger.info('{} {} is unchanged since the last crawl, {} papers still to download'.format(
+                        conference, year, len(rows)))
+                    return rows
+        # pages fetched by the check above are reused, not requested again
+        entries = adapter.discover(year, keywords, savedir, manifest)
+    fingerprints = {paper_id: hashlib.sha1('{}\0{}'.format(url, title).encode('utf-8')).hexdigest()
+                    for paper_id, url, _, title in entries}
+    known = snapshot[2] if snapshot is not None else {}
+    changed = {paper_id for paper_id, fingerprint in fingerprints.items() if known.get(paper_id) != fingerprint}
+    updated = [paper_id for paper_id in changed if paper_id in known]
+    manifest.register(conference, year, entries)
+    manifest.requeue(conference, year, updated)
+    # still listed, so papers of another filter or dropped from the listing stay out
+    rows = [row for row in manifest.missing(conference, year) if row['paper_id'] in fingerprints]
+    manifest.save_snapshot(conference, year, filter_key, pages, fingerprints)
+    logger.info('{} new and {} updated papers in {} {}, {} still to download from earlier runs'.format(
+        len(changed) - len(updated), len(updated), conference, year,
+        sum(row['paper_id'] not in changed for row in rows)))
+    return rows
+
+def crawl_conferences(conferences: List[str], years: List[int], keywords: Any, savedir: Optional[str],
+                      poolnum: int, driverpath: Optional[str] = None, downtime: Optional[int] = None,
+                      engine: str = 'async', per_host: Optional[int] = None, incremental: bool = False,
+                      on_done: Optional[Callable[..., Any]] = None,
+                      admit: Optional[Callable[[sqlite3.Row], bool]] = None) -> None:
+    """
+    Crawls several conferences and years at once under one concurrency budget.
+
+    The index pages of every (conference, year) are fetched and filtered
+    concurrently. Each finished listing is queued into a single download stream
+    with at most ``poolnum`` transfers in flight overall and ``per_host``
+    connections per host, so e.g. aclanthology.org and openreview.net are
+    downloaded from side by side. Venues that need a browser get their own
+    pool of browser sessions.
+
+    Args:
+        conferences (List[str]): The conferences to crawl, see CONFERENCES.
+        years (List[int]): The years to crawl for each conference.
+        keywords (Any): Keywords to filter papers by title, such as 'summarization-dialog', or a KeywordMatcher.
+        savedir (Optional[str]): Directory to save the downloaded papers. default: current path
+        poolnum (int): The number of downloads in flight over all conferences.
+        driverpath (Optional[str]): The path of chrome driver (only for browser venues like 'sigir').
+        downtime (Optional[int]): seconds a browser download may stall (only for browser venues).
+        engine (str): The download engine, 'async' (default) or 'pool'.
+        per_host (Optional[int]): Connections per host for the 'async' engine. default: poolnum
+        incremental (bool): Only queue papers added or changed since the last incremental crawl,
+            see :func:`discover_changes`.
+        on_done (Optional[Callable]): See :func:`download_batches`.
+        admit (Optional[Callable]): See :func:`download_batches`.
+
+    Returns:
+        None
+    """
+    manifest = open_manifest(savedir)
+    try:
+        batches = discover_rows(manifest, conferences, years, keywords, savedir, poolnum, incremental)
+        download_row_batches(manifest, batches, poolnum=poolnum, engine=engine, per_host=per_host,
+                             driverpath=driverpath, downtime=downtime or 5, on_done=on_done, admit=admit)
+    finally:
+        manifest.close()
+
+def discover_rows(manifest: Manifest, conferences: List[str], years: List[int], keywords: Any = None,
+                  savedir: Optional[str] = None, poolnum: int = 8, incremental: bool = False,
+                  queued: bool = True) -> Iterator[List[sqlite3.Row]]:
+    """
+    Lists every (conference, year) on ``poolnum`` threads and yields the manifest rows
+    of each listing as soon as it is done, with the catalogued authors and abstract.
+
+    Args:
+        manifest (Manifest): Where the listed papers are registered.
+        conferences (List[str]): The conferences to list, see CONFERENCES.
+        years (List[int]): The years to list for each conference.
+        keywords (Any): Keywords to filter papers by title, or a KeywordMatcher.
+        savedir (Optional[str]): Directory the papers are saved to. default: current path
+        poolnum (int): The number of listings fetched at the same time.
+        incremental (bool): Only yield papers added or changed since the last incremental crawl.
+        queued (bool): Only yield papers not downloaded yet; otherwise every related paper.
+    """
+    for conf in conferences:
+        if conf not in CONFERENCES:
+            logger.info(f"Unsupported conference: {conf}")
+    jobs = [(conf, year) for year in years for conf in conferences if conf in CONFERENCES]
+    keywords = KeywordMatcher.coerce(keywords)
+    with ThreadPoolExecutor(max_workers=max(1, min(poolnum, len(jobs)))) as executor:
+        if incremental:
+            futures = {executor.submit(share_settings(discover_changes), CONFERENCES[conf], year, keywords, savedir,
+                                       manifest): (conf, year) for conf, year in jobs}
+        else:
+            futures = {executor.submit(share_settings(CONFERENCES[conf].discover), year, keywords, savedir, manifest):
+                       (conf, year) for conf, year in jobs}
+        try:
+            for future in as_completed(futures):
+                conf, year = futures[future]
+                try:
+                    result = future.result()
+                except Exception:
+                    logger.info(f"downloading {conf} {year} failed, please check it's availablity...")
+                    continue
+                if incremental:
+                    paper_ids = [row['paper_id'] for row in result]
+                elif queued:
+                    paper_ids = [row['paper_id'] for row in missing_rows(manifest, conf, year, result)]
+                else:
+                    manifest.register(conf, year, result)
+                    paper_ids = [entry[0] for entry in result]
+                yield manifest.papers(conf, year, paper_ids)
+        finally:
+            for future in futures:
+                future.cancel()
 
 # 处理 'all' 会议情况
-def process_all_conferences(year: int, keywords: Optional[str], savedir: str, 
-                            poolnum: int, driverpath: Optional[str], downtime: Optional[int]) -> None:
+def process_all_conferences(year: Any, keywords: Optional[str], savedir: str,
+                            poolnum: int, driverpath: Optional[str], downtime: Optional[int],
+                            engine: str = 'async', per_host: Optional[int] = None, incremental: bool = False) -> None:
     """
-    处理 'all' 情况，下载所有支持的会议的论文。
+    处理 'all' 情况，下载所有支持的会议的论文。所有会议同时抓取，共享同一个下载队列。
 
-    :param year: 会议年份
+    :param year: 会议年份, 可以是多个年份的列表
     :param keywords: 用于筛选论文的关键字
     :param savedir: 保存文件的目录
-    :param poolnum: 线程池数目
+    :param poolnum: 所有会议合计的并发下载数
     :param driverpath: 下载 SIGIR 会议论文时需要的浏览器驱动路径
-    :param downtime: 每次下载之间的等待时间
+    :param downtime: 浏览器下载无进展时的最长等待时间
+    :param engine: 下载引擎, 'async' 或 'pool'
+    :param per_host: 'async' 引擎下每个网站的最大连接数
+    :param incremental: 只下载上次增量抓取之后新增或变化的论文
     :return: None
     """
-    for conf in ['acl', 'emnlp', 'naacl', 'neurips', 'icml', 'iclr', 'sigir']:
+    years = year if isinstance(year, (list, tuple)) else [year]
+    crawl_conferences([name for name, adapter in CONFERENCES.items() if adapter.include_in_all], years,
+                      keywords=keywords, savedir=savedir, poolnum=poolnum, driverpath=driverpath,
+                      downtime=downtime, engine=engine, per_host=per_host, incremental=incremental)
+
+class PaperRecord(NamedTuple):
+    """A listed paper with the path it is saved to and its status in the manifest ('pending', 'done' or 'failed')."""
+    conference: str
+    year: int
+    paper_id: str
+    title: str
+    url: str
+    path: str
+    status: str
+    authors: str = ''
+    abstract: str = ''
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'PaperRecord':
+        keys = row.keys()
+        return cls(row['conference'], row['year'], row['paper_id'], row['title'], row['url'], row['path'],
+                   row['status'], (row['authors'] if 'authors' in keys else None) or '',
+                   (row['abstract'] if 'abstract' in keys else None) or '')
+
+class DownloadEvent(NamedTuple):
+    """The outcome of one paper of a :class:`CrawlJob`; ``seconds`` is None for papers linked from the blob store."""
+    paper: PaperRecord
+    ok: bool
+    path: str
+    bytes: int
+    seconds: Optional[float]
+    error: Optional[str]
+
+def _as_list(value: Any) -> List[Any]:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+def iter_papers(conferences: Any, years: Any, keywords: Any = None, savedir: Optional[str] = None,
+                poolnum: int = 8, incremental: bool = False, queued: bool = False) -> Iterator[PaperRecord]:
+    """
+    Lists papers without downloading them, yielding each listing as soon as it is fetched.
+
+    Every paper is registered in the manifest of ``savedir`` and catalogued for
+    ``search``, so the records can be passed to :func:`submit_downloads` as they come.
+
+    Args:
+        conferences (Any): A conference name or a list of them, see CONFERENCES.
+        years (Any): A year or a list of years.
+        keywords (Any): Keywords to filter papers by title, such as 'summarization-dialog', or a KeywordMatcher.
+        savedir (Optional[str]): Directory the papers are saved to. default: current path
+        poolnum (int): The number of listings fetched at the same time.
+        incremental (bool): Only yield papers added or changed since the last incremental crawl.
+        queued (bool): Only yield papers not downloaded yet.
+
+    Yields:
+        PaperRecord: The related papers, one listing after the other.
+    """
+    manifest = open_manifest(savedir)
+    try:
+        for rows in discover_rows(manifest, [conf.lower() for conf in _as_list(conferences)], _as_list(years),
+                                  keywords, savedir, poolnum, incremental, queued):
+            for row in rows:
+                yield PaperRecord.from_row(row)
+    finally:
+        manifest.close()
+
+class CrawlJob:
+    """
+    Handle of downloads running on a background thread, see :func:`submit_downloads` and :func:`submit_crawl`.
+
+    Every queued paper has a Future in :attr:`futures`, keyed by its path, which
+    resolves to its :class:`DownloadEvent`. Papers are added while the job runs, so
+    iterate :meth:`futures_snapshot` instead of the dict itself. The same events can be taken in
+    completion order with ``for event in job`` or ``async for event in job``.
+    Papers the job never got to (cancelled, or left out by the download budget)
+    have their Future cancelled once the job is done.
+
+    With ``max_pending``, at most that many papers are started and not yet taken
+    from the iterator, so a slow consumer holds the downloads back instead of
+    letting events pile up. Such a job has to be iterated to make progress.
+
+    Args:
+        run (Callable[[CrawlJob], None]): Does the work, reporting to :meth:`_track`, :meth:`_admit` and :meth:`_on_done`.
+        max_pending (Optional[int]): Papers started but not yet taken from the iterator.
+        settings (Optional[CrawlSettings]): What the job runs with, e.g. its own metrics.
+            default: the process settings as they are when the job is created
+    """
+
+    def __init__(self, run: Callable[['CrawlJob'], None], max_pending: Optional[int] = None,
+                 settings: Optional[CrawlSettings] = None):
+        self.futures = {}  # type: Dict[str, Future]
+        self.max_pending = max_pending
+        self.settings = settings or CrawlSettings.current()
+        self._cond = threading.Condition()
+        self._events = collections.deque()
+        self._admitted = set()
+        self._pending = 0
+        self._cancelled = False
+        self._finished = False
+        self._error = None  # type: Optional[BaseException]
+        self._thread = threading.Thread(target=self._run, args=(run,), name='papercrawl-job', daemon=True)
+        self._thread.start()
+
+    def _run(self, run: Callable[['CrawlJob'], None]) -> None:
+        try:
+            with _using_settings(self.settings):
+                run(self)
+        except BaseException as e:
+            logger.info('Crawl job failed: {}'.format(e))
+            self._error = e
+        finally:
+            for future in self.futures_snapshot().values():
+                future.cancel()
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    def _track(self, rows: List[sqlite3.Row]) -> List[sqlite3.Row]:
+        with self._cond:
+            for row in rows:
+                self.futures.setdefault(row['path'], Future())
+        return rows
+
+    def futures_snapshot(self) -> Dict[str, Future]:
+        """
+        A copy of :attr:`futures` as it is now, safe to iterate while the job queues more papers.
+        """
+        with self._cond:
+            return dict(self.futures)
+
+    def _admit(self, row: sqlite3.Row) -> bool:
+        with self._cond:
+            while not self._cancelled and self.max_pending is not None and self._pending >= self.max_pending:
+                self._cond.wait()
+            if self._cancelled:
+                return False
+            self._pending += 1
+            self._admitted.add(row['path'])
+            return True
+
+    def _on_done(self, row: sqlite3.Row, ok: bool, seconds: Optional[float], error: Optional[str]) -> None:
+        path = row['path']
+        size = os.path.getsize(path) if ok and os.path.exists(path) else 0
+        event = DownloadEvent(PaperRecord.from_row(row)._replace(status='done' if ok else 'failed'),
+                              ok, path, size, seconds, error)
+        with self._cond:
+            if path in self._admitted:
+                self._admitted.discard(path)
+            else:
+                self._pending += 1
+            self._events.append(event)
+            self._cond.notify_all()
+            future = self.futures.get(path)
+        if future is not None and not future.done():
+            future.set_result(event)
+
+    def next_event(self, timeout: Optional[float] = None) -> Optional[DownloadEvent]:
+        """
+        Takes the next finished paper, waiting up to ``timeout`` seconds (forever by default).
+        Returns None once every paper is taken, or on timeout; the error the job failed with is raised.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._events or self._finished, timeout):
+                return None
+            if self._events:
+                self._pending -= 1
+                self._cond.notify_all()
+                return self._events.popleft()
+        if self._error is not None:
+            raise self._error
+        return None
+
+    def __iter__(self) -> Iterator[DownloadEvent]:
+        while True:
+            event = self.next_event()
+            if event is None:
+                return
+            yield event
+
+    async def _aiter(self) -> Any:
+        loop = asyncio.get_event_loop()
+        while True:
+            event = await loop.run_in_executor(None, self.next_event)
+            if event is None:
+                return
+            yield event
+
+    def __aiter__(self) -> Any:
+        return self._aiter()
+
+    def cancel(self) -> None:
+        """
+        Starts no more downloads; the ones in flight still finish and are reported.
+        """
+        with self._cond:
+            self._cancelled = True
+            self._cond.notify_all()
+
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def done(self) -> bool:
+        return self._finished
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits for the job to finish, returns whether it has.
+        """
+        self._thread.join(timeout)
+        return self._finished
+
+    def result(self, timeout: Optional[float] = None) -> List[DownloadEvent]:
+        """
+        Waits for the job and returns the event of every paper it finished, raising the error the job failed with.
+        """
+        if not self.wait(timeout):
+            raise TimeoutError('crawl job still running')
+        if self._error is not None:
+            raise self._error
+        return [future.result() for future in self.futures_snapshot().values() if not future.cancelled()]
+
+    def __enter__(self) -> 'CrawlJob':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.cancel()
+        self.wait()
+
+def submit_downloads(records: Iterable[PaperRecord], savedir: Optional[str] = None, poolnum: int = 8,
+                     engine: str = 'async', per_host: Optional[int] = None, driverpath: Optional[str] = None,
+                     downtime: int = 5, max_pending: Optional[int] = None,
+                     settings: Optional[CrawlSettings] = None) -> CrawlJob:
+    """
+    Downloads ``records`` on a background thread and returns at once.
+
+    ``records`` may be a generator such as :func:`iter_papers`; consecutive records
+    of the same conference and year are queued together. Papers already downloaded
+    are reported as done without a request.
+
+    Args:
+        records (Iterable[PaperRecord]): The papers to download.
+        savedir (Optional[str]): Directory whose manifest the papers are recorded in. default: current path
+        poolnum (int): The number of downloads in flight.
+        engine (str): The download engine, 'async' (default) or 'pool'.
+        per_host (Optional[int]): Connections per host for the 'async' engine. default: poolnum
+        driverpath (Optional[str]): The path of chrome driver (only for browser venues like 'sigir').
+        downtime (int): seconds a browser download may stall (only for browser venues).
+        max_pending (Optional[int]): Back-pressure, see :class:`CrawlJob`.
+        settings (Optional[CrawlSettings]): What the job runs with, see :func:`submit_crawl`.
+
+    Returns:
+        CrawlJob: The handle of the downloads.
+    """
+    def run(job: CrawlJob) -> None:
+        manifest = open_manifest(savedir)
+
+        def batches() -> Iterator[List[sqlite3.Row]]:
+            for (conference, year), group in itertools.groupby(records, key=lambda record: record[:2]):
+                if job.cancelled():
+                    return
+                group = list(group)
+                manifest.register(conference, year, [(record.paper_id, record.url, record.path, record.title)
+                                                     for record in group])
+                rows = job._track(manifest.papers(conference, year, [record.paper_id for record in group]))
+                queued = []
+                for row in rows:
+                    if row['status'] == 'done' and os.path.exists(row['path']):
+                        job._on_done(row, True, None, None)
+                    else:
+                        queued.append(row)
+                yield queued
+
         try:
-            download_papers(conference=conf, year=year, keywords=keywords, 
-                            savedir=savedir, poolnum=poolnum, 
-                            driverpath=driverpath, downtime=downtime)
-        except Exception as e:
-            logging.info(f"downloading {conf} {year} failed, please check it's availablity...")
+            download_row_batches(manifest, batches(), poolnum=poolnum, engine=engine, per_host=per_host,
+                                 driverpath=driverpath, downtime=downtime, on_done=job._on_done, admit=job._admit)
+        finally:
+            manifest.close()
+    return CrawlJob(run, max_pending, settings)
+
+def submit_crawl(conferences: Any, years: Any, keywords: Any = None, savedir: Optional[str] = None,
+                 poolnum: int = 8, engine: str = 'async', per_host: Optional[int] = None,
+                 driverpath: Optional[str] = None, downtime: int = 5, incremental: bool = False,
+                 max_pending: Optional[int] = None, settings: Optional[CrawlSettings] = None) -> CrawlJob:
+    """
+    Runs :func:`crawl_conferences` on a background thread and returns at once.
+
+    The Futures of a listing's papers appear in :attr:`CrawlJob.futures` as soon as
+    the listing is fetched, and its papers start downloading right away.
+
+    Args:
+        conferences (Any): A conference name or a list of them, see CONFERENCES.
+        years (Any): A year or a list of years.
+        max_pending (Optional[int]): Back-pressure, see :class:`CrawlJob`.
+        settings (Optional[CrawlSettings]): The metrics, byte budget, rate limits, cache and
+            extractor of this job. default: the process ones
+        others: See :func:`crawl_conferences`.
+
+    Returns:
+        CrawlJob: The handle of the crawl.
+    """
+    def run(job: CrawlJob) -> None:
+        manifest = open_manifest(savedir)
+
+        def batches() -> Iterator[List[sqlite3.Row]]:
+            for rows in discover_rows(manifest, [conf.lower() for conf in _as_list(conferences)], _as_list(years),
+                                      keywords, savedir, poolnum, incremental):
+                if job.cancelled():
+                    return
+                yield job._track(rows)
+
+        try:
+            download_row_batches(manifest, batches(), poolnum=poolnum, engine=engine, per_host=per_host,
+                                 driverpath=driverpath, downtime=downtime, on_done=job._on_done, admit=job._admit)
+        finally:
+            manifest.close()
+    return CrawlJob(run, max_pending, settings)
+
+def search(argv: List[str]) -> None:
+    """
+    ``papercrawl.py search QUERY``: searches the metadata catalogued by earlier crawls,
+    without touching the network, and optionally downloads the results.
+    """
+    parser = argparse.ArgumentParser(prog='papercrawl.py search',
+                                     description='Search the papers catalogued by earlier crawls')
+    parser.add_argument('query', nargs='+', help='words, "phrases", prefix*, AND/OR/NOT (SQLite FTS5 syntax)')
+    parser.add_argument('--conference', type=str.lower, default=None, help='only this conference')
+    parser.add_argument('--year', type=int, default=None, help='only this year')
+    parser.add_argument('--limit', type=int, default=20, help='number of results')
+    parser.add_argument('--savedir', type=str, default=None, help='dir the crawls saved to')
+    parser.add_argument('--download', action='store_true', help='download the results that are not downloaded yet')
+    parser.add_argument('--poolnum', type=int, default=8, help='parallel downloads')
+    parser.add_argument('--engine', type=str, default='async', choices=['async', 'pool'], help='download engine')
+    parser.add_argument('--per-host', type=int, default=None, help='connections per host for --engine async')
+    parser.add_argument('--driver', type=str, default=None, help='the path of chrome driver')
+    parser.add_argument('--time', type=int, default=5, help='seconds a browser download may stall before it is given up')
+    args = parser.parse_args(argv)
+
+    manifest = open_manifest(args.savedir)
+    try:
+        start = time.perf_counter()
+        rows = manifest.search(' '.join(args.query), args.conference, args.year, args.limit)
+        elapsed = time.perf_counter() - start
+        for rank, row in enumerate(rows, 1):
+            status = {'done': 'downloaded', 'failed': 'failed'}.get(row['status'], '')
+            print('{:3d}. [{}{}] {}{}'.format(rank, row['conference'], row['year'], row['title'],
+                                              '  ({})'.format(status) if status else ''))
+            if row['authors']:
+                print('     ' + row['authors'])
+        print('{} results in {:.1f} ms'.format(len(rows), elapsed * 1000))
+        if args.download and rows:
+            batches = {}
+            for row in rows:
+                if row['status'] != 'done':
+                    batches.setdefault((row['conference'], row['year']), []).append(
+                        (row['paper_id'], row['url'], row['path'], row['title']))
+            pending = []
+            for (conference, year), entries in batches.items():
+                pending += missing_rows(manifest, conference, year, entries)
+            download_rows(manifest, pending, poolnum=args.poolnum, engine=args.engine, per_host=args.per_host,
+                          driverpath=args.driver, downtime=args.time)
+    finally:
+        manifest.close()
+
+def dedupe(argv: List[str]) -> None:
+    """
+    ``papercrawl.py dedupe``: folds the PDFs already under a savedir into the blob store,
+    so every distinct paper is kept on disk once.
+    """
+    parser = argparse.ArgumentParser(prog='papercrawl.py dedupe',
+                                     description='Keep every distinct PDF under a savedir once, by content')
+    parser.add_argument('--savedir', type=str, default=None, help='dir the crawls saved to')
+    parser.add_argument('--dry-run', action='store_true', help='only report the duplicates')
+    args = parser.parse_args(argv)
+
+    savedir = os.path.abspath(args.savedir or os.getcwd())
+    manifest = open_manifest(savedir)
+    store = BlobStore(os.path.join(savedir, BLOB_DIR))
+    seen, files, duplicates, saved = set(), 0, 0, 0
+    try:
+        with manifest._lock:
+            urls = {}
+            for row in manifest.conn.execute("SELECT url, path FROM papers WHERE status = 'done'"):
+                urls.setdefault(row['path'], set()).add(row['url'])
+        for root, dirs, names in os.walk(savedir):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for name in names:
+                path = os.path.join(root, name)
+                if not name.endswith('.pdf') or os.path.islink(path):
+                    continue
+                files += 1
+                size, sha256 = os.path.getsize(path), file_sha256(path)
+                if args.dry_run:
+                    # the same answer store.ingest gives: a file linked to its blob already is no duplicate
+                    if store.has(sha256) and os.path.samefile(store.path(sha256), path):
+                        duplicate = False
+                    else:
+                        duplicate = sha256 in seen or store.has(sha256)
+                        seen.add(sha256)
+                else:
+                    duplicate = store.ingest(path, sha256)[1]
+                    if urls.get(path):
+                        manifest.remember(urls[path], sha256, size)
+                if duplicate:
+                    duplicates += 1
+                    saved += size
+                    logger.info('Duplicate {}'.format(os.path.relpath(path, savedir)))
+    finally:
+        manifest.close()
+    print('{} PDFs, {} duplicates, {:.1f} MB {}'.format(
+        files, duplicates, saved / 1024 / 1024, 'to save' if args.dry_run else 'saved'))
+
+def validate(argv: List[str]) -> None:
+    """
+    ``papercrawl.py validate``: finds the files under a savedir that are saved as .pdf
+    but are not PDFs, such as HTML error pages, and optionally queues them again.
+    """
+    parser = argparse.ArgumentParser(prog='papercrawl.py validate',
+                                     description='Flag saved papers that are not PDFs')
+    parser.add_argument('--savedir', type=str, default=None, help='dir the crawls saved to')
+    parser.add_argument('--requeue', action='store_true',
+                        help='remove them and mark them failed, for --retry-failed to download again')
+    args = parser.parse_args(argv)
+
+    savedir = os.path.abspath(args.savedir or os.getcwd())
+    manifest = open_manifest(savedir)
+    files, bad = 0, 0
+    try:
+        with manifest._lock:
+            rows = {row['path']: row for row in manifest.conn.execute("SELECT * FROM papers WHERE status = 'done'")}
+        for root, dirs, names in os.walk(savedir):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for name in names:
+                path = os.path.join(root, name)
+                if not name.endswith('.pdf'):
+                    continue
+                files += 1
+                problem = validate_pdf(path)
+                if problem is None:
+                    continue
+                bad += 1
+                row = rows.get(path)
+                print('{}: {}'.format(os.path.relpath(path, savedir), problem))
+                if not args.requeue:
+                    continue
+                sha256 = file_sha256(path)
+                os.remove(path)
+                if row is not None:
+                    manifest.reject(row['conference'], row['year'], row['paper_id'], sha256)
+    finally:
+        manifest.close()
+    print('{} files checked, {} not PDFs{}'.format(files, bad, ', removed and marked failed' if args.requeue and bad else ''))
 
 def main():
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1 and sys.argv[1] == 'search':
+        return search(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'dedupe':
+        return dedupe(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'validate':
+        return validate(sys.argv[2:])
+
     # 创建 ArgumentParser 对象
     parser = argparse.ArgumentParser(description='PaperCrawler')
 
     # 添加命令行参数
-    parser.add_argument('--conference', type=str, help='name of AI conference, including acl* icml, iclr, neurips, sigir')  # 必选参数
-    parser.add_argument('--year', type=int, help='the year of publication') 
+    parser.add_argument('--conference', type=str.lower, choices=sorted(CONFERENCES) + ['all'], help='name of AI conference, or all')  # 必选参数
+    parser.add_argument('--year', type=int, nargs='+', help='the year(s) of publication')
     parser.add_argument('--keywords', type=str, help='only keep the papar contained the keywords (concatenated by -)')
+    parser.add_argument('--query', type=str, default=None, help='boolean title filter instead of --keywords, e.g. \'retrieval AND (generative OR "dense passage") NOT survey\'')
+    parser.add_argument('--match', type=str, default='substring', choices=KeywordMatcher.MODES, help='how --keywords/--query terms match: anywhere, whole words, or word prefixes')
+    parser.add_argument('--match-abstracts', action='store_true', help='match --keywords/--query against the abstract too, where a venue lists one')
     parser.add_argument('--savedir', type=str, default=None, help='dir to save paper')
-    parser.add_argument('--poolnum', type=int, default=8, help='multi thread')
+    parser.add_argument('--poolnum', type=int, default=8, help='parallel downloads (processes for --engine pool, requests in flight for --engine async)')
+    parser.add_argument('--engine', type=str, default='async', choices=['async', 'pool'], help='download engine')
+    parser.add_argument('--per-host', type=int, default=None, help='connections per host for --engine async (default: poolnum)')
     parser.add_argument('--driver', type=str, default=None, help='the path of chrome driver')
-    parser.add_argument('--time', type=int, default=5, help='time to wait for each download')
+    parser.add_argument('--time', type=int, default=5, help='seconds a browser download may stall before it is given up')
+    parser.add_argument('--rate', type=float, default=5, help='initial requests per second to each host, adapted to 429/503 answers (0: no limit)')
+    parser.add_argument('--max-rate', type=float, default=100, help='requests per second per host the limiter may grow to')
+    parser.add_argument('--max-retries', type=int, default=4, help='retries for throttled, failed or dropped requests')
+    parser.add_argument('--incremental', action='store_true', help='only download papers added or changed since the last --incremental run, skip unchanged index pages')
+    parser.add_argument('--retry-failed', action='store_true', help='only retry the papers the manifest lists as failed, without crawling')
+    parser.add_argument('--buffer-size', type=int, default=64, help='KB written to disk per chunk while downloading')
+    parser.add_argument('--parser', type=str, default=None, help='BeautifulSoup parser (default: lxml if installed, else html.parser)')
+    parser.add_argument('--cache-dir', type=str, default=None, help='dir to cache index/detail pages (default: <savedir>/.papercrawl_cache)')
+    parser.add_argument('--cache-ttl', type=float, default=24, help='hours a cached page is used without revalidating it')
+    parser.add_argument('--cache-max-mb', type=float, default=1024, help='evict least recently used pages beyond this size')
+    parser.add_argument('--no-cache', action='store_true', help='always fetch pages from the network')
+    parser.add_argument('--offline', action='store_true', help='serve pages only from the cache')
+    parser.add_argument('--order', type=str, default='discovery', choices=DownloadScheduler.ORDERS, help='download queue order; smallest/largest first HEAD every PDF for its size beforehand')
+    parser.add_argument('--max-bytes', type=parse_size, default=None, help='download at most this much, e.g. 20G; papers beyond it are skipped and stay pending')
+    parser.add_argument('--min-free', type=parse_size, default=None, help='space to leave free on the disk, e.g. 5G; papers that do not fit are skipped')
+    parser.add_argument('--max-bandwidth', type=float, default=None, help='cap the download bandwidth at this many MB/s')
+    parser.add_argument('--no-blob-store', action='store_true', help='save papers as plain files instead of links into the content-addressed store')
+    parser.add_argument('--extract', type=str, default=None, help='extract the text of every saved paper into a sharded corpus in this dir (needs pypdf or pdfminer.six)')
+    parser.add_argument('--extract-workers', type=int, default=None, help='text extraction processes (default: one per CPU)')
+    parser.add_argument('--extract-format', type=str, default='jsonl', choices=CorpusWriter.FORMATS, help='corpus shards as gzipped JSON lines or Parquet (needs pyarrow)')
+    parser.add_argument('--shard-size', type=int, default=1000, help='papers per corpus shard')
+    parser.add_argument('--summary', type=str, default=None, help='write per-stage timings, request and byte counts as JSON to this file (- for stdout)')
+    parser.add_argument('--prom-textfile', type=str, default=None, help='write the run metrics for the node_exporter textfile collector to this .prom file')
+    parser.add_argument('--progress', action='store_true', default=None, help='show a progress bar on stderr (default: when stderr is a terminal)')
+    parser.add_argument('--no-progress', action='store_false', dest='progress', help='never show the progress bar')
     args = parser.parse_args()
-    print(args.keywords)
-    
-    conference = args.conference.lower()
-    if conference == 'all':
-        process_all_conferences(year=args.year, keywords=args.keywords, savedir=args.savedir, 
-                                poolnum=args.poolnum, driverpath=args.driver, downtime=args.time)
-    else:
-        download_papers(conference=conference, year=args.year, keywords=args.keywords, 
-                        savedir=args.savedir, poolnum=args.poolnum, driverpath=args.driver, downtime=args.time)
+    print(args.query or args.keywords)
+    try:
+        if args.query:
+            keywords = KeywordMatcher(args.query, match=args.match, abstracts=args.match_abstracts)
+        elif args.keywords:
+            keywords = KeywordMatcher.from_keywords(args.keywords, match=args.match, abstracts=args.match_abstracts)
+        else:
+            keywords = None
+    except ValueError as e:
+        parser.error(str(e))
 
+    global DOWNLOAD_BUFSIZE, HTML_PARSER, BLOB_STORE
+    DOWNLOAD_BUFSIZE = args.buffer_size * 1024
+    BLOB_STORE = not args.no_blob_store
+    if args.parser:
+        HTML_PARSER = args.parser
+    configure_rate_limit(rate=args.rate, max_rate=args.max_rate, max_retries=args.max_retries)
+    configure_bandwidth(args.max_bandwidth)
+    configure_scheduler(order=args.order, max_bytes=args.max_bytes, min_free=args.min_free)
+    if not args.no_cache:
+        cachedir = args.cache_dir or os.path.join(os.path.abspath(args.savedir or os.getcwd()), '.papercrawl_cache')
+        configure_cache(cachedir, ttl=args.cache_ttl * 3600, max_mb=args.cache_max_mb, offline=args.offline)
+    elif args.offline:
+        parser.error('--offline needs the page cache')
+    
+    conference = (args.conference or 'all').lower()
+    years = args.year or []
+    if not args.retry_failed and not years:
+        parser.error('--year is required')
+    try:
+        extractor = configure_extract(args.extract, workers=args.extract_workers, shard_size=args.shard_size,
+                                      format=args.extract_format)
+    except RuntimeError as e:
+        parser.error(str(e))
+    metrics = configure_metrics(progress=sys.stderr.isatty() if args.progress is None else args.progress)
+    try:
+        if args.retry_failed:
+            for year in years or [None]:
+                retry_failed(savedir=args.savedir, conference=None if conference == 'all' else conference,
+                             year=year, poolnum=args.poolnum, engine=args.engine, per_host=args.per_host,
+                             driverpath=args.driver, downtime=args.time)
+        elif conference == 'all':
+            process_all_conferences(year=years, keywords=keywords, savedir=args.savedir, 
+                                    poolnum=args.poolnum, driverpath=args.driver, downtime=args.time,
+                                    engine=args.engine, per_host=args.per_host, incremental=args.incremental)
+        elif len(years) > 1:
+            crawl_conferences([conference], years, keywords=keywords, savedir=args.savedir,
+                              poolnum=args.poolnum, driverpath=args.driver, downtime=args.time,
+                              engine=args.engine, per_host=args.per_host, incremental=args.incremental)
+        else:
+            download_papers(conference=conference, year=years[0], keywords=keywords, 
+                            savedir=args.savedir, poolnum=args.poolnum, driverpath=args.driver, downtime=args.time,
+                            engine=args.engine, per_host=args.per_host, incremental=args.incremental)
+    finally:
+        if extractor is not None:
+            extractor.close()
+        if metrics.progress is not None:
+            metrics.progress.close(metrics)
+        if args.summary:
+            metrics.write_summary(args.summary)
+        if args.prom_textfile:
+            metrics.write_prometheus(args.prom_textfile)
     
 
 if __name__ == '__main__':
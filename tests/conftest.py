@@ -0,0 +1,36 @@
+import os
+import sys
+import random
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import benchmark  # noqa: E402
+import papercrawl  # noqa: E402
+
+PAYLOAD = b'%PDF-1.4\n' + bytes(8 * 1024) + b'\n%%EOF\n'
+
+
+@pytest.fixture
+def mock_server():
+    """The benchmark's mock conference server, with every conference host sent to it."""
+    pages = {key: benchmark.load_fixture(name) for key, name in benchmark.MOCK_PAGES.items()}
+    server = benchmark.start_server(benchmark.ConferenceHandler, payload=PAYLOAD, handshake=0, latency=0,
+                                    bandwidth=0, error_rate=0, truncate_rate=0, missing=set(), pages=pages,
+                                    notes={}, rng=random.Random('tests'), lock=threading.Lock())
+    papercrawl.override_hosts({host: 'http://127.0.0.1:{}'.format(server.server_address[1])
+                               for host in benchmark.MOCK_HOSTS})
+    papercrawl.configure_cache(None)
+    papercrawl.configure_rate_limit(rate=None, max_retries=0)
+    papercrawl.configure_metrics()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        papercrawl.override_hosts({})
+        papercrawl.configure_rate_limit()
+        papercrawl.configure_scheduler()
+        papercrawl.configure_cache(None)
@@ -0,0 +1,20 @@
+import papercrawl
+
+
+def _dedupe(capsys, savedir, *flags):
+    papercrawl.dedupe(['--savedir', str(savedir)] + list(flags))
+    return capsys.readouterr().out.split(' MB')[0]
+
+
+def test_dedupe_dry_run_matches_real_run(tmp_path, capsys):
+    for n in range(5):
+        (tmp_path / 'copy{}.pdf'.format(n)).write_bytes(b'%PDF-1.4 same\n%%EOF\n')
+    (tmp_path / 'other.pdf').write_bytes(b'%PDF-1.4 other\n%%EOF\n')
+    assert _dedupe(capsys, tmp_path, '--dry-run') == '6 PDFs, 4 duplicates, 0.0'
+    assert _dedupe(capsys, tmp_path) == '6 PDFs, 4 duplicates, 0.0'
+    # every file is linked to its blob now
+    assert _dedupe(capsys, tmp_path, '--dry-run') == '6 PDFs, 0 duplicates, 0.0'
+    assert _dedupe(capsys, tmp_path) == '6 PDFs, 0 duplicates, 0.0'
+    (tmp_path / 'late.pdf').write_bytes(b'%PDF-1.4 same\n%%EOF\n')
+    assert _dedupe(capsys, tmp_path, '--dry-run') == '7 PDFs, 1 duplicates, 0.0'
+    assert _dedupe(capsys, tmp_path) == '7 PDFs, 1 duplicates, 0.0'
@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from papercrawl import wait_for_download
+
+from conftest import PAYLOAD
+
+
+def _chrome(directory, steps, step_seconds, finish=True):
+    """Writes paper.pdf the way Chrome does: a growing .crdownload, renamed once complete."""
+    def run():
+        partial = directory / 'paper.pdf.crdownload'
+        for step in range(1, steps + 1):
+            partial.write_bytes(PAYLOAD[:len(PAYLOAD) * step // (steps + 1)])
+            time.sleep(step_seconds)
+        if finish:
+            partial.rename(directory / 'paper.pdf')
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_returns_a_finished_file_at_once(tmp_path):
+    (tmp_path / 'paper.pdf').write_bytes(PAYLOAD)
+    start = time.monotonic()
+    assert wait_for_download(str(tmp_path), stall=5) == str(tmp_path / 'paper.pdf')
+    assert time.monotonic() - start < 0.5
+
+
+def test_waits_while_the_download_makes_progress(tmp_path):
+    # 1.2 s in all, longer than the stall limit, but never 0.5 s without progress
+    _chrome(tmp_path, steps=6, step_seconds=0.2)
+    start = time.monotonic()
+    assert wait_for_download(str(tmp_path), stall=0.5, poll=0.02) == str(tmp_path / 'paper.pdf')
+    elapsed = time.monotonic() - start
+    assert 1.0 < elapsed < 2.0
+    assert (tmp_path / 'paper.pdf').read_bytes() == PAYLOAD[:len(PAYLOAD) * 6 // 7]
+
+
+def test_gives_up_when_nothing_appears(tmp_path):
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        wait_for_download(str(tmp_path), stall=0.3, poll=0.02)
+    assert time.monotonic() - start < 1
+
+
+def test_gives_up_when_the_download_stalls(tmp_path):
+    _chrome(tmp_path, steps=2, step_seconds=0.1, finish=False).join()
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        wait_for_download(str(tmp_path), stall=0.3, poll=0.02)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+HOST, PATH = 'www.aclanthology.org', '/events/acl-{}/'.format(FIXTURE_YEAR)
+URL = 'https://{}{}'.format(HOST, PATH)
+
+
+@pytest.fixture
+def requests(mock_server):
+    mock_server.requests = []
+    return mock_server.requests
+
+
+def test_fresh_pages_are_served_from_the_cache(mock_server, requests, tmp_path):
+    papercrawl.configure_cache(str(tmp_path), ttl=3600)
+    body = papercrawl.fetch_page(URL)
+    assert body == mock_server.pages[(HOST, PATH)]
+    assert papercrawl.fetch_page(URL) == body
+    assert len(requests) == 1
+
+
+def test_stale_pages_are_revalidated(mock_server, requests, tmp_path):
+    cache = papercrawl.configure_cache(str(tmp_path), ttl=0)
+    body = papercrawl.fetch_page(URL)
+    fetched_at = cache.get(URL)[1]['fetched_at']
+    assert papercrawl.fetch_page(URL) == body
+    # the second request sends the ETag back and gets a 304
+    assert [etag is not None for _, _, etag in requests] == [False, True]
+    assert cache.get(URL)[1]['fetched_at'] > fetched_at
+    mock_server.pages[(HOST, PATH)] = body + b'<!-- updated -->'
+    assert papercrawl.fetch_page(URL) == body + b'<!-- updated -->'
+    assert cache.get(URL)[0] == body + b'<!-- updated -->'
+
+
+def test_least_recently_used_pages_are_evicted(tmp_path):
+    cache = papercrawl.HTMLCache(str(tmp_path), max_bytes=2500)
+    headers = {'ETag': None, 'Last-Modified': None}
+    for n, url in enumerate(('https://a.org/1', 'https://a.org/2')):
+        cache.put(url, b'x' * 1000, headers)
+        os.utime(cache._path(url) + '.html', (1000 + n, 1000 + n))
+    # reading the older page makes the other one the least recently used
+    cache.touch('https://a.org/1')
+    cache.put('https://a.org/3', b'x' * 1000, headers)
+    assert cache.get('https://a.org/1') is not None
+    assert cache.get('https://a.org/2') is None
+    assert cache.get('https://a.org/3') is not None
+
+
+def test_offline_serves_only_cached_pages(mock_server, requests, tmp_path):
+    papercrawl.configure_cache(str(tmp_path), ttl=0)
+    body = papercrawl.fetch_page(URL)
+    cache = papercrawl.configure_cache(str(tmp_path), ttl=0, offline=True)
+    assert cache.offline
+    assert papercrawl.fetch_page(URL) == body
+    with pytest.raises(IOError):
+        papercrawl.fetch_page('https://proceedings.neurips.cc/paper_files/paper/{}'.format(FIXTURE_YEAR))
+    assert len(requests) == 1
+
+
+def test_offline_needs_a_cache(monkeypatch):
+    with pytest.raises(ValueError):
+        papercrawl.configure_cache(None, offline=True)
+    monkeypatch.setattr('sys.argv', ['papercrawl.py', '--conference', 'acl', '--year', '2024', '--no-cache',
+                                     '--offline'])
+    try:
+        with pytest.raises(SystemExit):
+            papercrawl.main()
+    finally:
+        papercrawl.configure_rate_limit()
+        papercrawl.configure_scheduler()
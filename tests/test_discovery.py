@@ -0,0 +1,69 @@
+import threading
+
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+YEARS = [FIXTURE_YEAR - 1, FIXTURE_YEAR]
+PAGES = {'acl': ('www.aclanthology.org', '/events/acl-{}/'),
+         'neurips': ('proceedings.neurips.cc', '/paper_files/paper/{}')}
+
+
+def _serve_every_year(mock_server):
+    # the fixture pages of FIXTURE_YEAR, with the year replaced, stand in for the other years
+    for host, path in PAGES.values():
+        page = mock_server.pages[(host, path.format(FIXTURE_YEAR))]
+        for year in YEARS:
+            mock_server.pages[(host, path.format(year))] = page.replace(str(FIXTURE_YEAR).encode(), str(year).encode())
+
+
+def test_listings_are_fetched_concurrently(mock_server, monkeypatch, tmp_path):
+    _serve_every_year(mock_server)
+    mock_server.latency = 0.3
+    fetch_page, lock, in_flight = papercrawl.fetch_page, threading.Lock(), [0, 0]
+
+    def counting_fetch_page(url):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        try:
+            return fetch_page(url)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    monkeypatch.setattr(papercrawl, 'fetch_page', counting_fetch_page)
+    manifest = papercrawl.open_manifest(str(tmp_path))
+    try:
+        batches = list(papercrawl.discover_rows(manifest, list(PAGES), YEARS, 'sparse', str(tmp_path), poolnum=4))
+    finally:
+        manifest.close()
+    assert sorted((rows[0]['conference'], rows[0]['year']) for rows in batches) == sorted(
+        (conference, year) for conference in PAGES for year in YEARS)
+    assert all(len({(row['conference'], row['year']) for row in rows}) == 1 for rows in batches)
+    # every index page was requested before the first answer came back
+    assert in_flight[1] == len(PAGES) * len(YEARS)
+
+
+def test_a_failed_listing_does_not_stop_the_others(mock_server, tmp_path):
+    _serve_every_year(mock_server)
+    host, path = PAGES['acl']
+    mock_server.missing = {(host, path.format(YEARS[0]))}
+    manifest = papercrawl.open_manifest(str(tmp_path))
+    try:
+        batches = list(papercrawl.discover_rows(manifest, list(PAGES), YEARS, 'sparse', str(tmp_path), poolnum=4))
+    finally:
+        manifest.close()
+    assert sorted((rows[0]['conference'], rows[0]['year']) for rows in batches) == [
+        ('acl', YEARS[1]), ('neurips', YEARS[0]), ('neurips', YEARS[1])]
+
+
+def test_crawls_several_years_into_one_stream(mock_server, tmp_path):
+    _serve_every_year(mock_server)
+    papercrawl.crawl_conferences(['acl'], YEARS, 'sparse', str(tmp_path), poolnum=8)
+    counts = [len(list(tmp_path.glob('ACL{}/**/*.pdf'.format(year)))) for year in YEARS]
+    assert counts[0] == counts[1] > 0
+    manifest = papercrawl.open_manifest(str(tmp_path))
+    try:
+        assert manifest.missing('acl') == []
+    finally:
+        manifest.close()
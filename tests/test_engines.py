@@ -0,0 +1,118 @@
+import multiprocessing
+import socketserver
+import threading
+import time
+
+import pytest
+
+import papercrawl
+from benchmark import download_all
+
+from conftest import PAYLOAD
+
+
+@pytest.fixture
+def spawn_workers():
+    """Pool workers started the macOS and Windows way, without the parent's globals."""
+    method = multiprocessing.get_start_method()
+    multiprocessing.set_start_method('spawn', force=True)
+    try:
+        yield
+    finally:
+        multiprocessing.set_start_method(method, force=True)
+
+
+@pytest.mark.parametrize('engine', ['async', 'pool'])
+def test_engines_reach_overridden_hosts(mock_server, spawn_workers, tmp_path, engine):
+    items = [('https://www.aclanthology.org/2024.acl-long.{}.pdf'.format(n), str(tmp_path / '{}.pdf'.format(n)),
+              'paper {}'.format(n)) for n in range(8)]
+    assert download_all(items, poolnum=2, engine=engine) == [True] * 8
+    for _, path, _ in items:
+        with open(path, 'rb') as file:
+            assert file.read() == PAYLOAD
+
+
+def test_pool_workers_get_the_parent_configuration(spawn_workers):
+    papercrawl.override_hosts({'example.org': 'http://127.0.0.1:1'})
+    papercrawl.configure_rate_limit(rate=3, max_rate=7, max_retries=2)
+    try:
+        config = papercrawl._pool_worker_config(1.5)
+        with multiprocessing.Pool(1, initializer=papercrawl._init_pool_worker, initargs=config) as pool:
+            overrides, limiter, retries, bandwidth = pool.apply(_worker_state)
+    finally:
+        papercrawl.override_hosts({})
+        papercrawl.configure_rate_limit()
+    assert overrides == {'example.org': 'http://127.0.0.1:1'}
+    assert limiter == (3, 7)
+    assert retries == 2
+    assert bandwidth == 1.5 * 1024 * 1024
+
+
+def _worker_state():
+    limiter = papercrawl.RATE_LIMITER
+    return (dict(papercrawl.HOST_OVERRIDES), (limiter.initial_rate, limiter.max_rate), papercrawl.MAX_RETRIES,
+            papercrawl.BANDWIDTH_LIMITER.rate)
+
+
+def test_async_results_are_recorded_off_the_event_loop(mock_server, tmp_path):
+    items = [('https://www.aclanthology.org/2024.acl-long.{}.pdf'.format(n), str(tmp_path / '{}.pdf'.format(n)),
+              'paper {}'.format(n)) for n in range(8)]
+    threads = []
+
+    def on_result(item, ok):
+        # as slow as hashing and linking a large PDF
+        threads.append(threading.get_ident())
+        time.sleep(0.3)
+
+    start = time.perf_counter()
+    taken, status = papercrawl.AsyncDownloader(concurrency=8).run(items, on_result)
+    assert status == [True] * 8
+    assert threading.get_ident() not in threads
+    # the event loop ran on this thread; eight slow callbacks on it would take 2.4 s
+    assert time.perf_counter() - start < 1.5
+
+
+class ChunkedHandler(socketserver.BaseRequestHandler):
+    """Answers with a chunked PDF body that ``server.cut`` breaks off: 'closed' mid-chunk or 'malformed'."""
+
+    def handle(self):
+        head = b''
+        while b'\r\n\r\n' not in head:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            head += chunk
+        self.request.sendall(b'HTTP/1.1 200 OK\r\nContent-Type: application/pdf\r\nTransfer-Encoding: chunked\r\n\r\n')
+        if self.server.cut == 'malformed':
+            self.request.sendall(b'%x\r\n' % len(PAYLOAD) + PAYLOAD + b'\r\nzz\r\n\r\n')
+        else:
+            # the first 2000 bytes in two whole chunks, then the connection drops before the next size line
+            self.request.sendall(b'%x\r\n' % 1000 + PAYLOAD[:1000] + b'\r\n' + b'%x\r\n' % 1000 + PAYLOAD[1000:2000] + b'\r\n')
+
+
+@pytest.fixture
+def chunked_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), ChunkedHandler)
+    server.daemon_threads = True
+    server.cut = 'closed'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    papercrawl.override_hosts({'example.org': 'http://127.0.0.1:{}'.format(server.server_address[1])})
+    papercrawl.configure_rate_limit(rate=None, max_retries=1)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        papercrawl.override_hosts({})
+        papercrawl.configure_rate_limit()
+
+
+@pytest.mark.parametrize('cut', ['closed', 'malformed'])
+@pytest.mark.parametrize('engine', ['async', 'pool'])
+def test_cut_off_chunked_bodies_fail(chunked_server, monkeypatch, tmp_path, engine, cut):
+    monkeypatch.setattr(papercrawl, 'BACKOFF_BASE', 0.01)
+    chunked_server.cut = cut
+    savepath = str(tmp_path / 'paper.pdf')
+    assert download_all([('http://example.org/paper.pdf', savepath, 'paper')], poolnum=1,
+                                   engine=engine) == [False]
+    assert not (tmp_path / 'paper.pdf').exists()
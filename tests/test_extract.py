@@ -0,0 +1,163 @@
+import gzip
+import json
+
+import pytest
+
+import papercrawl
+from papercrawl import CorpusWriter, pdf_problem
+
+from conftest import PAYLOAD
+
+HTML = b'<!DOCTYPE html><html><body>Please sign in</body></html>'
+
+
+def _pdf(lines):
+    """A one-page PDF showing ``lines`` of text, with a correct xref table."""
+    text = ' '.join('({}) Tj T*'.format(line) for line in lines)
+    stream = 'BT /F1 12 Tf 14 TL 72 720 Td {} ET'.format(text)
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>',
+               '<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+               '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R '
+               '/Resources << /Font << /F1 5 0 R >> >> >>',
+               '<< /Length {} >>\nstream\n{}\nendstream'.format(len(stream), stream),
+               '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+               '<< /Title (Sparse Retrieval) /Author (Ada Lovelace) >>']
+    body, offsets = b'%PDF-1.4\n', []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += '{} 0 obj\n{}\nendobj\n'.format(number, obj).encode('latin-1')
+    xref = len(body)
+    body += 'xref\n0 {}\n0000000000 65535 f \n'.format(len(objects) + 1).encode()
+    body += ''.join('{:010d} 00000 n \n'.format(offset) for offset in offsets).encode()
+    body += 'trailer\n<< /Size {} /Root 1 0 R /Info 6 0 R >>\nstartxref\n{}\n%%EOF\n'.format(
+        len(objects) + 1, xref).encode()
+    return body
+
+
+def _read_shard(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_corpus_writer_shards_jsonl(tmp_path):
+    writer = CorpusWriter(str(tmp_path), shard_size=2)
+    for n in range(5):
+        writer.add({'paper_id': str(n), 'text': 'café {}'.format(n)})
+    # only complete shards are written before close
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['part-00000.jsonl.gz', 'part-00001.jsonl.gz']
+    writer.close()
+    assert [path.rsplit('/', 1)[1] for path in writer.shards] == [
+        'part-00000.jsonl.gz', 'part-00001.jsonl.gz', 'part-00002.jsonl.gz']
+    assert writer.written == 5
+    assert [record['paper_id'] for shard in writer.shards for record in _read_shard(shard)] == list('01234')
+    assert _read_shard(writer.shards[0])[1] == {'paper_id': '1', 'text': 'café 1'}
+
+
+def test_corpus_writer_continues_after_existing_shards(tmp_path):
+    for name in ('part-00000.jsonl.gz', 'part-00007.jsonl.gz', 'part-00012.jsonl.gz.tmp', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'')
+    writer = CorpusWriter(str(tmp_path), shard_size=10)
+    writer.add({'paper_id': '1'})
+    writer.close()
+    assert writer.shards == [str(tmp_path / 'part-00008.jsonl.gz')]
+    # nothing to flush: no empty shard
+    writer.close()
+    assert len(writer.shards) == 1
+
+
+def test_corpus_writer_formats(tmp_path):
+    with pytest.raises(ValueError):
+        CorpusWriter(str(tmp_path), format='csv')
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError):
+            CorpusWriter(str(tmp_path), format='parquet')
+
+
+@pytest.mark.parametrize('head, tail, problem', [
+    (b'', None, 'empty file'),
+    (HTML, None, 'HTML page'),
+    (b'\xef\xbb\xbf\n  <html><head><title>404</title>', None, 'HTML page'),
+    (b'<?xml version="1.0"?><Error><Code>AccessDenied</Code></Error>', None, 'HTML page'),
+    (b'{"error": "rate limited"}', None, 'not a PDF'),
+    (PAYLOAD[:1024], PAYLOAD[-1024:], None),
+    (b'\x00' * 100 + b'%PDF-1.5\n', b'trailer\n%%EOF\r\n', None),
+    (PAYLOAD[:1024], PAYLOAD[:2000][-1024:], 'no %%EOF marker, truncated'),
+])
+def test_pdf_problem(head, tail, problem):
+    assert pdf_problem(head, tail) == problem
+
+
+def _savedir(tmp_path):
+    files = {'good': PAYLOAD, 'html': HTML, 'truncated': PAYLOAD[:len(PAYLOAD) // 2]}
+    directory = tmp_path / 'ACL2024'
+    directory.mkdir()
+    entries = []
+    for name, content in files.items():
+        (directory / '{}.pdf'.format(name)).write_bytes(content)
+        entries.append((name, 'https://aclanthology.org/{}.pdf'.format(name), str(directory / '{}.pdf'.format(name)),
+                        name))
+    manifest = papercrawl.open_manifest(str(tmp_path))
+    try:
+        # files already on disk are registered as done
+        manifest.register('acl', 2024, entries)
+        assert manifest.missing('acl', 2024) == []
+    finally:
+        manifest.close()
+    return directory
+
+
+def test_validate_lists_files_that_are_not_pdfs(tmp_path, capsys):
+    directory = _savedir(tmp_path)
+    papercrawl.validate(['--savedir', str(tmp_path)])
+    out = capsys.readouterr().out.splitlines()
+    assert sorted(out[:-1]) == ['ACL2024/html.pdf: HTML page', 'ACL2024/truncated.pdf: no %%EOF marker, truncated']
+    assert out[-1] == '3 files checked, 2 not PDFs'
+    assert sorted(path.name for path in directory.iterdir()) == ['good.pdf', 'html.pdf', 'truncated.pdf']
+
+
+def test_validate_requeue(tmp_path, capsys):
+    directory = _savedir(tmp_path)
+    papercrawl.validate(['--savedir', str(tmp_path), '--requeue'])
+    assert capsys.readouterr().out.splitlines()[-1] == '3 files checked, 2 not PDFs, removed and marked failed'
+    assert [path.name for path in directory.iterdir()] == ['good.pdf']
+    manifest = papercrawl.open_manifest(str(tmp_path))
+    try:
+        assert sorted((row['paper_id'], row['status']) for row in manifest.missing('acl', 2024)) == [
+            ('html', 'failed'), ('truncated', 'failed')]
+    finally:
+        manifest.close()
+
+
+def test_extractor_needs_a_backend(monkeypatch, tmp_path):
+    monkeypatch.setattr(papercrawl, '_pdf_backend', lambda: None)
+    with pytest.raises(RuntimeError):
+        papercrawl.PaperExtractor(str(tmp_path))
+
+
+def test_extract_pdf_leaves_out_files_that_are_not_pdfs(tmp_path):
+    path = tmp_path / 'paper.pdf'
+    path.write_bytes(HTML)
+    assert papercrawl.extract_pdf(str(path)) == {'problem': 'HTML page'}
+
+
+@pytest.mark.skipif(papercrawl._pdf_backend() is None, reason='needs pypdf or pdfminer.six')
+def test_extractor_writes_the_corpus(tmp_path):
+    path = tmp_path / 'paper.pdf'
+    path.write_bytes(_pdf(['Sparse Retrieval at Scale', 'Abstract', 'We index every paper.',
+                           '1 Introduction', 'Search matters.']))
+    (tmp_path / 'page.pdf').write_bytes(HTML)
+    extractor = papercrawl.PaperExtractor(str(tmp_path / 'corpus'), workers=1, shard_size=10)
+    for name in ('paper', 'page'):
+        extractor.submit({'conference': 'acl', 'year': 2024, 'paper_id': name, 'title': 'Sparse Retrieval at Scale',
+                          'url': 'https://aclanthology.org/{}.pdf'.format(name),
+                          'path': str(tmp_path / '{}.pdf'.format(name))})
+    extractor.close()
+    assert extractor.counts == {'extracted': 1, 'not_pdf': 1, 'failed': 0}
+    [record] = _read_shard(extractor.writer.shards[0])
+    assert record['paper_id'] == 'paper' and record['pages'] == 1
+    assert record['pdf_title'] == 'Sparse Retrieval' and record['pdf_author'] == 'Ada Lovelace'
+    assert record['first_page_title'] == 'Sparse Retrieval at Scale'
+    assert record['abstract'] == 'We index every paper.'
+    assert 'Search matters.' in record['text']
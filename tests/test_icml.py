@@ -0,0 +1,52 @@
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+from conftest import PAYLOAD
+
+VOLUME = papercrawl.PMLR_VOLUMES[FIXTURE_YEAR]
+QUERY = papercrawl.KeywordMatcher('sparse AND (agents OR code)')
+
+
+def test_lists_the_pmlr_volume(mock_server):
+    papers = papercrawl.list_pmlr_papers(VOLUME)
+    assert len(papers) == 2600
+    title, url, authors = papers[0]
+    assert url.startswith('https://proceedings.mlr.press/v{}/'.format(VOLUME)) and url.endswith('.pdf')
+    assert title and authors.count(', ') >= 1
+    entries = papercrawl.CONFERENCES['icml'].list_papers(FIXTURE_YEAR)
+    assert [entry.url for entry in entries] == [paper[1] for paper in papers]
+    assert entries[0].paper_id == url.rsplit('/', 1)[1][:-len('.pdf')]
+    assert not any(papercrawl.CONFERENCES['icml'].needs_resolving(entry.url) for entry in entries)
+
+
+def test_falls_back_to_icml_cc_when_pmlr_is_down(mock_server):
+    mock_server.missing = {('proceedings.mlr.press', '/v{}/'.format(VOLUME))}
+    adapter = papercrawl.CONFERENCES['icml']
+    entries = adapter.list_papers(FIXTURE_YEAR)
+    assert len(entries) == 2600
+    assert all(adapter.needs_resolving(entry.url) for entry in entries)
+    assert entries[0].url == 'https://icml.cc/virtual/{}/poster/{}'.format(FIXTURE_YEAR, entries[0].paper_id)
+    # the detail page leads to the PMLR page, which links the PDF
+    assert adapter.resolve_pdf_url(entries[0].url) == 'https://proceedings.mlr.press/v{0}/icml{1}/icml{1}.pdf'.format(
+        VOLUME, entries[0].paper_id)
+
+
+def test_years_without_a_volume_use_icml_cc(mock_server, monkeypatch):
+    monkeypatch.setattr(papercrawl, 'PMLR_VOLUMES', {})
+    entries = papercrawl.CONFERENCES['icml'].list_papers(FIXTURE_YEAR)
+    assert entries[0].url.startswith('https://icml.cc/')
+
+
+def _crawl(tmp_path):
+    papercrawl.crawl_conferences(['icml'], [FIXTURE_YEAR], QUERY, str(tmp_path), poolnum=8)
+    return sorted(path.name for path in tmp_path.glob('icml{}/*.pdf'.format(FIXTURE_YEAR)))
+
+
+def test_downloads_from_either_listing(mock_server, tmp_path):
+    wanted = sorted('[ICML{}] {}.pdf'.format(FIXTURE_YEAR, title)
+                    for title, _, _ in papercrawl.list_pmlr_papers(VOLUME) if QUERY.matches(title))
+    assert wanted and _crawl(tmp_path / 'pmlr') == wanted
+    mock_server.missing = {('proceedings.mlr.press', '/v{}/'.format(VOLUME))}
+    fallback = _crawl(tmp_path / 'icml-cc')
+    assert fallback and all((tmp_path / 'icml-cc' / 'icml{}'.format(FIXTURE_YEAR) / name).read_bytes() == PAYLOAD
+                            for name in fallback)
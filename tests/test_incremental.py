@@ -0,0 +1,42 @@
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+from conftest import PAYLOAD
+from test_library import SPARSE_PAPERS
+
+
+def _crawl(savedir):
+    papercrawl.crawl_conferences(['acl'], [FIXTURE_YEAR], papercrawl.KeywordMatcher.coerce('sparse'), savedir,
+                                 poolnum=4, incremental=True)
+
+
+def _missing(savedir):
+    manifest = papercrawl.open_manifest(savedir)
+    try:
+        return len(manifest.missing('acl', FIXTURE_YEAR))
+    finally:
+        manifest.close()
+
+
+def test_unchanged_listing_downloads_what_earlier_runs_left(mock_server, tmp_path):
+    savedir = str(tmp_path)
+    papercrawl.configure_scheduler(max_bytes=len(PAYLOAD) * 10)
+    _crawl(savedir)
+    assert _missing(savedir) == SPARSE_PAPERS - 10
+    papercrawl.configure_scheduler()
+    _crawl(savedir)
+    assert _missing(savedir) == 0
+    assert len(list(tmp_path.glob('ACL*/**/*.pdf'))) == SPARSE_PAPERS
+
+
+def test_changed_listing_downloads_what_earlier_runs_left(mock_server, tmp_path):
+    savedir = str(tmp_path)
+    mock_server.payload = b'<html><body>Down for maintenance</body></html>'
+    _crawl(savedir)
+    assert _missing(savedir) == SPARSE_PAPERS
+    mock_server.payload = PAYLOAD
+    # a changed index page makes the listing parse again; only some papers are new or changed
+    page = ('www.aclanthology.org', '/events/acl-{}/'.format(FIXTURE_YEAR))
+    mock_server.pages[page] = mock_server.pages[page] + b'<!-- updated -->'
+    _crawl(savedir)
+    assert _missing(savedir) == 0
@@ -0,0 +1,53 @@
+import pytest
+
+import papercrawl
+from papercrawl import KeywordMatcher
+
+
+@pytest.mark.parametrize('query, title', [
+    ('c++', 'C++ compilers'),
+    ('c++', 'Fuzzing c++'),
+    ('.net', 'Porting .NET runtimes'),
+    ('"c#"', 'A C# type checker'),
+    ('graph', 'Graph neural networks'),
+])
+def test_word_matches_terms_with_non_word_edges(query, title):
+    assert KeywordMatcher(query, match='word').matches(title)
+
+
+@pytest.mark.parametrize('query, title', [
+    ('c++', 'Objective-c++x'),
+    ('graph', 'Graphs and paragraphs'),
+    ('net', 'Porting .NETs'),
+])
+def test_word_rejects_parts_of_words(query, title):
+    assert not KeywordMatcher(query, match='word').matches(title)
+
+
+def test_stem_matches_word_prefixes():
+    matcher = KeywordMatcher('retriev AND c++', match='stem')
+    assert matcher.matches('Retrieving C++ snippets')
+    assert not matcher.matches('Preretrieval of C++ snippets')
+
+
+def test_abstracts_are_matched_only_when_asked():
+    title, abstract = 'A new benchmark', 'We evaluate dense retrieval.'
+    assert not KeywordMatcher('retrieval').matches(title, abstract)
+    assert KeywordMatcher('retrieval', abstracts=True).matches(title, abstract)
+    assert KeywordMatcher.from_keywords('retrieval-summarization', abstracts=True).matches(title, abstract)
+
+
+def test_match_abstracts_option(monkeypatch, tmp_path):
+    seen = {}
+    monkeypatch.setattr(papercrawl, 'download_papers', lambda **kwargs: seen.update(kwargs))
+    monkeypatch.setattr('sys.argv', ['papercrawl.py', '--conference', 'iclr', '--year', '2024', '--query', 'c++',
+                                     '--match', 'word', '--match-abstracts', '--no-cache', '--no-progress',
+                                     '--savedir', str(tmp_path)])
+    try:
+        papercrawl.main()
+    finally:
+        papercrawl.configure_rate_limit()
+        papercrawl.configure_scheduler()
+    matcher = seen['keywords']
+    assert (matcher.query, matcher.match, matcher.abstracts) == ('c++', 'word', True)
+    assert matcher.matches('Compilers', 'We port C++ templates.')
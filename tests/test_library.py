@@ -0,0 +1,97 @@
+import os
+import time
+
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+from conftest import PAYLOAD
+
+# papers of the ACL fixture with 'sparse' in the title
+SPARSE_PAPERS = 335
+
+
+def _drain(job, timeout=60):
+    events = []
+    while True:
+        event = job.next_event(timeout=timeout)
+        if event is None:
+            break
+        events.append(event)
+    assert job.done(), 'the job stalled'
+    return events
+
+
+def test_max_pending_with_scheduler(mock_server, tmp_path):
+    papercrawl.configure_scheduler(order='smallest')
+    job = papercrawl.submit_crawl('acl', FIXTURE_YEAR, 'sparse', str(tmp_path), poolnum=8, max_pending=2)
+    events = _drain(job)
+    assert len(events) == SPARSE_PAPERS
+    assert all(event.ok for event in events)
+    assert job._pending == 0
+
+
+def test_papers_over_budget_release_their_slot(mock_server, tmp_path):
+    papercrawl.configure_scheduler(max_bytes=len(PAYLOAD) * 10)
+    job = papercrawl.submit_crawl('acl', FIXTURE_YEAR, 'sparse', str(tmp_path), poolnum=8, max_pending=2)
+    events = _drain(job)
+    assert len(events) == 10
+    assert job._pending == 0
+    futures = list(job.futures_snapshot().values())
+    assert sum(future.cancelled() for future in futures) == SPARSE_PAPERS - 10
+    assert job.result() == [future.result() for future in futures if not future.cancelled()]
+
+
+def test_every_job_gets_the_budget(mock_server, tmp_path):
+    papercrawl.configure_scheduler(max_bytes=len(PAYLOAD) * 10)
+    for savedir in (tmp_path / 'first', tmp_path / 'second'):
+        job = papercrawl.submit_crawl('acl', FIXTURE_YEAR, 'sparse', str(savedir), poolnum=8)
+        assert len(_drain(job)) == 10
+    # a job resuming the first savedir downloads the next ten papers
+    job = papercrawl.submit_crawl('acl', FIXTURE_YEAR, 'sparse', str(tmp_path / 'first'), poolnum=8)
+    events = _drain(job)
+    assert len(events) == 10 and all(event.ok for event in events)
+
+
+def test_iter_papers_then_submit_downloads(mock_server, tmp_path):
+    records = list(papercrawl.iter_papers(['acl'], [FIXTURE_YEAR], 'sparse', str(tmp_path)))
+    assert len(records) == SPARSE_PAPERS
+    assert {record.status for record in records} == {'pending'}
+    with papercrawl.submit_downloads(records[:20], savedir=str(tmp_path), max_pending=4) as job:
+        events = _drain(job)
+    assert sorted(event.path for event in events) == sorted(record.path for record in records[:20])
+    assert all(event.ok and event.bytes == len(PAYLOAD) for event in events)
+
+
+def test_futures_snapshot_while_the_job_runs(mock_server, tmp_path):
+    job = papercrawl.submit_crawl(['acl', 'neurips'], FIXTURE_YEAR, 'sparse', str(tmp_path), poolnum=8)
+    sizes = []
+    while not job.done():
+        futures = job.futures_snapshot()
+        sizes.append(sum(1 for future in futures.values() if future.done()) + len(futures))
+        time.sleep(0.005)
+    assert sizes == sorted(sizes)
+    events = job.result(timeout=60)
+    assert len(events) == len(job.futures_snapshot()) > SPARSE_PAPERS
+
+
+def test_jobs_run_with_their_own_settings(mock_server, tmp_path):
+    process = papercrawl.METRICS
+    base = papercrawl.CrawlSettings.current()
+    small = base._replace(metrics=papercrawl.Metrics(),
+                          scheduler=papercrawl.DownloadScheduler(max_bytes=len(PAYLOAD) * 5))
+    large = base._replace(metrics=papercrawl.Metrics(),
+                          scheduler=papercrawl.DownloadScheduler(max_bytes=len(PAYLOAD) * 20),
+                          cache=papercrawl.HTMLCache(str(tmp_path / 'cache')), blob_store=False)
+    jobs = [papercrawl.submit_crawl('acl', FIXTURE_YEAR, 'sparse', str(tmp_path / 'small'), settings=small),
+            papercrawl.submit_crawl('acl', FIXTURE_YEAR, 'sparse', str(tmp_path / 'large'), engine='pool',
+                                    settings=large)]
+    assert [len(_drain(job)) for job in jobs] == [5, 20]
+    assert small.metrics.papers == {'ok': 5, 'failed': 0, 'skipped': SPARSE_PAPERS - 5}
+    assert large.metrics.papers == {'ok': 20, 'failed': 0, 'skipped': SPARSE_PAPERS - 20}
+    # the pool engine's workers report to the job's metrics too
+    assert large.metrics.histograms['download_seconds'].count == 20
+    assert small.metrics.requests and large.metrics.requests
+    assert not process.requests and not process.histograms and sum(process.papers.values()) == 0
+    assert os.listdir(str(tmp_path / 'cache'))
+    assert os.path.isdir(str(tmp_path / 'small' / papercrawl.BLOB_DIR))
+    assert not os.path.exists(str(tmp_path / 'large' / papercrawl.BLOB_DIR))
@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+from conftest import PAYLOAD
+from test_library import SPARSE_PAPERS
+
+
+def _prometheus(path):
+    samples = {}
+    for line in path.read_text().splitlines():
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_summary_and_prometheus_textfile(mock_server, monkeypatch, tmp_path, capsys):
+    prom = tmp_path / 'papercrawl.prom'
+    monkeypatch.setattr('sys.argv', [
+        'papercrawl.py', '--conference', 'acl', '--year', str(FIXTURE_YEAR), '--keywords', 'sparse',
+        '--savedir', str(tmp_path / 'papers'), '--rate', '0', '--max-retries', '0', '--no-cache', '--no-progress',
+        '--max-bytes', str(len(PAYLOAD) * 10), '--summary', '-', '--prom-textfile', str(prom)])
+    try:
+        papercrawl.main()
+    finally:
+        papercrawl.configure_rate_limit()
+        papercrawl.configure_scheduler()
+
+    out = capsys.readouterr().out
+    # the JSON follows the crawl's own messages
+    summary = json.loads(out[out.index('\n{\n') + 1:])
+    assert summary['papers'] == {'ok': 10, 'failed': 0, 'skipped': SPARSE_PAPERS - 10, 'expected': SPARSE_PAPERS}
+    assert summary['bytes'] == len(PAYLOAD) * 10
+    assert len(summary['skipped']) == SPARSE_PAPERS - 10
+    assert {entry['reason'] for entry in summary['skipped']} == {'max-bytes'}
+    download = summary['stages']['download_seconds']
+    assert download['count'] == 10
+    assert download['p50'] <= download['p90'] <= download['p99'] <= download['max']
+    assert summary['stages']['paper_bytes']['max'] == len(PAYLOAD)
+    assert summary['requests']['www.aclanthology.org']['200'] >= 10
+
+    samples = _prometheus(prom)
+    assert samples['papercrawl_papers_total{result="ok"}'] == 10
+    assert samples['papercrawl_papers_total{result="skipped"}'] == SPARSE_PAPERS - 10
+    assert samples['papercrawl_download_bytes_total'] == len(PAYLOAD) * 10
+    assert samples['papercrawl_download_seconds_count'] == 10
+    assert samples['papercrawl_download_seconds_bucket{le="+Inf"}'] == 10
+    assert samples['papercrawl_paper_bytes_sum'] == len(PAYLOAD) * 10
+    requests = sum(n for name, n in samples.items() if name.startswith('papercrawl_requests_total{'))
+    assert requests == sum(sum(codes.values()) for codes in summary['requests'].values())
+    assert [path.name for path in tmp_path.iterdir() if path.name.startswith('papercrawl.prom')] == ['papercrawl.prom']
+
+
+def test_histogram_buckets_are_cumulative(tmp_path):
+    metrics = papercrawl.Metrics()
+    for seconds in (0.001, 0.2, 0.2, 30, 10 ** 6):
+        metrics.observe('download_seconds', seconds)
+    metrics.request('example.org', 'say "hi"\n')
+    metrics.write_prometheus(str(tmp_path / 'run.prom'))
+    samples = _prometheus(tmp_path / 'run.prom')
+    buckets = [(name, n) for name, n in samples.items() if name.startswith('papercrawl_download_seconds_bucket')]
+    counts = [n for _, n in buckets]
+    assert counts == sorted(counts) and counts[-1] == 5
+    assert buckets[-1][0] == 'papercrawl_download_seconds_bucket{le="+Inf"}'
+    assert buckets[-2][1] == 4
+    assert samples['papercrawl_requests_total{host="example.org",status="say \\"hi\\"\\n"}'] == 1
+
+
+def test_progress_bar_steps_aside_for_log_records():
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    logger = logging.getLogger('papercrawl')
+    logger.addHandler(handler)
+    try:
+        metrics = papercrawl.Metrics(papercrawl.ProgressBar(stream=stream, interval=3600))
+        metrics.expect(2)
+        logger.warning('Saved paper one')
+        # the bar is drawn again right after the record, whatever the interval
+        metrics.paper(True)
+        logger.warning('Saved paper two')
+        metrics.progress.close(metrics)
+        logger.warning('Done')
+    finally:
+        logger.removeHandler(handler)
+    lines = stream.getvalue().split('\n')
+    assert [line.rsplit('\033[K', 1)[-1] for line in lines] == [
+        'Saved paper one', 'Saved paper two', '', 'Done', '']
+    assert '1/2 papers' in lines[1] and '1/2 papers' in lines[2]
+    assert not handler.filters
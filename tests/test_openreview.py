@@ -0,0 +1,123 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import benchmark
+import papercrawl
+
+VENUE = 'ICLR.cc/2024/Conference'
+
+
+def _notes(venueid, count, wrap):
+    # API 2 wraps every content field as {"value": ...}, API 1 does not
+    value = (lambda v: {'value': v}) if wrap else (lambda v: v)
+    return [{'id': '{}-{}'.format(venueid, n), 'forum': '{}-{}'.format(venueid.split('/')[1], n), 'content': {
+        'title': value('Paper {} of {}'.format(n, venueid)), 'authors': value(['Ada Lovelace', 'Alan Turing']),
+        'abstract': value('About {}.'.format(n)), 'venueid': value(venueid)}} for n in range(count)]
+
+
+class NotesHandler(BaseHTTPRequestHandler):
+    """
+    The /notes endpoint of both OpenReview APIs: ``server.apis`` maps a host to its notes,
+    or to an HTTP status it answers every request with. Requests are kept in ``server.requests``.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        host = self.headers.get('Host', '').split(':')[0]
+        query = parse_qs(urlsplit(self.path).query)
+        with self.server.lock:
+            self.server.requests.append((host, query))
+        notes = self.server.apis.get(host, 404)
+        if isinstance(notes, int):
+            self.send_error(notes)
+            return
+        venueid = query['content.venueid'][0]
+        matching = [note for note in notes if papercrawl._openreview_value(note['content']['venueid']) == venueid]
+        offset, limit = int(query['offset'][0]), int(query['limit'][0])
+        answer = {'notes': matching[offset:offset + limit]}
+        if self.server.count:
+            answer['count'] = len(matching)
+        body = json.dumps(answer).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def openreview(monkeypatch):
+    server = benchmark.start_server(NotesHandler, apis={}, count=True, requests=[], lock=threading.Lock())
+    base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    papercrawl.override_hosts({'api2.openreview.net': base_url, 'api.openreview.net': base_url})
+    papercrawl.configure_cache(None)
+    papercrawl.configure_rate_limit(rate=None, max_retries=0)
+    monkeypatch.setattr(papercrawl, 'OPENREVIEW_PAGE_SIZE', 10)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+        papercrawl.override_hosts({})
+        papercrawl.configure_rate_limit()
+
+
+def _offsets(server, host):
+    return sorted(int(query['offset'][0]) for requested, query in server.requests if requested == host)
+
+
+def test_pages_by_count_and_offset(openreview):
+    openreview.apis['api2.openreview.net'] = _notes(VENUE, 25, wrap=True)
+    notes = papercrawl.list_openreview_notes(VENUE)
+    assert [note['id'] for note in notes] == ['{}-{}'.format(VENUE, n) for n in range(25)]
+    assert _offsets(openreview, 'api2.openreview.net') == [0, 10, 20]
+    assert all(query['limit'] == ['10'] for _, query in openreview.requests)
+
+
+def test_pages_until_a_short_page_without_count(openreview):
+    openreview.count = False
+    openreview.apis['api2.openreview.net'] = _notes(VENUE, 20, wrap=True)
+    assert len(papercrawl.list_openreview_notes(VENUE)) == 20
+    assert _offsets(openreview, 'api2.openreview.net') == [0, 10, 20]
+
+
+@pytest.mark.parametrize('status', [403, 404])
+def test_falls_back_to_api1(openreview, status):
+    openreview.apis['api2.openreview.net'] = status
+    openreview.apis['api.openreview.net'] = _notes(VENUE, 12, wrap=False)
+    papers = papercrawl.list_openreview_papers(VENUE)
+    assert len(papers) == 12
+    assert papers[0].title == 'Paper 0 of {}'.format(VENUE)
+    assert papers[0].authors == 'Ada Lovelace, Alan Turing'
+    assert papers[0].url == 'https://openreview.net/pdf?id=2024-0'
+    assert _offsets(openreview, 'api.openreview.net') == [0, 10]
+
+
+def test_falls_back_to_api1_when_api2_knows_no_note(openreview):
+    openreview.apis['api2.openreview.net'] = _notes('ICLR.cc/2023/Conference', 5, wrap=True)
+    openreview.apis['api.openreview.net'] = _notes(VENUE, 3, wrap=False)
+    assert len(papercrawl.list_openreview_notes(VENUE)) == 3
+
+
+def test_raises_when_every_api_fails(openreview):
+    openreview.apis['api2.openreview.net'] = 403
+    openreview.apis['api.openreview.net'] = 404
+    with pytest.raises(IOError):
+        papercrawl.list_openreview_notes(VENUE)
+
+
+def test_lists_only_the_venue(openreview):
+    openreview.apis['api2.openreview.net'] = (_notes(VENUE, 15, wrap=True) +
+                                              _notes('ICLR.cc/2024/Workshop/ME-FoMo', 7, wrap=True) +
+                                              _notes('ICLR.cc/2023/Conference', 9, wrap=True))
+    papers = papercrawl.list_openreview_papers(VENUE)
+    assert len(papers) == 15
+    assert all(paper.title.endswith(VENUE) for paper in papers)
+    assert {query['content.venueid'][0] for _, query in openreview.requests} == {VENUE}
+    assert papers[3].abstract == 'About 3.'
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+import papercrawl
+from benchmark import FIXTURE_YEAR
+
+# the conferences with an index page among the fixtures
+CONFERENCES = ['acl', 'neurips', 'icml', 'iclr', 'sigir']
+
+
+def _listing(conference, savedir):
+    return sorted((record.paper_id, record.title, record.url, os.path.relpath(record.path, str(savedir)))
+                  for record in papercrawl.iter_papers(conference, FIXTURE_YEAR, savedir=str(savedir)))
+
+
+@pytest.mark.parametrize('conference', CONFERENCES)
+def test_targets_keep_every_paper(mock_server, tmp_path, monkeypatch, conference):
+    listed = _listing(conference, tmp_path / 'strained')
+    assert listed
+    parse_html = papercrawl.parse_html
+    monkeypatch.setattr(papercrawl, 'parse_html', lambda html, parser=None, parse_only=None: parse_html(html, parser))
+    assert _listing(conference, tmp_path / 'whole') == listed
+
+
+@pytest.mark.parametrize('conference', CONFERENCES)
+def test_parsers_agree(mock_server, tmp_path, monkeypatch, conference):
+    pytest.importorskip('lxml')
+    monkeypatch.setattr(papercrawl, 'HTML_PARSER', 'lxml')
+    listed = _listing(conference, tmp_path / 'lxml')
+    monkeypatch.setattr(papercrawl, 'HTML_PARSER', 'html.parser')
+    assert _listing(conference, tmp_path / 'html.parser') == listed
+
+
+def test_parse_only_materializes_the_target():
+    html = ('<html><head><title>Schedule</title></head><body><div id="nav"><a href="/">home</a></div>'
+            '<ul class="paper-list"><li><a href="/a.pdf">A</a></li></ul><p>footer</p></body></html>')
+    soup = papercrawl.parse_html(html, parse_only=papercrawl.NEURIPS_TARGET)
+    assert [a['href'] for a in soup.find_all('a')] == ['/a.pdf']
+    assert soup.find('title') is None and soup.find('p') is None
+    assert papercrawl.METRICS.histograms['parse_seconds'].count >= 1
@@ -0,0 +1,182 @@
+import base64
+import http.server
+import select
+import shutil
+import socket
+import socketserver
+import ssl
+import subprocess
+import threading
+import urllib.request
+from urllib.parse import urlsplit
+
+import pytest
+
+import papercrawl
+from benchmark import download_all
+
+from conftest import PAYLOAD
+
+PROXY_VARIABLES = ('http_proxy', 'https_proxy', 'no_proxy', 'all_proxy')
+
+
+class ProxyHandler(socketserver.BaseRequestHandler):
+    """
+    A forwarding proxy: CONNECT opens a tunnel, absolute-form requests are sent on to the origin.
+    The request line and headers of every request are kept in ``server.requests``.
+    """
+
+    def handle(self):
+        head = b''
+        while b'\r\n\r\n' not in head:
+            chunk = self.request.recv(4096)
+            if not chunk:
+                return
+            head += chunk
+        head, _, extra = head.partition(b'\r\n\r\n')
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        method, target, _ = request_line.split(' ')
+        headers = dict((key.strip().lower(), value.strip()) for key, _, value in
+                       (line.partition(':') for line in header_lines))
+        with self.server.lock:
+            self.server.requests.append((method, target, headers))
+        if method == 'CONNECT':
+            if self.server.refuse:
+                self.request.sendall(b'HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n')
+                return
+            host, port = target.rsplit(':', 1)
+            upstream = socket.create_connection((host, int(port)))
+            self.request.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+        else:
+            parts = urlsplit(target)
+            upstream = socket.create_connection((parts.hostname, parts.port or 80))
+            path = parts.path + ('?' + parts.query if parts.query else '')
+            kept = [line for line in header_lines if not line.lower().startswith(('proxy-', 'connection:'))]
+            upstream.sendall('\r\n'.join(['{} {} HTTP/1.1'.format(method, path)] + kept + ['Connection: close', '', ''])
+                             .encode('latin-1'))
+        upstream.sendall(extra)
+        with upstream:
+            sockets = [self.request, upstream]
+            while True:
+                readable, _, _ = select.select(sockets, [], [], 5)
+                if not readable:
+                    return
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is self.request else self.request).sendall(data)
+
+
+class ProxyServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+@pytest.fixture
+def proxy(monkeypatch):
+    for name in PROXY_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+        monkeypatch.delenv(name.upper(), raising=False)
+    # urlopen keeps the opener, and the proxies it read, of its first call; forked pool workers inherit it
+    monkeypatch.setattr(urllib.request, '_opener', None)
+    server = ProxyServer(('127.0.0.1', 0), ProxyHandler)
+    server.requests, server.refuse, server.lock = [], False, threading.Lock()
+    server.url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class PDFHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+
+@pytest.fixture
+def https_server(tmp_path, monkeypatch):
+    """An HTTPS origin for 'localhost' with a self-signed certificate that the downloads trust."""
+    if shutil.which('openssl') is None:
+        pytest.skip('needs openssl to make a certificate')
+    cert, key = str(tmp_path / 'cert.pem'), str(tmp_path / 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-keyout', key, '-out', cert,
+                    '-days', '1', '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost'],
+                   check=True, capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), PDFHandler)
+    server.daemon_threads = True
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    monkeypatch.setattr(ssl, '_create_default_https_context', lambda: ssl.create_default_context(cafile=cert))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _items(tmp_path, url, count):
+    return [(url.format(n), str(tmp_path / '{}.pdf'.format(n)), 'paper {}'.format(n)) for n in range(count)]
+
+
+@pytest.mark.parametrize('engine', ['async', 'pool'])
+def test_engines_use_http_proxy(mock_server, proxy, monkeypatch, tmp_path, engine):
+    monkeypatch.setenv('http_proxy', proxy.url)
+    items = _items(tmp_path, 'http://aclanthology.org/2024.acl-long.{}.pdf', 4)
+    papercrawl.override_hosts({'aclanthology.org': 'http://127.0.0.1:{}'.format(mock_server.server_address[1])})
+    assert download_all(items, poolnum=2, engine=engine) == [True] * 4
+    for _, path, _ in items:
+        with open(path, 'rb') as file:
+            assert file.read() == PAYLOAD
+    targets = sorted(target for method, target, _ in proxy.requests if method == 'GET')
+    assert targets == sorted('http://127.0.0.1:{}/2024.acl-long.{}.pdf'.format(mock_server.server_address[1], n)
+                             for n in range(4))
+
+
+def test_no_proxy_hosts_are_reached_directly(mock_server, proxy, monkeypatch, tmp_path):
+    monkeypatch.setenv('http_proxy', proxy.url)
+    monkeypatch.setenv('no_proxy', '127.0.0.1')
+    items = _items(tmp_path, 'http://aclanthology.org/2024.acl-long.{}.pdf', 2)
+    papercrawl.override_hosts({'aclanthology.org': 'http://127.0.0.1:{}'.format(mock_server.server_address[1])})
+    assert download_all(items, poolnum=2, engine='async') == [True] * 2
+    assert proxy.requests == []
+
+
+def test_https_is_tunnelled_with_connect(https_server, proxy, tmp_path):
+    port = https_server.server_address[1]
+    items = _items(tmp_path, 'https://localhost:' + str(port) + '/{}.pdf', 4)
+    downloader = papercrawl.AsyncDownloader(concurrency=2, proxies={'https': 'http://ada:open%20sesame@' +
+                                                                             proxy.url.split('://')[1]})
+    taken, status = downloader.run(items, lambda item, ok: None)
+    assert status == [True] * 4
+    with open(items[0][1], 'rb') as file:
+        assert file.read() == PAYLOAD
+    # at most two connections, each tunnelled once and kept alive
+    assert {(method, target) for method, target, _ in proxy.requests} == {('CONNECT', 'localhost:{}'.format(port))}
+    assert len(proxy.requests) <= 2
+    authorization = proxy.requests[0][2]['proxy-authorization']
+    assert base64.b64decode(authorization.split(' ')[1]) == b'ada:open sesame'
+
+
+def test_refused_tunnel_fails_the_download(https_server, proxy, tmp_path):
+    proxy.refuse = True
+    papercrawl.configure_rate_limit(rate=None, max_retries=0)
+    items = _items(tmp_path, 'https://localhost:' + str(https_server.server_address[1]) + '/{}.pdf', 1)
+    try:
+        taken, status = papercrawl.AsyncDownloader(proxies={'https': proxy.url}).run(items, lambda item, ok: None)
+    finally:
+        papercrawl.configure_rate_limit()
+    assert status == [False]
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from email.utils import formatdate
+from urllib.error import HTTPError, URLError
+
+import pytest
+
+import benchmark
+import papercrawl
+from benchmark import download_all
+
+from conftest import PAYLOAD
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(papercrawl.time, 'monotonic', clock)
+    return clock
+
+
+def _http_error(code, retry_after=None):
+    headers = {'Retry-After': retry_after} if retry_after is not None else {}
+    return HTTPError('http://example.org/a.pdf', code, 'error', headers, None)
+
+
+def test_rate_grows_additively_and_halves_on_throttle(clock):
+    limiter = papercrawl.HostRateLimiter(rate=4, max_rate=5, min_rate=1, increase=0.5, decrease=0.5)
+    for _ in range(10):
+        limiter.note('a.org', 200)
+    assert limiter.rate('a.org') == 5
+    limiter.note('a.org', 429)
+    assert limiter.rate('a.org') == 2.5
+    # answers to requests that were already in flight count as the same signal
+    limiter.note('a.org', 503)
+    assert limiter.rate('a.org') == 2.5
+    for _ in range(3):
+        clock.now += 1
+        limiter.note('a.org', 429)
+    assert limiter.rate('a.org') == 1
+    assert limiter.rate('b.org') == 4
+
+
+def test_throttled_host_waits_for_retry_after(clock):
+    limiter = papercrawl.HostRateLimiter(rate=100)
+    assert limiter.reserve('a.org') == 0
+    limiter.on_throttle('a.org', retry_after=7)
+    assert limiter.reserve('a.org') == pytest.approx(7)
+    clock.now += 7
+    assert limiter.reserve('a.org') == pytest.approx(0, abs=0.02)
+    assert limiter.reserve('b.org') == 0
+
+
+def test_parse_retry_after():
+    assert papercrawl.parse_retry_after('120') == 120
+    assert papercrawl.parse_retry_after(formatdate(time.time() + 30, usegmt=True)) == pytest.approx(30, abs=2)
+    assert papercrawl.parse_retry_after(formatdate(time.time() - 30, usegmt=True)) == 0
+    assert papercrawl.parse_retry_after('soon') is None
+    assert papercrawl.parse_retry_after(None) is None
+
+
+def test_retry_delay():
+    assert papercrawl.retry_delay(_http_error(429, '7'), 0, max_retries=3) == 7
+    assert papercrawl.retry_delay(_http_error(503, formatdate(time.time() + 20, usegmt=True)), 0,
+                                  max_retries=3) == pytest.approx(20, abs=2)
+    # a server asking for hours is not waited for that long
+    assert papercrawl.retry_delay(_http_error(429, '86400'), 0, max_retries=3) == papercrawl.BACKOFF_CAP * 5
+    for attempt in range(8):
+        delay = papercrawl.retry_delay(_http_error(502), attempt, max_retries=10)
+        assert 0 <= delay <= min(papercrawl.BACKOFF_CAP, papercrawl.BACKOFF_BASE * 2 ** attempt)
+    assert papercrawl.retry_delay(_http_error(404), 0, max_retries=3) is None
+    assert papercrawl.retry_delay(ValueError('bad page'), 0, max_retries=3) is None
+    assert papercrawl.retry_delay(_http_error(429, '1'), 3, max_retries=3) is None
+
+
+def test_retries_give_up_after_max_retries(monkeypatch):
+    papercrawl.configure_rate_limit(rate=None, max_retries=2)
+    sleeps = []
+    monkeypatch.setattr(papercrawl.time, 'sleep', sleeps.append)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise URLError('connection refused')
+
+    try:
+        with pytest.raises(URLError):
+            papercrawl.call_with_retries(fail, 'test')
+    finally:
+        papercrawl.configure_rate_limit()
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_limiter_backs_off_from_a_throttling_server(tmp_path):
+    server = benchmark.start_server(benchmark.ThrottlingHandler, payload=PAYLOAD, handshake=0, capacity=10,
+                                    tokens=10.0, last=time.monotonic(), lock=threading.Lock(),
+                                    served=0, throttled=0, retry_after=1)
+    base_url = 'http://127.0.0.1:{}'.format(server.server_address[1])
+    items = [('{}/paper/{}.pdf'.format(base_url, n), str(tmp_path / '{}.pdf'.format(n)), str(n)) for n in range(30)]
+    try:
+        papercrawl.configure_rate_limit(rate=50, max_retries=6)
+        assert download_all(items, poolnum=8, engine='async') == [True] * 30
+        assert server.throttled > 0
+        assert papercrawl.RATE_LIMITER.rate('127.0.0.1') < 50
+        # without the limiter and retries the same host fails papers
+        for _, path, _ in items:
+            os.remove(path)
+        papercrawl.configure_rate_limit(rate=None, max_retries=0)
+        assert False in download_all(items, poolnum=8, engine='async')
+    finally:
+        papercrawl.configure_rate_limit()
+        server.shutdown()
+        server.server_close()
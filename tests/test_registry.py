@@ -0,0 +1,66 @@
+import pytest
+
+import papercrawl
+
+from conftest import PAYLOAD
+
+
+class ToyAdapter(papercrawl.ConferenceAdapter):
+    """A venue registered from outside papercrawl.py, whose PDFs the mock server serves."""
+    name = 'toy'
+    include_in_all = False
+
+    def list_papers(self, year):
+        return [papercrawl.Paper(str(n), 'https://aclanthology.org/{}.toy-{}.pdf'.format(year, n),
+                                 'Toy paper {}'.format(n), sub_dir='main' if n % 2 else 'findings')
+                for n in range(6)] + [('6', 'https://aclanthology.org/{}.toy-6.pdf'.format(year), 'Toy tuple', '')]
+
+
+@pytest.fixture
+def toy(monkeypatch):
+    monkeypatch.setattr(papercrawl, 'CONFERENCES', dict(papercrawl.CONFERENCES))
+    return papercrawl.register_conference(ToyAdapter())
+
+
+def _main(monkeypatch, *argv):
+    calls = []
+    monkeypatch.setattr(papercrawl, 'download_papers', lambda **kwargs: calls.append(('one', kwargs)))
+    monkeypatch.setattr(papercrawl, 'process_all_conferences', lambda **kwargs: calls.append(('all', kwargs)))
+    monkeypatch.setattr('sys.argv', ['papercrawl.py', '--no-cache', '--no-progress'] + list(argv))
+    try:
+        papercrawl.main()
+    finally:
+        papercrawl.configure_rate_limit()
+        papercrawl.configure_scheduler()
+    return calls
+
+
+def test_conference_choices_come_from_the_registry(toy, monkeypatch, tmp_path):
+    calls = _main(monkeypatch, '--conference', 'TOY', '--year', '2024', '--savedir', str(tmp_path))
+    assert calls == [('one', calls[0][1])] and calls[0][1]['conference'] == 'toy'
+
+
+def test_unknown_conference_is_a_usage_error(monkeypatch, capsys):
+    with pytest.raises(SystemExit):
+        _main(monkeypatch, '--conference', 'toy', '--year', '2024')
+    error = capsys.readouterr().err
+    assert "invalid choice: 'toy'" in error
+    assert all(name in error for name in sorted(papercrawl.CONFERENCES) + ['all'])
+
+
+def test_all_crawls_the_venues_included_in_all(toy, monkeypatch):
+    crawled = []
+    monkeypatch.setattr(papercrawl, 'crawl_conferences', lambda conferences, *args, **kwargs: crawled.extend(conferences))
+    papercrawl.process_all_conferences(year=[2024], keywords=None, savedir=None, poolnum=1, driverpath=None,
+                                       downtime=None)
+    assert 'toy' not in crawled
+    assert sorted(crawled) == sorted(name for name, adapter in papercrawl.CONFERENCES.items()
+                                     if adapter.include_in_all)
+
+
+def test_a_registered_venue_is_crawled_like_the_others(toy, mock_server, tmp_path):
+    papercrawl.crawl_conferences(['toy'], [2024], 'toy', str(tmp_path), poolnum=4)
+    saved = sorted(str(path.relative_to(tmp_path)) for path in tmp_path.glob('toy2024/**/*.pdf'))
+    assert saved == ['toy2024/[toy2024] Toy tuple.pdf'] + sorted(
+        'toy2024/{}/[toy2024] Toy paper {}.pdf'.format('main' if n % 2 else 'findings', n) for n in range(6))
+    assert all((tmp_path / path).read_bytes() == PAYLOAD for path in saved)
@@ -0,0 +1,85 @@
+import hashlib
+
+import pytest
+
+import papercrawl
+from benchmark import download_all
+
+from conftest import PAYLOAD
+
+URL = 'https://aclanthology.org/2024.acl-long.1.pdf'
+ETAG = '"{}"'.format(hashlib.sha1(PAYLOAD).hexdigest()[:16])
+
+
+@pytest.fixture(params=['async', 'pool'])
+def fetch(request, mock_server, tmp_path):
+    """Downloads URL into tmp_path/paper.pdf with one engine and returns whether it worked."""
+    def fetch():
+        return download_all([(URL, str(tmp_path / 'paper.pdf'), 'paper')], poolnum=1,
+                                       engine=request.param) == [True]
+    return fetch
+
+
+def _write(path, data):
+    path.write_bytes(data) if isinstance(data, bytes) else path.write_text(data)
+
+
+def _saved(tmp_path):
+    return (tmp_path / 'paper.pdf').read_bytes()
+
+
+def _leftovers(tmp_path):
+    return sorted(path.name for path in tmp_path.iterdir() if path.name != 'paper.pdf')
+
+
+def test_resumes_the_part_file(fetch, tmp_path):
+    # a prefix that differs from the payload shows the rest was appended to it rather than fetched again
+    prefix = b'%PDF-1.4\n' + b'\x01' * 991
+    _write(tmp_path / 'paper.pdf.part', prefix)
+    _write(tmp_path / 'paper.pdf.part.validator', ETAG)
+    assert fetch()
+    assert _saved(tmp_path) == prefix + PAYLOAD[len(prefix):]
+    assert _leftovers(tmp_path) == []
+
+
+def test_starts_over_when_the_file_changed(fetch, tmp_path):
+    _write(tmp_path / 'paper.pdf.part', b'%PDF-1.4\n' + b'\x01' * 991)
+    _write(tmp_path / 'paper.pdf.part.validator', '"an-older-version"')
+    assert fetch()
+    assert _saved(tmp_path) == PAYLOAD
+    assert _leftovers(tmp_path) == []
+
+
+def test_complete_part_file_is_moved_into_place_on_416(fetch, tmp_path):
+    _write(tmp_path / 'paper.pdf.part', PAYLOAD)
+    _write(tmp_path / 'paper.pdf.part.validator', ETAG)
+    assert fetch()
+    assert _saved(tmp_path) == PAYLOAD
+    assert _leftovers(tmp_path) == []
+
+
+def test_part_file_larger_than_the_file_is_discarded(fetch, tmp_path):
+    # e.g. the PDF was replaced by a shorter version; a 416 must not keep the stale .part for ever
+    _write(tmp_path / 'paper.pdf.part', PAYLOAD + b'\x01' * 500)
+    assert fetch()
+    assert _saved(tmp_path) == PAYLOAD
+    assert _leftovers(tmp_path) == []
+
+
+def test_cut_off_download_is_kept_as_part_file(fetch, mock_server, tmp_path):
+    mock_server.truncate_rate = 1
+    assert not fetch()
+    assert not (tmp_path / 'paper.pdf').exists()
+    assert (tmp_path / 'paper.pdf.part').read_bytes() == PAYLOAD[:len(PAYLOAD) // 2]
+    assert (tmp_path / 'paper.pdf.part.validator').read_text() == ETAG
+    mock_server.truncate_rate = 0
+    assert fetch()
+    assert _saved(tmp_path) == PAYLOAD
+    assert _leftovers(tmp_path) == []
+
+
+def test_html_instead_of_a_pdf_is_not_saved(fetch, mock_server, tmp_path):
+    mock_server.payload = b'<!DOCTYPE html><html><body>Sign in to continue</body></html>'
+    assert not fetch()
+    assert _leftovers(tmp_path) == []
+    assert not (tmp_path / 'paper.pdf').exists()
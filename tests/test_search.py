@@ -0,0 +1,96 @@
+import pytest
+
+import papercrawl
+
+RECORDS = {
+    ('acl', 2024): [
+        ('a1', 'Sparse Retrieval for Code', 'Ada Lovelace', 'Dense baselines lose to sparse ones.'),
+        ('a2', 'Agents that Plan', 'Alan Turing', 'We study sparse rewards for language agents.'),
+        ('a3', 'Translation at Scale', 'Grace Hopper', 'Machine translation without sparsity.'),
+    ],
+    ('icml', 2024): [
+        ('i1', 'Sparsely Gated Experts', 'Ada Lovelace', 'Mixtures of experts route tokens.'),
+    ],
+    ('acl', 2023): [
+        ('b1', 'Sparse Attention Revisited', 'Alan Turing', 'Attention with fewer links.'),
+    ],
+}
+
+
+def _catalog(savedir):
+    manifest = papercrawl.open_manifest(str(savedir))
+    for (conference, year), records in RECORDS.items():
+        manifest.catalog(conference, year, [
+            (paper_id, title, authors, abstract, 'https://example.org/{}.pdf'.format(paper_id),
+             str(savedir / '{}.pdf'.format(paper_id)))
+            for paper_id, title, authors, abstract in records])
+    manifest.register('acl', 2024, [('a1', 'https://example.org/a1.pdf', str(savedir / 'a1.pdf'), 'Sparse Retrieval for Code'),
+                                    ('a2', 'https://example.org/a2.pdf', str(savedir / 'a2.pdf'), 'Agents that Plan')])
+    (savedir / 'a1.pdf').write_bytes(b'%PDF-1.4\n%%EOF\n')
+    manifest.record('acl', 2024, 'a1', 'https://example.org/a1.pdf', str(savedir / 'a1.pdf'), True)
+    return manifest
+
+
+@pytest.fixture(params=['fts5', 'substring'])
+def manifest(request, tmp_path, monkeypatch):
+    if request.param == 'substring':
+        # a SQLite build without the fts5 module
+        monkeypatch.setattr(papercrawl.Manifest, 'FTS_SCHEMA',
+                            'CREATE VIRTUAL TABLE metadata_fts USING no_such_module(title);')
+    manifest = _catalog(tmp_path)
+    assert manifest.fts == (request.param == 'fts5')
+    yield manifest
+    manifest.close()
+
+
+def _ids(rows):
+    return sorted(row['paper_id'] for row in rows)
+
+
+def test_words_match_titles_authors_and_abstracts(manifest):
+    assert _ids(manifest.search('sparse')) == ['a1', 'a2', 'b1', 'i1']
+    assert _ids(manifest.search('ada lovelace')) == ['a1', 'i1']
+    assert _ids(manifest.search('sparse agents')) == ['a2']
+    assert manifest.search('quantum') == []
+
+
+def test_filters_and_limit(manifest):
+    assert _ids(manifest.search('sparse', conference='acl', year=2023)) == ['b1']
+    assert _ids(manifest.search('lovelace', conference='icml')) == ['i1']
+    assert len(manifest.search('sparse', limit=2)) == 2
+
+
+def test_rows_carry_the_download_status(manifest):
+    status = {row['paper_id']: row['status'] for row in manifest.search('sparse', conference='acl')}
+    assert status['a1'] == 'done'
+    assert status['a2'] == 'pending'
+    assert status.get('b1', None) is None
+
+
+def test_fts_ranks_titles_first_and_understands_the_syntax(tmp_path):
+    manifest = _catalog(tmp_path)
+    try:
+        assert manifest.fts
+        rows = manifest.search('sparse', conference='acl', year=2024)
+        # a title match outranks an abstract match
+        assert [row['paper_id'] for row in rows] == ['a1', 'a2']
+        assert rows[0]['score'] < rows[1]['score']
+        # the porter stemmer folds word forms, prefix queries reach further
+        assert _ids(manifest.search('sparsely')) == ['a1', 'a2', 'b1', 'i1']
+        assert _ids(manifest.search('spars*')) == ['a1', 'a2', 'a3', 'b1', 'i1']
+        assert _ids(manifest.search('sparse NOT agents')) == ['a1', 'b1', 'i1']
+        assert _ids(manifest.search('sparse OR experts')) == ['a1', 'a2', 'b1', 'i1']
+        assert _ids(manifest.search('"sparse rewards"')) == ['a2']
+        # queries FTS5 can't parse are searched as plain words
+        assert _ids(manifest.search('sparse (agents')) == ['a2']
+        assert _ids(manifest.search('retrieval-for code')) == ['a1']
+    finally:
+        manifest.close()
+
+
+def test_search_command(tmp_path, capsys):
+    _catalog(tmp_path).close()
+    papercrawl.search(['sparse', 'code', '--savedir', str(tmp_path)])
+    out = capsys.readouterr().out.splitlines()
+    assert out[:2] == ['  1. [acl2024] Sparse Retrieval for Code  (downloaded)', '     Ada Lovelace']
+    assert out[2].startswith('1 results in ')